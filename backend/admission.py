@@ -0,0 +1,178 @@
+import os
+import math
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Admission control configuration
+WORK_QUEUE_MAX_DEPTH = int(os.getenv("WORK_QUEUE_MAX_DEPTH", "1000"))
+WORK_QUEUE_WORKERS = int(os.getenv("WORK_QUEUE_WORKERS", "32"))
+# Low-priority work is only admitted while the queue is below this fraction of its depth
+WORK_QUEUE_SHED_RATIO = float(os.getenv("WORK_QUEUE_SHED_RATIO", "0.8"))
+WORK_QUEUE_MAX_RETRY_AFTER = int(os.getenv("WORK_QUEUE_MAX_RETRY_AFTER", "30"))
+
+LOW_PRIORITY = 0
+DEFAULT_PRIORITY = 1
+
+
+def _parse_priorities(value: str) -> Dict[str, int]:
+    priorities = {}
+    for item in value.split(","):
+        topic, _, priority = item.partition("=")
+        if topic.strip() and priority.strip():
+            priorities[topic.strip()] = int(priority)
+    return priorities
+
+
+# Higher numbers are more important; topics not listed get DEFAULT_PRIORITY
+TOPIC_PRIORITIES = _parse_priorities(os.getenv(
+    "WORK_QUEUE_TOPIC_PRIORITIES",
+    "product-views=0,reviews-posted=1,seller-activities=1,purchase-data=2"
+))
+
+Job = Callable[[], Awaitable]
+
+
+class WorkQueue:
+    """Bounded, prioritized in-process work queue drained by a fixed set of workers
+
+    submit() never blocks: when the queue is full it evicts the oldest queued job of a
+    lower priority, or refuses the new job so the caller can answer 429. Low-priority
+    topics are refused earlier, once the queue passes the shed ratio, which leaves
+    headroom for high-priority work during a spike.
+    """
+
+    def __init__(
+        self,
+        max_depth: int = WORK_QUEUE_MAX_DEPTH,
+        workers: int = WORK_QUEUE_WORKERS,
+        shed_ratio: float = WORK_QUEUE_SHED_RATIO,
+        priorities: Dict[str, int] = TOPIC_PRIORITIES,
+    ):
+        self.max_depth = max(1, max_depth)
+        self.worker_count = max(1, workers)
+        self.low_priority_limit = max(1, int(self.max_depth * shed_ratio))
+        self.priorities = priorities
+        self._queues: Dict[int, Deque[Tuple[str, Job]]] = {}
+        self._depth = 0
+        self._wakeup = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+        self._avg_job_seconds = 0.1
+
+        # Metrics
+        self.admitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.running = 0
+        self.shed: Dict[str, int] = {}
+        self.rejected: Dict[str, int] = {}
+
+    def priority(self, topic: str) -> int:
+        return self.priorities.get(topic, DEFAULT_PRIORITY)
+
+    def start(self):
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+        logger.info(f"🚦 Work queue started ({self.worker_count} workers, depth {self.max_depth})")
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def _lowest_queued_below(self, priority: int):
+        for queued_priority in sorted(self._queues):
+            if queued_priority >= priority:
+                break
+            if self._queues[queued_priority]:
+                return queued_priority
+        return None
+
+    def would_admit(self, topic: str) -> bool:
+        """Whether submit() for this topic would currently succeed"""
+        priority = self.priority(topic)
+        if priority <= LOW_PRIORITY and self._depth >= self.low_priority_limit:
+            return False
+        return self._depth < self.max_depth or self._lowest_queued_below(priority) is not None
+
+    def reject(self, topic: str):
+        """Count a request turned away before submitting (e.g. answered with 429)"""
+        self.rejected[topic] = self.rejected.get(topic, 0) + 1
+
+    def _count_shed(self, topic: str):
+        self.shed[topic] = self.shed.get(topic, 0) + 1
+
+    def submit(self, topic: str, job: Job) -> bool:
+        """Queue a job without blocking; False if it was shed"""
+        priority = self.priority(topic)
+        if priority <= LOW_PRIORITY and self._depth >= self.low_priority_limit:
+            self._count_shed(topic)
+            return False
+        if self._depth >= self.max_depth:
+            victim_priority = self._lowest_queued_below(priority)
+            if victim_priority is None:
+                self._count_shed(topic)
+                return False
+            victim_topic, _ = self._queues[victim_priority].popleft()
+            self._depth -= 1
+            self._count_shed(victim_topic)
+
+        self._queues.setdefault(priority, deque()).append((topic, job))
+        self._depth += 1
+        self.admitted += 1
+        self._wakeup.set()
+        return True
+
+    def _pop(self):
+        for priority in sorted(self._queues, reverse=True):
+            if self._queues[priority]:
+                self._depth -= 1
+                return self._queues[priority].popleft()
+        return None
+
+    async def _worker(self):
+        while True:
+            item = self._pop()
+            if item is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            topic, job = item
+            self.running += 1
+            started = time.monotonic()
+            try:
+                await job()
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"❌ Queued {topic} job failed: {e}")
+            finally:
+                self.running -= 1
+                self._avg_job_seconds = 0.9 * self._avg_job_seconds + 0.1 * (time.monotonic() - started)
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog is expected to drain"""
+        seconds = math.ceil(self._depth * self._avg_job_seconds / self.worker_count)
+        return max(1, min(WORK_QUEUE_MAX_RETRY_AFTER, seconds))
+
+    def stats(self) -> Dict:
+        return {
+            "depth": self._depth,
+            "depth_by_priority": {priority: len(queue) for priority, queue in sorted(self._queues.items())},
+            "max_depth": self.max_depth,
+            "low_priority_limit": self.low_priority_limit,
+            "workers": self.worker_count,
+            "running": self.running,
+            "admitted": self.admitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "shed": dict(self.shed),
+            "rejected": dict(self.rejected),
+            "avg_job_ms": round(self._avg_job_seconds * 1000, 1),
+        }
@@ -0,0 +1,182 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from ml_client import MLClient, MLRequestRejected
+
+logger = logging.getLogger(__name__)
+
+# Micro-batching configuration
+ML_BATCH_TOPICS = [t.strip() for t in os.getenv("ML_BATCH_TOPICS", "purchase-data,seller-activities").split(",") if t.strip()]
+ML_BATCH_MAX_SIZE = int(os.getenv("ML_BATCH_MAX_SIZE", "64"))
+ML_BATCH_LINGER_MS = float(os.getenv("ML_BATCH_LINGER_MS", "20"))
+ML_BATCH_MAX_IN_FLIGHT = int(os.getenv("ML_BATCH_MAX_IN_FLIGHT", "4"))
+
+
+class MicroBatcher:
+    """Coalesce single ML scoring calls into one batch request per N items or T milliseconds"""
+
+    def __init__(
+        self,
+        ml_client: MLClient,
+        endpoint: str,
+        max_batch_size: int = ML_BATCH_MAX_SIZE,
+        linger_ms: float = ML_BATCH_LINGER_MS,
+        max_in_flight: int = ML_BATCH_MAX_IN_FLIGHT,
+    ):
+        self.ml_client = ml_client
+        self.endpoint = endpoint
+        self.max_batch_size = max(1, max_batch_size)
+        self.linger = max(0.0, linger_ms) / 1000
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._in_flight = asyncio.Semaphore(max(1, max_in_flight))
+        self._task: Optional[asyncio.Task] = None
+        self._flushes: set = set()
+        # Batch taken off the queue but not yet handed to a flush (lingering or waiting for a slot)
+        self._pending: Optional[List[Tuple[Dict, asyncio.Future]]] = None
+
+        # Metrics
+        self.batches = 0
+        self.items = 0
+        self.flushed_on_size = 0
+        self.flushed_on_linger = 0
+        self.fallback_batches = 0
+        self.fallback_items = 0
+        self.failed_batches = 0
+        self.total_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+        self.last_latency_ms = 0.0
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"🧺 Micro-batcher started for {self.endpoint} "
+            f"(max_batch_size={self.max_batch_size}, linger_ms={self.linger * 1000:g})"
+        )
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+        if self._pending:
+            # Its callers are already waiting on it: send it rather than dropping it
+            batch, self._pending = self._pending, None
+            await self._in_flight.acquire()
+            await self._flush(batch)
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Micro-batcher stopped"))
+
+    async def submit(self, payload: Dict) -> Dict:
+        """Queue one payload for the next batch and wait for its individual result"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((payload, future))
+        return await future
+
+    def stats(self) -> Dict:
+        return {
+            "endpoint": self.endpoint,
+            "max_batch_size": self.max_batch_size,
+            "linger_ms": self.linger * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_fill": round(self.items / (self.batches * self.max_batch_size), 3) if self.batches else 0.0,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "flushed_on_size": self.flushed_on_size,
+            "flushed_on_linger": self.flushed_on_linger,
+            "fallback_batches": self.fallback_batches,
+            "fallback_items": self.fallback_items,
+            "failed_batches": self.failed_batches,
+            "avg_latency_ms": round(self.total_latency_ms / self.batches, 2) if self.batches else 0.0,
+            "max_latency_ms": round(self.max_latency_ms, 2),
+            "last_latency_ms": round(self.last_latency_ms, 2),
+            "queued": self._queue.qsize(),
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            self._pending = batch
+            deadline = loop.time() + self.linger
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            if len(batch) >= self.max_batch_size:
+                self.flushed_on_size += 1
+            else:
+                self.flushed_on_linger += 1
+
+            await self._in_flight.acquire()
+            task = asyncio.create_task(self._flush(batch))
+            self._pending = None
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[Tuple[Dict, asyncio.Future]]):
+        started = time.perf_counter()
+        try:
+            payloads = [payload for payload, _ in batch]
+            response = await self.ml_client.post(f"{self.endpoint}/batch", payloads)
+            results = response.json() if response.status_code == 200 else None
+
+            if isinstance(results, list) and len(results) == len(batch):
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            elif 400 <= response.status_code < 500:
+                # One invalid item fails validation for the whole batch; score items individually
+                logger.warning(f"⚠️ Batch call to {self.endpoint} returned status {response.status_code}, scoring items individually")
+                self.fallback_batches += 1
+                self.fallback_items += len(batch)
+                await asyncio.gather(*(self._score_single(payload, future) for payload, future in batch))
+            else:
+                # Retrying item by item would multiply the load on a failing service:
+                # fail every item, so each caller reports its own failure to the breaker
+                raise RuntimeError(f"ML service returned status {response.status_code}")
+        except Exception as e:
+            self.failed_batches += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._in_flight.release()
+            latency_ms = (time.perf_counter() - started) * 1000
+            self.batches += 1
+            self.items += len(batch)
+            self.total_latency_ms += latency_ms
+            self.last_latency_ms = latency_ms
+            self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+
+    async def _score_single(self, payload: Dict, future: asyncio.Future):
+        try:
+            response = await self.ml_client.post(self.endpoint, payload)
+            if 400 <= response.status_code < 500:
+                raise MLRequestRejected(f"ML service rejected the request with status {response.status_code}")
+            if response.status_code != 200:
+                raise RuntimeError(f"ML service returned status {response.status_code}")
+            if not future.done():
+                future.set_result(response.json())
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
@@ -0,0 +1,144 @@
+import os
+import time
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Circuit breaker configuration
+ML_BREAKER_WINDOW = int(os.getenv("ML_BREAKER_WINDOW", "20"))
+ML_BREAKER_MIN_CALLS = int(os.getenv("ML_BREAKER_MIN_CALLS", "10"))
+ML_BREAKER_ERROR_RATE = float(os.getenv("ML_BREAKER_ERROR_RATE", "0.5"))
+ML_BREAKER_SLOW_CALL_MS = float(os.getenv("ML_BREAKER_SLOW_CALL_MS", "1000"))
+ML_BREAKER_SLOW_CALL_RATE = float(os.getenv("ML_BREAKER_SLOW_CALL_RATE", "0.5"))
+ML_BREAKER_OPEN_SECONDS = float(os.getenv("ML_BREAKER_OPEN_SECONDS", "10"))
+ML_BREAKER_HALF_OPEN_PROBES = int(os.getenv("ML_BREAKER_HALF_OPEN_PROBES", "3"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    """Error-rate and slow-call-rate circuit breaker over a window of recent calls
+
+    - closed: calls go through; the breaker opens once the window holds at least
+      min_calls outcomes and the failure or slow-call rate reaches its threshold
+    - open: calls are refused (callers fail over) until open_seconds have passed
+    - half_open: up to half_open_probes calls are let through; all of them succeeding
+      quickly closes the breaker, any failure or slow call opens it again
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: int = ML_BREAKER_WINDOW,
+        min_calls: int = ML_BREAKER_MIN_CALLS,
+        error_rate: float = ML_BREAKER_ERROR_RATE,
+        slow_call_ms: float = ML_BREAKER_SLOW_CALL_MS,
+        slow_call_rate: float = ML_BREAKER_SLOW_CALL_RATE,
+        open_seconds: float = ML_BREAKER_OPEN_SECONDS,
+        half_open_probes: int = ML_BREAKER_HALF_OPEN_PROBES,
+    ):
+        self.name = name
+        self.min_calls = max(1, min_calls)
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_ms / 1000
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_probes = max(1, half_open_probes)
+        # (failed, slow) per recent call
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=max(self.min_calls, window))
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probes_started = 0
+        self._probes_succeeded = 0
+
+        # Metrics
+        self.transitions: Dict[str, int] = {}
+        self.last_transition: Optional[str] = None
+        self.rejected = 0
+        self.released = 0
+        self.failures = 0
+        self.slow_calls = 0
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        change = f"{self.state}->{state}"
+        self.transitions[change] = self.transitions.get(change, 0) + 1
+        self.last_transition = change
+        logger.warning(f"⚡ Circuit breaker for {self.name}: {change}")
+        self.state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        elif state == HALF_OPEN:
+            self._probes_started = 0
+            self._probes_succeeded = 0
+        else:
+            self._outcomes.clear()
+
+    def allow(self) -> bool:
+        """Whether a call may go to the remote service right now"""
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and self._probes_started < self.half_open_probes:
+            self._probes_started += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def record(self, succeeded: bool, latency_seconds: float):
+        """Report the outcome of a call that allow() let through"""
+        slow = latency_seconds >= self.slow_call_seconds
+        failed = not succeeded
+        self.failures += failed
+        self.slow_calls += slow
+
+        if self.state == HALF_OPEN:
+            if failed or slow:
+                self._transition(OPEN)
+                return
+            self._probes_succeeded += 1
+            if self._probes_succeeded >= self.half_open_probes:
+                self._transition(CLOSED)
+            return
+        if self.state == OPEN:
+            # Call started before the breaker opened
+            return
+
+        self._outcomes.append((failed, slow))
+        calls = len(self._outcomes)
+        if calls < self.min_calls:
+            return
+        failure_rate = sum(1 for f, _ in self._outcomes if f) / calls
+        slow_rate = sum(1 for _, s in self._outcomes if s) / calls
+        if failure_rate >= self.error_rate or slow_rate >= self.slow_call_rate:
+            self._transition(OPEN)
+
+    def release(self):
+        """Hand back a call allow() let through that says nothing about the service's health
+
+        For calls rejected as invalid by the caller's own payload (so bad input from one
+        client cannot open the breaker for everyone) and calls that were cancelled. In
+        half-open state the probe slot is freed for the next call.
+        """
+        self.released += 1
+        if self.state == HALF_OPEN and self._probes_started > self._probes_succeeded:
+            self._probes_started -= 1
+
+    def stats(self) -> Dict:
+        calls = len(self._outcomes)
+        return {
+            "state": self.state,
+            "window_calls": calls,
+            "window_failure_rate": round(sum(1 for f, _ in self._outcomes if f) / calls, 3) if calls else 0.0,
+            "window_slow_rate": round(sum(1 for _, s in self._outcomes if s) / calls, 3) if calls else 0.0,
+            "transitions": dict(self.transitions),
+            "last_transition": self.last_transition,
+            "rejected": self.rejected,
+            "released": self.released,
+            "failures": self.failures,
+            "slow_calls": self.slow_calls,
+        }
@@ -0,0 +1,196 @@
+import os
+import zlib
+import asyncio
+import logging
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from aiokafka import AIOKafkaConsumer, ConsumerRebalanceListener, TopicPartition
+
+logger = logging.getLogger(__name__)
+
+# Worker pool configuration
+KAFKA_CONSUMER_MODE = os.getenv("KAFKA_CONSUMER_MODE", "pool")  # "pool" or "sequential"
+KAFKA_WORKER_DEFAULT_CONCURRENCY = int(os.getenv("KAFKA_WORKER_DEFAULT_CONCURRENCY", "8"))
+KAFKA_WORKER_QUEUE_SIZE = int(os.getenv("KAFKA_WORKER_QUEUE_SIZE", "100"))
+KAFKA_COMMIT_INTERVAL_MS = int(os.getenv("KAFKA_COMMIT_INTERVAL_MS", "1000"))
+
+# Per-topic concurrency overrides, e.g. "product-views=16,purchase-data=32"
+KAFKA_WORKER_CONCURRENCY = {
+    topic.strip(): int(value)
+    for topic, _, value in (
+        item.partition("=") for item in os.getenv("KAFKA_WORKER_CONCURRENCY", "").split(",") if "=" in item
+    )
+}
+
+# Event field that defines processing order for each topic
+TOPIC_ORDERING_KEYS = {
+    "reviews-posted": "product_id",
+    "product-views": "product_id",
+    "purchase-data": "product_id",
+    "seller-activities": "seller_id",
+}
+
+
+def event_ordering_key(topic: str, event: Dict) -> Optional[str]:
+    """Key whose events must be processed in order (product_id or seller_id)"""
+    key = event.get(TOPIC_ORDERING_KEYS.get(topic, "product_id")) or event.get("product_id")
+    return str(key) if key is not None else None
+
+
+class PartitionOffsets:
+    """Track in-flight offsets of one partition and the highest contiguous completed offset"""
+
+    __slots__ = ("pending", "done", "committable", "committed")
+
+    def __init__(self):
+        self.pending = deque()
+        self.done = set()
+        self.committable: Optional[int] = None
+        self.committed: Optional[int] = None
+
+    def add(self, offset: int):
+        self.pending.append(offset)
+
+    def complete(self, offset: int):
+        self.done.add(offset)
+        while self.pending and self.pending[0] in self.done:
+            finished = self.pending.popleft()
+            self.done.discard(finished)
+            self.committable = finished + 1
+
+
+class KeyedWorkerPool:
+    """Bounded-concurrency worker pool that keeps messages with the same key in order
+
+    Each key is pinned to one worker, so per-key order is preserved while different keys
+    are processed concurrently. Offsets become committable only once every earlier
+    message of the partition has finished processing.
+    """
+
+    def __init__(
+        self,
+        topic: str,
+        handler: Callable[[Dict], Awaitable[None]],
+        concurrency: int,
+        queue_size: int = KAFKA_WORKER_QUEUE_SIZE,
+    ):
+        self.topic = topic
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self._queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=queue_size) for _ in range(self.concurrency)]
+        self._workers: List[asyncio.Task] = []
+        self._offsets: Dict[TopicPartition, PartitionOffsets] = {}
+
+        # Metrics
+        self.processed = 0
+        self.failed = 0
+        self.commits = 0
+
+    async def start(self):
+        self._workers = [asyncio.create_task(self._worker(queue)) for queue in self._queues]
+        logger.info(f"👷 Started {self.concurrency} key-ordered workers for topic: {self.topic}")
+
+    async def stop(self, drain: bool = True):
+        if drain:
+            await asyncio.gather(*(queue.join() for queue in self._queues))
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, message):
+        """Dispatch a consumed record to its key's worker; waits when that worker is full"""
+        tp = TopicPartition(message.topic, message.partition)
+        offsets = self._offsets.setdefault(tp, PartitionOffsets())
+        offsets.add(message.offset)
+
+        key = event_ordering_key(self.topic, message.value) if isinstance(message.value, dict) else None
+        if key is None and message.key is not None:
+            key = message.key if isinstance(message.key, str) else message.key.decode("utf-8", "replace")
+        index = zlib.crc32(key.encode("utf-8")) % self.concurrency if key is not None else message.offset % self.concurrency
+        await self._queues[index].put((offsets, message))
+
+    def take_commits(self, partitions=None) -> Dict[TopicPartition, int]:
+        """Offsets that advanced since the last commit (optionally limited to some partitions)"""
+        commits = {}
+        for tp, offsets in self._offsets.items():
+            if partitions is not None and tp not in partitions:
+                continue
+            if offsets.committable is not None and offsets.committable != offsets.committed:
+                commits[tp] = offsets.committable
+        return commits
+
+    def mark_committed(self, commits: Dict[TopicPartition, int]):
+        for tp, offset in commits.items():
+            if tp in self._offsets:
+                self._offsets[tp].committed = offset
+        self.commits += 1
+
+    def forget(self, partitions):
+        for tp in partitions:
+            self._offsets.pop(tp, None)
+
+    def stats(self) -> Dict:
+        return {
+            "concurrency": self.concurrency,
+            "queued": sum(queue.qsize() for queue in self._queues),
+            "in_flight": sum(len(offsets.pending) for offsets in self._offsets.values()),
+            "processed": self.processed,
+            "failed": self.failed,
+            "commits": self.commits,
+        }
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            offsets, message = await queue.get()
+            try:
+                await self.handler(message.value)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"❌ Worker failed on {self.topic} offset {message.offset}: {e}")
+            finally:
+                # Completion goes to the tracker the record was registered with, so
+                # records of a revoked partition cannot advance a later assignment
+                offsets.complete(message.offset)
+                queue.task_done()
+
+
+class CommitOnRevoke(ConsumerRebalanceListener):
+    """Commit finished offsets before partitions move to another consumer"""
+
+    def __init__(self, consumer: AIOKafkaConsumer, pool: KeyedWorkerPool):
+        self.consumer = consumer
+        self.pool = pool
+
+    async def on_partitions_revoked(self, revoked):
+        commits = self.pool.take_commits(set(revoked))
+        if commits:
+            try:
+                await self.consumer.commit(commits)
+                self.pool.mark_committed(commits)
+            except Exception as e:
+                logger.warning(f"⚠️ Commit on revoke failed for {self.pool.topic}: {e}")
+        self.pool.forget(revoked)
+
+    async def on_partitions_assigned(self, assigned):
+        pass
+
+
+async def commit_periodically(consumer: AIOKafkaConsumer, pool: KeyedWorkerPool):
+    """Commit completed offsets of a worker pool every KAFKA_COMMIT_INTERVAL_MS"""
+    while True:
+        await asyncio.sleep(KAFKA_COMMIT_INTERVAL_MS / 1000)
+        await commit_completed(consumer, pool)
+
+
+async def commit_completed(consumer: AIOKafkaConsumer, pool: KeyedWorkerPool):
+    commits = pool.take_commits()
+    if not commits:
+        return
+    try:
+        await consumer.commit(commits)
+        pool.mark_committed(commits)
+    except Exception as e:
+        logger.warning(f"⚠️ Offset commit failed for {pool.topic}: {e}")
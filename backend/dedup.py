@@ -0,0 +1,175 @@
+import os
+import math
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Idempotency configuration
+EVENT_DEDUP_BACKEND = os.getenv("EVENT_DEDUP_BACKEND", "redis")  # "redis" or "bloom"
+EVENT_DEDUP_LRU_SIZE = int(os.getenv("EVENT_DEDUP_LRU_SIZE", "100000"))
+EVENT_DEDUP_WINDOW_SECONDS = int(os.getenv("EVENT_DEDUP_WINDOW_SECONDS", "3600"))
+EVENT_DEDUP_BLOOM_CAPACITY = int(os.getenv("EVENT_DEDUP_BLOOM_CAPACITY", "1000000"))
+EVENT_DEDUP_BLOOM_ERROR_RATE = float(os.getenv("EVENT_DEDUP_BLOOM_ERROR_RATE", "0.0001"))
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over a blake2b digest"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str) -> bool:
+        """Add item; returns True if it was (probably) already present"""
+        present = True
+        for position in self._positions(item):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                present = False
+                self.bits[byte] |= 1 << bit
+        return present
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[p // 8] & (1 << (p % 8)) for p in self._positions(item))
+
+
+class RotatingBloomFilter:
+    """Two-generation Bloom filter that forgets items after one to two windows"""
+
+    def __init__(self, capacity: int, error_rate: float, window_seconds: int):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.window_seconds = window_seconds
+        self.current = BloomFilter(capacity, error_rate)
+        self.previous: Optional[BloomFilter] = None
+        self.rotated_at = time.monotonic()
+
+    def add(self, item: str) -> bool:
+        now = time.monotonic()
+        if now - self.rotated_at >= self.window_seconds:
+            self.previous, self.current = self.current, BloomFilter(self.capacity, self.error_rate)
+            self.rotated_at = now
+        if self.previous is not None and item in self.previous:
+            self.current.add(item)
+            return True
+        return self.current.add(item)
+
+
+class EventDeduplicator:
+    """Claim event IDs so each event is processed once, whichever path sees it first
+
+    An in-process LRU answers repeats seen by this replica without I/O. Misses claim
+    the ID with Redis SET NX over a time window (shared by all replicas), or with a
+    rotating in-process Bloom filter when EVENT_DEDUP_BACKEND=bloom. Bloom filter
+    claims cannot be released, so with that backend a failed event is not retried.
+    """
+
+    def __init__(
+        self,
+        redis_client=None,
+        backend: str = EVENT_DEDUP_BACKEND,
+        lru_size: int = EVENT_DEDUP_LRU_SIZE,
+        window_seconds: int = EVENT_DEDUP_WINDOW_SECONDS,
+    ):
+        self.redis_client = redis_client
+        self.backend = backend
+        self.lru_size = lru_size
+        self.window_seconds = window_seconds
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        self._bloom = (
+            RotatingBloomFilter(EVENT_DEDUP_BLOOM_CAPACITY, EVENT_DEDUP_BLOOM_ERROR_RATE, window_seconds)
+            if backend == "bloom" else None
+        )
+
+        # Metrics
+        self.checked = 0
+        self.duplicates_suppressed = 0
+        self.lru_hits = 0
+        self.shared_hits = 0
+        self.backend_errors = 0
+
+    def _remember(self, event_id: str):
+        self._seen[event_id] = time.monotonic()
+        self._seen.move_to_end(event_id)
+        while len(self._seen) > self.lru_size:
+            self._seen.popitem(last=False)
+
+    def _seen_recently(self, event_id: str) -> bool:
+        seen_at = self._seen.get(event_id)
+        if seen_at is None:
+            return False
+        if time.monotonic() - seen_at > self.window_seconds:
+            del self._seen[event_id]
+            return False
+        self._seen.move_to_end(event_id)
+        return True
+
+    async def claim(self, event_id: Optional[str]) -> bool:
+        """Return True if this caller should process the event, False if it is a duplicate"""
+        if not event_id or event_id == "unknown":
+            return True
+        self.checked += 1
+
+        if self._seen_recently(event_id):
+            self.lru_hits += 1
+            self.duplicates_suppressed += 1
+            return False
+
+        duplicate = False
+        if self._bloom is not None:
+            duplicate = self._bloom.add(event_id)
+        elif self.redis_client is not None:
+            try:
+                claimed = await self.redis_client.set(
+                    f"event_seen:{event_id}", "1", nx=True, ex=self.window_seconds
+                )
+                duplicate = not claimed
+            except Exception as e:
+                # Fail open: better to score twice than to drop an event
+                self.backend_errors += 1
+                logger.warning(f"⚠️ Event dedup backend unavailable: {e}")
+
+        self._remember(event_id)
+        if duplicate:
+            self.shared_hits += 1
+            self.duplicates_suppressed += 1
+            return False
+        return True
+
+    async def release(self, event_id: Optional[str]):
+        """Forget a claim so a failed event can be retried by another path
+
+        Only the LRU and Redis claims are dropped: a Bloom filter cannot remove an
+        item, so with the bloom backend the event stays claimed until its window
+        rotates out.
+        """
+        if not event_id or event_id == "unknown":
+            return
+        self._seen.pop(event_id, None)
+        if self._bloom is None and self.redis_client is not None:
+            try:
+                await self.redis_client.delete(f"event_seen:{event_id}")
+            except Exception:
+                self.backend_errors += 1
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.backend,
+            "checked": self.checked,
+            "duplicates_suppressed": self.duplicates_suppressed,
+            "lru_hits": self.lru_hits,
+            "shared_hits": self.shared_hits,
+            "backend_errors": self.backend_errors,
+            "lru_entries": len(self._seen),
+        }
@@ -0,0 +1,70 @@
+import os
+import logging
+from typing import Dict
+
+from fraud_scoring import (
+    ScoringExecutor, load_near_duplicate_index,
+    score_review, score_view_pattern, score_purchase, score_seller,
+)
+from ml_client import ML_REQUEST_MODELS
+
+logger = logging.getLogger(__name__)
+
+# Embedded scoring configuration (ML_SCORING_MODE=embedded); this module loads the
+# rules, so the backend only imports it in that mode
+ML_EMBEDDED_EXECUTION_MODE = os.getenv("ML_EMBEDDED_EXECUTION_MODE", "inline")
+ML_EMBEDDED_WORKERS = int(os.getenv("ML_EMBEDDED_WORKERS", str(os.cpu_count() or 1)))
+
+# ML endpoint → (request model, scoring function)
+EMBEDDED_ENDPOINTS = {
+    "/analyze/review": (ML_REQUEST_MODELS["/analyze/review"], score_review),
+    "/analyze/view-pattern": (ML_REQUEST_MODELS["/analyze/view-pattern"], score_view_pattern),
+    "/analyze/purchase": (ML_REQUEST_MODELS["/analyze/purchase"], score_purchase),
+    "/analyze/seller": (ML_REQUEST_MODELS["/analyze/seller"], score_seller),
+}
+
+
+class EmbeddedScorer:
+    """Scores ML endpoint payloads with the in-process rules instead of an HTTP round trip
+
+    Payloads are validated with the same request models as the ML service, so a
+    payload the service would reject with 422 raises here as well.
+    """
+
+    def __init__(self, execution_mode: str = ML_EMBEDDED_EXECUTION_MODE, workers: int = ML_EMBEDDED_WORKERS):
+        self.executor = ScoringExecutor(execution_mode, workers)
+        # Same near-duplicate check as the ML service (and the same index, through NEAR_DUP_REDIS_URL)
+        self.review_duplicates = load_near_duplicate_index()
+        self.calls: Dict[str, int] = {}
+
+    async def start(self):
+        await self.executor.start()
+        if self.review_duplicates:
+            await self.review_duplicates.start()
+        logger.info(f"🧠 Embedded scoring ready ({self.executor.mode} execution)")
+
+    async def stop(self):
+        if self.review_duplicates:
+            await self.review_duplicates.stop()
+        await self.executor.stop()
+
+    def _endpoint(self, endpoint: str):
+        if endpoint not in EMBEDDED_ENDPOINTS:
+            raise ValueError(f"No embedded scorer for {endpoint}")
+        self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+        return EMBEDDED_ENDPOINTS[endpoint]
+
+    async def score(self, endpoint: str, payload: Dict) -> Dict:
+        model, scorer = self._endpoint(endpoint)
+        request = model.model_validate(payload)
+        result = await self.executor.run(scorer, request)
+        if endpoint == "/analyze/review" and self.review_duplicates:
+            result = await self.review_duplicates.annotate(request, result)
+        return result
+
+    def stats(self) -> Dict:
+        return dict(
+            self.executor.stats(),
+            endpoint_calls=dict(self.calls),
+            review_duplicates=self.review_duplicates.stats() if self.review_duplicates else None,
+        )
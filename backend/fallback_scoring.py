@@ -0,0 +1,87 @@
+from typing import Callable, Dict
+
+# Local heuristics used when the ML service is unavailable or its circuit is open.
+# They take the same payloads as the ML endpoints and return the fields the
+# backend reads from ML results.
+
+FALLBACK_MODEL_VERSION = "fallback_heuristics_v1"
+
+
+def fallback_review(payload: Dict) -> Dict:
+    paste_count = payload.get("paste_count", 0)
+    typing_duration = payload.get("typing_duration_seconds", 60)
+    authenticity_score = max(20, 100 - (paste_count * 20) - (max(0, 10 - typing_duration) * 5))
+    fake_indicators = []
+    if paste_count > 2:
+        fake_indicators.append("Multiple paste operations detected")
+    if typing_duration < 5:
+        fake_indicators.append("Extremely fast typing speed")
+    return {
+        "authenticity_score": authenticity_score,
+        "is_fake": paste_count > 2 or typing_duration < 5,
+        "fake_indicators": fake_indicators,
+        "model_version": FALLBACK_MODEL_VERSION
+    }
+
+
+def fallback_view_pattern(payload: Dict) -> Dict:
+    # The aggregated window already carries quality and bot estimates
+    view_quality_score = payload.get("view_quality_score", 0)
+    return {
+        "view_quality_score": view_quality_score,
+        "bot_probability": payload.get("bot_probability", 0.0),
+        "traffic_pattern": payload.get("traffic_pattern", "organic"),
+        "anomaly_flags": [],
+        "recommendation": "monitor" if view_quality_score < 60 else "normal"
+    }
+
+
+def fallback_purchase(payload: Dict) -> Dict:
+    legitimacy_score = 100
+    risk_factors = []
+    if payload.get("account_age_days", 365) < 7:
+        legitimacy_score -= 30
+        risk_factors.append("Very new account making purchase")
+    if payload.get("payment_method_type") in ["prepaid_card", "cryptocurrency"]:
+        legitimacy_score -= 20
+        risk_factors.append("High-risk payment method")
+    if payload.get("time_to_purchase_minutes", 60) < 2:
+        legitimacy_score -= 20
+        risk_factors.append("Extremely quick purchase decision")
+    legitimacy_score = max(10, legitimacy_score)
+    fraud_risk_level = "high" if legitimacy_score < 40 else "medium" if legitimacy_score < 70 else "low"
+    return {
+        "legitimacy_score": legitimacy_score,
+        "fraud_risk_level": fraud_risk_level,
+        "risk_factors": risk_factors,
+        "requires_manual_review": fraud_risk_level != "low"
+    }
+
+
+def fallback_seller(payload: Dict) -> Dict:
+    reputation_score = 100
+    behavior_patterns = []
+    if payload.get("account_age_days", 365) < 30:
+        reputation_score -= 25
+        behavior_patterns.append("New seller account")
+    if payload.get("frequency_last_24h", 1) > 50:
+        reputation_score -= 30
+        behavior_patterns.append("Extremely high activity frequency")
+    if payload.get("activity_type") in ["bulk_price_changes", "inventory_manipulation", "fake_reviews"]:
+        reputation_score -= 20
+        behavior_patterns.append(f"Suspicious activity: {payload.get('activity_type')}")
+    reputation_score = max(10, reputation_score)
+    activity_classification = "fraudulent" if reputation_score < 40 else "suspicious" if reputation_score < 70 else "normal"
+    return {
+        "reputation_score": reputation_score,
+        "activity_classification": activity_classification,
+        "behavior_patterns": behavior_patterns
+    }
+
+
+FALLBACK_SCORERS: Dict[str, Callable[[Dict], Dict]] = {
+    "/analyze/review": fallback_review,
+    "/analyze/view-pattern": fallback_view_pattern,
+    "/analyze/purchase": fallback_purchase,
+    "/analyze/seller": fallback_seller,
+}
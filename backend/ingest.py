@@ -0,0 +1,122 @@
+import os
+import json
+import asyncio
+import logging
+from typing import Dict, List, Tuple
+
+from aiokafka import codec
+
+from consumer_pool import event_ordering_key
+
+logger = logging.getLogger(__name__)
+
+# Producer batching configuration
+KAFKA_LINGER_MS = int(os.getenv("KAFKA_LINGER_MS", "5"))
+KAFKA_MAX_BATCH_BYTES = int(os.getenv("KAFKA_MAX_BATCH_BYTES", "65536"))
+KAFKA_COMPRESSION_TYPE = os.getenv("KAFKA_COMPRESSION_TYPE", "none")  # none | gzip | snappy | lz4 | zstd
+KAFKA_BULK_MAX_EVENTS = int(os.getenv("KAFKA_BULK_MAX_EVENTS", "5000"))
+
+# "all": wait until the broker confirms every event; "none": return once events are queued
+ACK_MODES = ("all", "none")
+
+COMPRESSION_CODECS = {
+    "gzip": codec.has_gzip,
+    "snappy": codec.has_snappy,
+    "lz4": codec.has_lz4,
+    "zstd": codec.has_zstd,
+}
+
+
+def producer_batching_options() -> Dict:
+    """Linger, batch size and compression settings for AIOKafkaProducer"""
+    compression = KAFKA_COMPRESSION_TYPE.lower()
+    if compression in ("", "none"):
+        compression = None
+    elif compression not in COMPRESSION_CODECS:
+        logger.warning(f"⚠️ Unknown Kafka compression type '{KAFKA_COMPRESSION_TYPE}', sending uncompressed")
+        compression = None
+    elif not COMPRESSION_CODECS[compression]():
+        logger.warning(f"⚠️ {compression} codec library not installed, sending uncompressed")
+        compression = None
+    return {
+        "linger_ms": KAFKA_LINGER_MS,
+        "max_batch_size": KAFKA_MAX_BATCH_BYTES,
+        "compression_type": compression,
+    }
+
+
+def parse_bulk_events(body: bytes, content_type: str = "") -> List[Tuple[str, Dict]]:
+    """Parse a JSON array or NDJSON body of {"topic": ..., "event": {...}} items
+
+    Raises ValueError if the body or any item is malformed.
+    """
+    text = body.decode("utf-8").strip()
+    if not text:
+        return []
+    if "ndjson" in content_type or not text.startswith("["):
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        items = json.loads(text)
+        if not isinstance(items, list):
+            raise ValueError("Expected a JSON array of events")
+
+    if len(items) > KAFKA_BULK_MAX_EVENTS:
+        raise ValueError(f"At most {KAFKA_BULK_MAX_EVENTS} events per request")
+
+    events = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get("topic"), str) or not isinstance(item.get("event"), dict):
+            raise ValueError(f"Item {index} must be an object with 'topic' and 'event'")
+        events.append((item["topic"], item["event"]))
+    return events
+
+
+class BulkProducer:
+    """Enqueue many events with send() and let the producer batch them
+
+    Delivery futures of one request are awaited together (ack mode "all") or left to
+    complete in the background (ack mode "none"), with failures counted either way.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.events_sent = 0
+        self.events_failed = 0
+        self.fire_and_forget = 0
+
+    def _on_delivery(self, future: asyncio.Future):
+        if future.cancelled() or future.exception() is not None:
+            self.events_failed += 1
+
+    async def send(self, producer, events: List[Tuple[str, Dict]], ack_mode: str = "all") -> Dict:
+        self.requests += 1
+        futures = []
+        enqueue_failed = 0
+        for topic, event in events:
+            try:
+                # send() only waits if the producer's buffer is full
+                futures.append(await producer.send(topic, event, key=event_ordering_key(topic, event)))
+            except Exception as e:
+                enqueue_failed += 1
+                logger.warning(f"⚠️ Failed to enqueue event for topic '{topic}': {e}")
+        self.events_failed += enqueue_failed
+        self.events_sent += len(futures)
+
+        if ack_mode == "none":
+            self.fire_and_forget += len(futures)
+            for future in futures:
+                future.add_done_callback(self._on_delivery)
+            return {"queued": len(futures), "failed": enqueue_failed}
+
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        delivery_failed = sum(1 for result in results if isinstance(result, Exception))
+        self.events_failed += delivery_failed
+        return {"delivered": len(futures) - delivery_failed, "failed": enqueue_failed + delivery_failed}
+
+    def stats(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "events_sent": self.events_sent,
+            "events_failed": self.events_failed,
+            "fire_and_forget": self.fire_and_forget,
+        }
@@ -1,19 +1,39 @@
 import os
 import json
+import time
 import asyncio
 from datetime import datetime
 from typing import Dict, List, Optional
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 import redis.asyncio as redis
 from aiokafka import AIOKafkaProducer, AIOKafkaConsumer
 from aiokafka.errors import KafkaError
-import httpx
 import logging
 
+from ml_client import MLClient, MLRequestRejected, ML_REQUEST_MODELS
+from batching import MicroBatcher, ML_BATCH_TOPICS, ML_BATCH_MAX_SIZE, ML_BATCH_LINGER_MS
+from consumer_pool import (
+    KeyedWorkerPool, CommitOnRevoke, commit_periodically, commit_completed, event_ordering_key,
+    KAFKA_CONSUMER_MODE, KAFKA_WORKER_CONCURRENCY, KAFKA_WORKER_DEFAULT_CONCURRENCY
+)
+from dedup import EventDeduplicator
+from recompute import RecomputeScheduler
+from trust_engine import TrustScoreEngine
+from trust_cache import TrustScoreCache
+from ws_hub import WebSocketHub
+from ws_fanout import RedisFanout
+from ws_delta import TrustScoreVersions
+from admission import WorkQueue
+from view_windows import ViewWindowEngine, view_pattern_request
+from sessions import Sessionizer
+from ingest import BulkProducer, parse_bulk_events, producer_batching_options, ACK_MODES
+from circuit_breaker import CircuitBreaker
+from fallback_scoring import FALLBACK_SCORERS
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,16 +42,76 @@ logger = logging.getLogger(__name__)
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092")
 ML_SERVICE_URL = os.getenv("ML_SERVICE_URL", "http://localhost:8000")
+TRUST_SCORE_BULK_MAX_IDS = int(os.getenv("TRUST_SCORE_BULK_MAX_IDS", "500"))
+
+# Scoring mode: "remote" calls the ML service over HTTP, "embedded" runs the shared
+# fraud_scoring rules inside the backend (inline, thread pool or process pool)
+ML_SCORING_MODE = os.getenv("ML_SCORING_MODE", "remote")
+SCORING_MODES = ("remote", "embedded")
+
+# ML endpoint used to score each Kafka topic
+TOPIC_ML_ENDPOINTS = {
+    "product-views": "/analyze/view-pattern",
+    "purchase-data": "/analyze/purchase",
+    "seller-activities": "/analyze/seller",
+}
 
 # Global variables
 redis_client = None
 kafka_producer = None
-connected_websockets: List[WebSocket] = []
+ml_client: Optional[MLClient] = None
+embedded_scorer = None  # EmbeddedScorer in embedded mode
+ml_batchers: Dict[str, MicroBatcher] = {}
+ml_breakers: Dict[str, CircuitBreaker] = {endpoint: CircuitBreaker(endpoint) for endpoint in FALLBACK_SCORERS}
+consumer_pools: Dict[str, KeyedWorkerPool] = {}
+event_deduplicator = EventDeduplicator()
+trust_engine = TrustScoreEngine()
+trust_score_cache = TrustScoreCache()
+trust_score_scheduler = RecomputeScheduler(lambda product_id: update_trust_score(product_id))
+websocket_hub = WebSocketHub()
+trust_score_versions = TrustScoreVersions()
+bulk_producer = BulkProducer()
+work_queue = WorkQueue()
+view_windows = ViewWindowEngine(lambda pid, metrics, views: analyze_view_window(pid, metrics, views))
+view_sessions = Sessionizer(lambda product_ids, features, bot_probability: handle_closed_session(product_ids, features, bot_probability))
+websocket_fanout = RedisFanout(
+    websocket_hub,
+    on_remote_message=lambda product_id, message: handle_remote_update(product_id, message)
+)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    global redis_client, kafka_producer
+    global redis_client, kafka_producer, ml_client, event_deduplicator, trust_engine, trust_score_cache
+    global trust_score_versions, embedded_scorer
+    
+    # Bounded workers for event processing triggered by API requests
+    work_queue.start()
+    
+    # Initialize shared ML service client (pooled, keep-alive connections)
+    ml_client = MLClient(ML_SERVICE_URL)
+    await ml_client.start()
+    
+    # Windowed aggregation of product views (replaces per-view Flink simulation)
+    view_windows.start()
+    view_sessions.start()
+    
+    if ML_SCORING_MODE not in SCORING_MODES:
+        logger.warning(f"⚠️ Unknown ML scoring mode '{ML_SCORING_MODE}', using remote")
+    
+    if ML_SCORING_MODE == "embedded":
+        # Run the shared scoring rules in-process instead of calling the ML service
+        # (imported here: it loads the rule tables, lexicon and text model)
+        from embedded_scoring import EmbeddedScorer
+        embedded_scorer = EmbeddedScorer()
+        await embedded_scorer.start()
+    else:
+        # Coalesce ML calls for high-volume topics into batch requests
+        for topic in ML_BATCH_TOPICS:
+            endpoint = TOPIC_ML_ENDPOINTS.get(topic)
+            if endpoint:
+                ml_batchers[endpoint] = MicroBatcher(ml_client, endpoint)
+                await ml_batchers[endpoint].start()
     
     try:
         # Initialize Redis
@@ -39,15 +119,30 @@ async def lifespan(app: FastAPI):
         await redis_client.ping()
         logger.info("✅ Connected to Redis")
         
+        # Share event claims across replicas and processing paths
+        event_deduplicator = EventDeduplicator(redis_client)
+        
+        # Keep trust score counters in Redis so all replicas share them
+        trust_engine = TrustScoreEngine(redis_client)
+        trust_score_cache = TrustScoreCache(redis_client)
+        
+        # Sequence numbers for delta-encoded pushes are shared through Redis
+        trust_score_versions = TrustScoreVersions(redis_client)
+        
+        # Relay WebSocket updates between backend replicas
+        await websocket_fanout.start(redis_client)
+        
         # Initialize Async Kafka Producer with error handling
         try:
             kafka_producer = AIOKafkaProducer(
                 bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS,
                 value_serializer=lambda v: json.dumps(v).encode('utf-8'),
+                key_serializer=lambda k: k.encode('utf-8') if k is not None else None,
                 retry_backoff_ms=1000,
                 request_timeout_ms=30000,
                 enable_idempotence=True,
-                acks='all'
+                acks='all',
+                **producer_batching_options()
             )
             await kafka_producer.start()
             logger.info("✅ Connected to Kafka with async producer")
@@ -66,6 +161,18 @@ async def lifespan(app: FastAPI):
     yield
     
     # Shutdown
+    await work_queue.stop()
+    await view_sessions.stop()
+    await view_windows.stop()
+    await trust_score_scheduler.stop()
+    await websocket_fanout.stop()
+    await websocket_hub.close_all()
+    for batcher in ml_batchers.values():
+        await batcher.stop()
+    if ml_client:
+        await ml_client.close()
+    if embedded_scorer:
+        await embedded_scorer.stop()
     if redis_client:
         await redis_client.close()
     if kafka_producer:
@@ -104,6 +211,9 @@ class TrustScore(BaseModel):
     trend: str
     lastUpdated: str
 
+class BulkTrustScoreRequest(BaseModel):
+    product_ids: List[str]
+
 class ReviewSubmission(BaseModel):
     rating: int
     headline: str
@@ -128,6 +238,7 @@ class Review(BaseModel):
     isFake: bool
     fakeReasons: List[str]
     location: Optional[str] = None
+    scorer: Optional[str] = None
 
 # Health check
 @app.get("/health")
@@ -141,43 +252,85 @@ async def health_check():
         "services": {
             "kafka": kafka_status,
             "redis": redis_status,
-            "ml_service": ML_SERVICE_URL
+            "ml_service": ML_SERVICE_URL if embedded_scorer is None else "embedded"
         }
     }
 
+# Processing metrics
+@app.get("/api/metrics")
+async def get_metrics():
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "ml_batching": {endpoint: batcher.stats() for endpoint, batcher in ml_batchers.items()},
+        "embedded_scoring": embedded_scorer.stats() if embedded_scorer else None,
+        "ml_circuit_breakers": {endpoint: breaker.stats() for endpoint, breaker in ml_breakers.items()},
+        "kafka_consumers": {topic: pool.stats() for topic, pool in consumer_pools.items()},
+        "kafka_bulk_producer": bulk_producer.stats(),
+        "work_queue": work_queue.stats(),
+        "view_windows": view_windows.stats(),
+        "view_sessions": view_sessions.stats(),
+        "event_dedup": event_deduplicator.stats(),
+        "trust_score_recompute": trust_score_scheduler.stats(),
+        "trust_score_cache": trust_score_cache.stats(),
+        "websockets": websocket_hub.stats(),
+        "websocket_fanout": websocket_fanout.stats(),
+        "websocket_versions": trust_score_versions.stats()
+    }
+
 # Get trust score for a product
 @app.get("/api/trust-score/{product_id}")
 async def get_trust_score(product_id: str):
     try:
-        # Try to get from Redis cache first
-        if redis_client:
-            cached_score = await redis_client.get(f"trust_score:{product_id}")
-            if cached_score:
-                logger.info(f"📊 Trust score retrieved from cache for product {product_id}")
-                return json.loads(cached_score)
-        
-        # Generate trust score (in production, this would come from database)
-        trust_score = await calculate_trust_score(product_id)
-        
-        # Cache the result
-        if redis_client:
-            await redis_client.setex(f"trust_score:{product_id}", 300, json.dumps(trust_score))
-            logger.info(f"💾 Trust score cached for product {product_id}")
-        
-        return trust_score
+        # In-process L1, then Redis L2; misses are computed once per product
+        return await trust_score_cache.get(product_id, calculate_trust_score)
     
     except Exception as e:
         logger.error(f"❌ Failed to get trust score: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Get trust scores for many products at once (e.g. product listing pages)
+@app.post("/api/trust-scores")
+async def get_trust_scores_bulk(request: BulkTrustScoreRequest):
+    if len(request.product_ids) > TRUST_SCORE_BULK_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {TRUST_SCORE_BULK_MAX_IDS} product IDs per request"
+        )
+    try:
+        scores = await trust_score_cache.get_many(request.product_ids, calculate_trust_score)
+        return {
+            "scores": scores,
+            "missing": [product_id for product_id in request.product_ids if product_id not in scores]
+        }
+    
+    except Exception as e:
+        logger.error(f"❌ Failed to get trust scores: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def overloaded(topic: str) -> HTTPException:
+    """429 telling the client when the work queue should have room again"""
+    work_queue.reject(topic)
+    return HTTPException(
+        status_code=429,
+        detail=f"Server busy, not accepting {topic} events right now",
+        headers={"Retry-After": str(work_queue.retry_after())}
+    )
+
+def enqueue_event(topic: str, event: Dict) -> bool:
+    """Queue event processing on the bounded work queue; False if it was shed"""
+    return work_queue.submit(topic, lambda: process_event_parallel(topic, event))
+
 # Async Kafka event producer with parallel processing
 @app.post("/api/kafka/produce")
 async def produce_kafka_event(event_data: KafkaEvent):
     try:
+        if not work_queue.would_admit(event_data.topic):
+            raise overloaded(event_data.topic)
+        
         if not kafka_producer:
             logger.warning("⚠️ Kafka producer not available, running in demo mode")
             # For demo mode, just process the event directly
-            asyncio.create_task(process_event_parallel(event_data.topic, event_data.event))
+            enqueue_event(event_data.topic, event_data.event)
             return {
                 "status": "success", 
                 "topic": event_data.topic, 
@@ -187,11 +340,15 @@ async def produce_kafka_event(event_data: KafkaEvent):
         
         # Send event to Kafka for parallel processing using async producer
         try:
-            await kafka_producer.send_and_wait(event_data.topic, event_data.event)
+            await kafka_producer.send_and_wait(
+                event_data.topic,
+                event_data.event,
+                key=event_ordering_key(event_data.topic, event_data.event)
+            )
             logger.info(f"📤 Event sent to Kafka topic '{event_data.topic}' for parallel processing")
             
             # Trigger parallel processing based on event type
-            asyncio.create_task(process_event_parallel(event_data.topic, event_data.event))
+            enqueue_event(event_data.topic, event_data.event)
             
             return {
                 "status": "success", 
@@ -203,7 +360,7 @@ async def produce_kafka_event(event_data: KafkaEvent):
         except KafkaError as kafka_err:
             logger.error(f"❌ Kafka send error: {kafka_err}")
             # Fallback to direct processing
-            asyncio.create_task(process_event_parallel(event_data.topic, event_data.event))
+            enqueue_event(event_data.topic, event_data.event)
             return {
                 "status": "success", 
                 "topic": event_data.topic, 
@@ -211,52 +368,74 @@ async def produce_kafka_event(event_data: KafkaEvent):
                 "event_id": event_data.event.get("event_id", "unknown")
             }
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Failed to produce Kafka event: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Bulk event ingestion: JSON array or NDJSON of {"topic": ..., "event": {...}}
+@app.post("/api/kafka/produce/bulk")
+async def produce_kafka_events_bulk(request: Request, ack_mode: str = "all"):
+    if ack_mode not in ACK_MODES:
+        raise HTTPException(status_code=400, detail=f"ack_mode must be one of {', '.join(ACK_MODES)}")
+    try:
+        events = parse_bulk_events(await request.body(), request.headers.get("content-type", ""))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid bulk body: {e}")
+    if events and not any(work_queue.would_admit(topic) for topic in {topic for topic, _ in events}):
+        raise overloaded(events[0][0])
+    
+    try:
+        if kafka_producer:
+            result = await bulk_producer.send(kafka_producer, events, ack_mode)
+            processing = "parallel"
+            logger.info(f"📤 {len(events)} events sent to Kafka (ack_mode={ack_mode})")
+        else:
+            result = {"queued": 0, "failed": 0}
+            processing = "demo_mode"
+        
+        # Trigger parallel processing for every event the work queue admits
+        # (shed events are still processed by the Kafka consumers when Kafka is up)
+        shed = sum(1 for topic, event in events if not enqueue_event(topic, event))
+        
+        return {
+            "status": "success",
+            "accepted": len(events),
+            "shed": shed,
+            "ack_mode": ack_mode,
+            "processing": processing,
+            **result
+        }
+    
+    except Exception as e:
+        logger.error(f"❌ Failed to produce Kafka events: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Enhanced review submission with ML integration
 @app.post("/api/reviews")
 async def submit_review(review: ReviewSubmission):
+    if not work_queue.would_admit("reviews-posted"):
+        raise overloaded("reviews-posted")
     try:
-        # Call ML service for real-time review analysis
-        try:
-            async with httpx.AsyncClient() as client:
-                ml_response = await client.post(
-                    f"{ML_SERVICE_URL}/analyze/review",
-                    json={
-                        "rating": review.rating,
-                        "headline": review.headline,
-                        "review_text": review.content,
-                        "typing_duration_seconds": review.typingDuration,
-                        "edit_count": review.editCount,
-                        "paste_count": review.pasteCount,
-                        "verified_purchase": True,
-                        "account_age_days": 365,
-                        "review_length_chars": len(review.content),
-                        "contains_images": False,
-                        "previous_reviews_count": 5
-                    },
-                    timeout=10.0
-                )
-                
-                if ml_response.status_code == 200:
-                    analysis = ml_response.json()
-                    logger.info(f"🤖 ML analysis completed for review: {analysis['authenticity_score']}% authentic")
-                else:
-                    raise Exception("ML service unavailable")
-        except Exception as ml_error:
-            logger.warning(f"⚠️ ML service error: {ml_error}. Using fallback analysis.")
-            # Fallback analysis
-            analysis = {
-                "authenticity_score": max(20, 100 - (review.pasteCount * 20) - (max(0, 10 - review.typingDuration) * 5)),
-                "is_fake": review.pasteCount > 2 or review.typingDuration < 5,
-                "fake_indicators": []
+        # Real-time review analysis (ML service, or local fallback while its circuit is open)
+        analysis = await analyze_with_ml(
+            "/analyze/review",
+            {
+                "rating": review.rating,
+                "headline": review.headline,
+                "review_text": review.content,
+                "typing_duration_seconds": review.typingDuration,
+                "edit_count": review.editCount,
+                "paste_count": review.pasteCount,
+                "verified_purchase": True,
+                "account_age_days": 365,
+                "review_length_chars": len(review.content),
+                "contains_images": False,
+                "previous_reviews_count": 5
             }
-            if review.pasteCount > 2:
-                analysis["fake_indicators"].append("Multiple paste operations detected")
-            if review.typingDuration < 5:
-                analysis["fake_indicators"].append("Extremely fast typing speed")
+        )
+        logger.info(f"🤖 Review analysis completed by {analysis['scorer']}: {analysis['authenticity_score']}% authentic")
         
         # Create review object with analysis
         new_review = Review(
@@ -271,6 +450,7 @@ async def submit_review(review: ReviewSubmission):
             authenticityScore=analysis["authenticity_score"],
             isFake=analysis["is_fake"],
             fakeReasons=analysis.get("fake_indicators", []),
+            scorer=analysis["scorer"],
             date=datetime.now().isoformat(),
             verified=True,
             helpful=0
@@ -292,19 +472,25 @@ async def submit_review(review: ReviewSubmission):
         
         if kafka_producer:
             try:
-                await kafka_producer.send_and_wait("reviews-posted", review_event)
+                await kafka_producer.send_and_wait(
+                    "reviews-posted",
+                    review_event,
+                    key=event_ordering_key("reviews-posted", review_event)
+                )
                 logger.info(f"📤 Review event sent to Kafka: {new_review.id}")
             except KafkaError as kafka_err:
                 logger.warning(f"⚠️ Failed to send review to Kafka: {kafka_err}")
         
-        # Broadcast new review via WebSocket
-        await broadcast_websocket_message({
+        # Push new review to clients viewing this product
+        await publish_product_update(new_review.productId, {
             "type": "new_review",
+            "product_id": new_review.productId,
             "payload": new_review.dict()
         })
         
-        # Trigger trust score recalculation
-        asyncio.create_task(update_trust_score("prod_001"))
+        # Fold the review into the trust score counters (deduplicated against the Kafka consumer)
+        if not enqueue_event("reviews-posted", review_event):
+            logger.warning(f"⚠️ Work queue full, review {new_review.id} left to the Kafka consumer")
         
         logger.info(f"✅ Review submitted successfully: {new_review.id} (authenticity: {analysis['authenticity_score']}%)")
         return new_review.dict()
@@ -317,26 +503,84 @@ async def submit_review(review: ReviewSubmission):
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
-    connected_websockets.append(websocket)
-    logger.info(f"🔌 WebSocket connected. Total connections: {len(connected_websockets)}")
+    client = websocket_hub.register(websocket)
+    logger.info(f"🔌 WebSocket connected. Total connections: {len(websocket_hub.clients)}")
     
     try:
         while True:
-            # Keep connection alive and handle ping/pong
-            await websocket.receive_text()
-    except WebSocketDisconnect:
-        connected_websockets.remove(websocket)
-        logger.info(f"🔌 WebSocket disconnected. Total connections: {len(connected_websockets)}")
+            # Keep connection alive and handle ping/pong and subscription requests
+            raw_message = await websocket.receive_text()
+            await handle_websocket_message(client, raw_message)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        websocket_hub.unregister(client)
+        logger.info(f"🔌 WebSocket disconnected. Total connections: {len(websocket_hub.clients)}")
+
+async def handle_websocket_message(client, raw_message: str):
+    """Apply a client's {"type": "subscribe"|"unsubscribe"|"resync", "product_ids": [...]} request"""
+    try:
+        message = json.loads(raw_message)
+    except ValueError:
+        return
+    if not isinstance(message, dict):
+        return
+    
+    message_type = message.get("type")
+    product_ids = message.get("product_ids")
+    if product_ids is None and message.get("product_id") is not None:
+        product_ids = [message["product_id"]]
+    if message_type not in ("subscribe", "unsubscribe", "resync") or not isinstance(product_ids, list):
+        return
+    product_ids = [str(product_id) for product_id in product_ids]
+    
+    if message_type == "resync":
+        # Client noticed a sequence gap: send fresh snapshots
+        for product_id in product_ids:
+            if product_id in client.products:
+                await send_trust_score_snapshot(client, product_id)
+        return
+    
+    if message_type == "subscribe":
+        changed = websocket_hub.subscribe(client, product_ids)
+    else:
+        changed = websocket_hub.unsubscribe(client, product_ids)
+    
+    client.enqueue(json.dumps({
+        "type": f"{message_type}d",
+        "product_ids": changed,
+        "subscriptions": sorted(client.products)
+    }))
+    
+    # New subscribers start from a full snapshot; deltas follow
+    if message_type == "subscribe":
+        for product_id in changed:
+            await send_trust_score_snapshot(client, product_id)
+
+async def send_trust_score_snapshot(client, product_id: str):
+    """Queue the current trust score document and its sequence number for one client"""
+    try:
+        seq, document = await trust_score_versions.latest(product_id, calculate_trust_score)
+        client.enqueue(json.dumps(trust_score_versions.snapshot_message(product_id, seq, document)))
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to send trust score snapshot for {product_id}: {e}")
 
 # Parallel event processing function
 async def process_event_parallel(topic: str, event: Dict):
     """Process events in parallel based on topic type"""
+    event_id = event.get("event_id")
+    
+    # The producer path and the Kafka consumer both see each event; score it once
+    if not await event_deduplicator.claim(event_id):
+        logger.info(f"♻️ Skipping duplicate event from topic '{topic}': {event_id}")
+        return
+    
     try:
         logger.info(f"🔄 Processing event from topic '{topic}': {event.get('event_id', 'unknown')}")
         
         if topic == "product-views":
-            # This goes through Flink first, then to ML
-            await process_view_event_via_flink(event)
+            # Aggregated in streaming windows, then to ML once per window
+            await process_view_event_windowed(event)
         elif topic == "reviews-posted":
             # Direct to ML processing
             await process_review_event_direct(event)
@@ -350,61 +594,119 @@ async def process_event_parallel(topic: str, event: Dict):
             logger.warning(f"⚠️ Unknown topic for processing: {topic}")
             
     except Exception as e:
+        # The handlers re-raise their failures: drop the claim so the other path can retry the event
         logger.error(f"❌ Failed to process event in parallel: {e}")
+        await event_deduplicator.release(event_id)
 
-async def process_view_event_via_flink(event: Dict):
-    """Process view events through Flink then ML"""
-    try:
-        logger.info(f"🌊 Processing view event through Flink: {event.get('event_id', 'unknown')}")
-        
-        # Simulate Flink stream processing with realistic delay
-        await asyncio.sleep(0.1)  # Simulate Flink processing time
-        
-        # Simulate Flink aggregation and pattern detection
-        flink_result = {
-            "product_id": event.get("product_id"),
-            "view_quality_score": 82,
-            "bot_probability": 0.15,
-            "traffic_pattern": "organic",
-            "aggregated_metrics": {
-                "avg_view_duration": 45,
-                "interaction_rate": 0.67,
-                "bounce_rate": 0.23
-            }
-        }
-        
-        # Send Flink result to ML for further analysis
+async def call_ml_service(endpoint: str, payload: Dict) -> Dict:
+    """Score a payload in-process (embedded mode), through the endpoint's micro-batcher
+    if enabled, else with a direct ML call"""
+    if embedded_scorer:
+        return await embedded_scorer.score(endpoint, payload)
+    
+    batcher = ml_batchers.get(endpoint)
+    if batcher:
+        return await batcher.submit(payload)
+    
+    response = await ml_client.post(endpoint, payload)
+    if 400 <= response.status_code < 500:
+        raise MLRequestRejected(f"ML service rejected the request with status {response.status_code}")
+    if response.status_code != 200:
+        raise Exception(f"ML service returned status {response.status_code}")
+    return response.json()
+
+async def analyze_with_ml(endpoint: str, payload: Dict) -> Dict:
+    """Score a payload with the ML rules, failing over to the local fallback scorer
+    
+    The result's "scorer" field says which one produced it ("ml_service", "embedded"
+    or "fallback"). While the endpoint's circuit breaker is open the rules are not
+    called at all. Payloads the rules would reject as invalid are scored by the
+    fallback without touching the breaker: they say nothing about the ML service.
+    """
+    scorer = "ml_service" if embedded_scorer is None else "embedded"
+    breaker = ml_breakers.get(endpoint)
+    if breaker is None:
+        return dict(await call_ml_service(endpoint, payload), scorer=scorer)
+    
+    request_model = ML_REQUEST_MODELS.get(endpoint)
+    if request_model is not None:
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{ML_SERVICE_URL}/analyze/view-pattern",
-                    json=flink_result,
-                    timeout=5.0
-                )
-                
-                if response.status_code == 200:
-                    analysis = response.json()
-                    logger.info(f"🤖 View pattern analysis completed: {analysis.get('view_quality_score', 'unknown')} quality score")
-                    
-                    # Update trust score
-                    await update_trust_score(event.get("product_id", "prod_001"))
-                else:
-                    logger.warning(f"⚠️ ML service returned status {response.status_code}")
+            request_model.model_validate(payload)
+        except ValidationError as validation_error:
+            logger.warning(f"⚠️ Invalid payload for {endpoint} ({validation_error.error_count()} errors). Using fallback analysis.")
+            return dict(FALLBACK_SCORERS[endpoint](payload), scorer="fallback")
+    
+    if breaker.allow():
+        started = time.monotonic()
+        succeeded = None
+        try:
+            analysis = await call_ml_service(endpoint, payload)
+            succeeded = True
+        except MLRequestRejected as rejected:
+            logger.warning(f"⚠️ ML service rejected payload for {endpoint}: {rejected}. Using fallback analysis.")
         except Exception as ml_error:
-            logger.warning(f"⚠️ ML service unavailable for view analysis: {ml_error}")
-            
+            succeeded = False
+            logger.warning(f"⚠️ ML scoring error on {endpoint}: {ml_error}. Using fallback analysis.")
+        finally:
+            # Rejected and cancelled calls hand their slot back: an unreported
+            # half-open probe would keep the breaker refusing every call
+            if succeeded is None:
+                breaker.release()
+            else:
+                breaker.record(succeeded, time.monotonic() - started)
+        if succeeded:
+            return dict(analysis, scorer=scorer)
+    
+    return dict(FALLBACK_SCORERS[endpoint](payload), scorer="fallback")
+
+async def process_view_event_windowed(event: Dict):
+    """Fold a view event into its product's streaming window and its session"""
+    try:
+        view_windows.add(event)
+        view_sessions.add(event)
     except Exception as e:
-        logger.error(f"❌ Failed to process view event via Flink: {e}")
+        logger.error(f"❌ Failed to window view event: {e}")
+        raise
+
+def handle_closed_session(product_ids, features: Dict, bot_probability: float):
+    """Feed a closed session's bot probability into the view windows of the products it viewed"""
+    if bot_probability > 0.5:
+        logger.info(f"🤖 Bot-like session closed: {features['views']} views, {features['pages_per_minute']} pages/min")
+    for product_id in product_ids:
+        view_windows.add_session(product_id, bot_probability)
+
+async def analyze_view_window(product_id: str, metrics: Dict, views: int):
+    """Score one closed view window and fold it into the trust score counters"""
+    logger.info(f"🪟 View window closed for {product_id}: {metrics['views']} views")
+    
+    # Send aggregated window metrics to ML for analysis
+    try:
+        analysis = await analyze_with_ml("/analyze/view-pattern", view_pattern_request(product_id, metrics))
+        logger.info(f"🤖 View pattern analysis completed: {analysis.get('view_quality_score', 'unknown')} quality score")
+    except Exception as ml_error:
+        logger.warning(f"⚠️ ML service unavailable for view analysis: {ml_error}")
+        return
+    
+    # Update running counters and schedule trust score update
+    await trust_engine.record_view(product_id, analysis, views=views)
+    trust_score_scheduler.mark_dirty(product_id)
 
 async def process_review_event_direct(event: Dict):
     """Process review events directly through ML"""
     try:
         logger.info(f"📝 Processing review event directly through ML: {event.get('event_id', 'unknown')}")
-        # Review processing is already handled in submit_review endpoint
-        # This is for events coming from Kafka consumer
+        # ML analysis is already handled in submit_review endpoint and carried on the event
+        if "authenticity_score" not in event:
+            logger.warning(f"⚠️ Review event without analysis: {event.get('event_id', 'unknown')}")
+            return
+        
+        product_id = event.get("product_id") or "prod_001"
+        await trust_engine.record_review(product_id, event)
+        trust_score_scheduler.mark_dirty(product_id)
         
     except Exception as e:
         logger.error(f"❌ Failed to process review event: {e}")
+        raise
 
 async def process_purchase_event_direct(event: Dict):
     """Process purchase events directly through ML"""
@@ -412,25 +714,19 @@ async def process_purchase_event_direct(event: Dict):
         logger.info(f"💳 Processing purchase event directly through ML: {event.get('event_id', 'unknown')}")
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{ML_SERVICE_URL}/analyze/purchase",
-                    json=event,
-                    timeout=5.0
-                )
-                
-                if response.status_code == 200:
-                    analysis = response.json()
-                    logger.info(f"🤖 Purchase analysis completed: {analysis.get('legitimacy_score', 'unknown')} legitimacy score")
-                    
-                    await update_trust_score(event.get("product_id", "prod_001"))
-                else:
-                    logger.warning(f"⚠️ ML service returned status {response.status_code}")
+            analysis = await analyze_with_ml("/analyze/purchase", event)
+            logger.info(f"🤖 Purchase analysis completed: {analysis.get('legitimacy_score', 'unknown')} legitimacy score")
         except Exception as ml_error:
             logger.warning(f"⚠️ ML service unavailable for purchase analysis: {ml_error}")
+            raise
+        
+        product_id = event.get("product_id") or "prod_001"
+        await trust_engine.record_purchase(product_id, analysis)
+        trust_score_scheduler.mark_dirty(product_id)
             
     except Exception as e:
         logger.error(f"❌ Failed to process purchase event: {e}")
+        raise
 
 async def process_seller_event_direct(event: Dict):
     """Process seller events directly through ML"""
@@ -438,143 +734,72 @@ async def process_seller_event_direct(event: Dict):
         logger.info(f"👤 Processing seller event directly through ML: {event.get('event_id', 'unknown')}")
         
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{ML_SERVICE_URL}/analyze/seller",
-                    json=event,
-                    timeout=5.0
-                )
-                
-                if response.status_code == 200:
-                    analysis = response.json()
-                    logger.info(f"🤖 Seller analysis completed: {analysis.get('reputation_score', 'unknown')} reputation score")
-                    
-                    await update_trust_score(event.get("product_id", "prod_001"))
-                else:
-                    logger.warning(f"⚠️ ML service returned status {response.status_code}")
+            analysis = await analyze_with_ml("/analyze/seller", event)
+            logger.info(f"🤖 Seller analysis completed: {analysis.get('reputation_score', 'unknown')} reputation score")
         except Exception as ml_error:
             logger.warning(f"⚠️ ML service unavailable for seller analysis: {ml_error}")
+            raise
+        
+        product_id = event.get("product_id") or "prod_001"
+        await trust_engine.record_seller(product_id, event, analysis)
+        trust_score_scheduler.mark_dirty(product_id)
             
     except Exception as e:
         logger.error(f"❌ Failed to process seller event: {e}")
+        raise
 
 async def calculate_trust_score(product_id: str) -> Dict:
-    """Calculate comprehensive trust score"""
+    """Calculate comprehensive trust score from the product's running counters"""
     try:
-        # In production, this would aggregate data from database
-        # For demo, we'll use realistic values with some randomization
-        import random
-        
-        base_scores = {
-            "reviewAuthenticity": 75 + random.randint(-5, 10),
-            "viewQuality": 82 + random.randint(-3, 8),
-            "purchasePatterns": 79 + random.randint(-4, 6),
-            "sellerReputation": 87 + random.randint(-2, 5)
-        }
-        
-        # Apply weights
-        weights = {
-            "reviewAuthenticity": 0.4,
-            "viewQuality": 0.15,
-            "purchasePatterns": 0.25,
-            "sellerReputation": 0.2
-        }
-        
-        # Calculate weighted average
-        overall_score = sum(base_scores[key] * weights[key] for key in base_scores.keys())
-        overall_score = max(10, min(100, int(overall_score)))
-        
-        trust_score = {
-            "overall": overall_score,
-            "components": {
-                "reviewAuthenticity": {
-                    "score": base_scores["reviewAuthenticity"],
-                    "weight": weights["reviewAuthenticity"],
-                    "details": {
-                        "totalReviews": 2847,
-                        "fakeReviews": 487,
-                        "averageAuthenticity": 76.3
-                    }
-                },
-                "viewQuality": {
-                    "score": base_scores["viewQuality"],
-                    "weight": weights["viewQuality"],
-                    "details": {
-                        "organicViews": 15420,
-                        "botViews": 3280,
-                        "viewQualityRatio": 0.82
-                    }
-                },
-                "purchasePatterns": {
-                    "score": base_scores["purchasePatterns"],
-                    "weight": weights["purchasePatterns"],
-                    "details": {
-                        "totalPurchases": 1893,
-                        "fraudulentPurchases": 127,
-                        "legitimacyRate": 0.93
-                    }
-                },
-                "sellerReputation": {
-                    "score": base_scores["sellerReputation"],
-                    "weight": weights["sellerReputation"],
-                    "details": {
-                        "accountAge": 1247,
-                        "totalProducts": 156,
-                        "averageRating": 4.7,
-                        "suspiciousActivities": 3
-                    }
-                }
-            },
-            "trend": "stable",
-            "lastUpdated": datetime.now().isoformat()
-        }
-        
-        return trust_score
+        return await trust_engine.compute(product_id)
         
     except Exception as e:
         logger.error(f"❌ Failed to calculate trust score: {e}")
         raise
 
 async def update_trust_score(product_id: str):
-    """Calculate and broadcast updated trust score"""
+    """Calculate and broadcast updated trust score (invoked by trust_score_scheduler)"""
     try:
         # Recalculate trust score
         new_score = await calculate_trust_score(product_id)
         
-        # Cache the score
-        if redis_client:
-            await redis_client.setex(f"trust_score:{product_id}", 300, json.dumps(new_score))
-        
-        # Broadcast via WebSocket
-        await broadcast_websocket_message({
-            "type": "trust_score_update",
-            "payload": new_score
-        })
+        # Cache the score in both tiers
+        await trust_score_cache.set(product_id, new_score)
+        await trust_engine.store_overall(product_id, new_score["overall"])
+        
+        # Push a sequence-numbered delta (or snapshot) to clients subscribed to this product.
+        # Deltas must not be coalesced away; clients resync if they see a gap.
+        message = await trust_score_versions.next_update(product_id, new_score)
+        await publish_product_update(
+            product_id,
+            message,
+            coalesce_key=None if message["type"] == "trust_score_delta" else f"trust_score:{product_id}"
+        )
         
         logger.info(f"📊 Trust score updated for product {product_id}: {new_score['overall']}")
         
     except Exception as e:
         logger.error(f"❌ Failed to update trust score: {e}")
 
-async def broadcast_websocket_message(message: Dict):
-    """Broadcast message to all connected WebSocket clients"""
-    if connected_websockets:
-        message_str = json.dumps(message)
-        disconnected = []
-        
-        for websocket in connected_websockets:
-            try:
-                await websocket.send_text(message_str)
-            except Exception:
-                disconnected.append(websocket)
-        
-        # Remove disconnected websockets
-        for ws in disconnected:
-            if ws in connected_websockets:
-                connected_websockets.remove(ws)
-        
-        if disconnected:
-            logger.info(f"🔌 Removed {len(disconnected)} disconnected WebSocket connections")
+async def publish_product_update(product_id: str, message: Dict, coalesce_key: Optional[str] = None):
+    """Send message to WebSocket subscribers of a product on every replica without waiting on slow ones"""
+    websocket_fanout.publish(product_id, message, coalesce_key)
+
+def handle_remote_update(product_id: str, message: Dict):
+    """Keep this replica's snapshots and L1 cache in step with scores published by other replicas"""
+    if not product_id:
+        return
+    document = trust_score_versions.observe(product_id, message)
+    if document is not None:
+        trust_score_cache.set_local(product_id, document)
+
+def consumer_concurrency(topic: str) -> int:
+    """Worker count for a topic; batched topics default to one batch worth of workers"""
+    if topic in KAFKA_WORKER_CONCURRENCY:
+        return KAFKA_WORKER_CONCURRENCY[topic]
+    if TOPIC_ML_ENDPOINTS.get(topic) in ml_batchers:
+        return max(KAFKA_WORKER_DEFAULT_CONCURRENCY, ML_BATCH_MAX_SIZE)
+    return KAFKA_WORKER_DEFAULT_CONCURRENCY
 
 async def consume_kafka_events():
     """Background task to consume Kafka events in parallel using async consumers"""
@@ -584,14 +809,24 @@ async def consume_kafka_events():
         topics = ['reviews-posted', 'product-views', 'purchase-data', 'seller-activities']
         
         for topic in topics:
+            # Offsets are committed manually, only after an event has been processed
             consumer = AIOKafkaConsumer(
-                topic,
                 bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS,
                 group_id=f'fraud-detection-{topic}',
                 value_deserializer=lambda m: json.loads(m.decode('utf-8')),
                 auto_offset_reset='latest',
-                enable_auto_commit=True
+                enable_auto_commit=False
             )
+            if KAFKA_CONSUMER_MODE == "pool":
+                pool = KeyedWorkerPool(
+                    topic,
+                    lambda event, topic=topic: process_event_parallel(topic, event),
+                    consumer_concurrency(topic)
+                )
+                consumer_pools[topic] = pool
+                consumer.subscribe([topic], listener=CommitOnRevoke(consumer, pool))
+            else:
+                consumer.subscribe([topic])
             consumers[topic] = consumer
         
         # Start all consumers
@@ -599,25 +834,60 @@ async def consume_kafka_events():
             await consumer.start()
             logger.info(f"🚀 Started async Kafka consumer for topic: {topic}")
         
+        # Dispatch records to a key-ordered worker pool so one slow ML call
+        # only stalls events with the same product/seller key
+        async def process_consumer_pooled(topic: str, consumer: AIOKafkaConsumer):
+            pool = consumer_pools[topic]
+            await pool.start()
+            commit_task = asyncio.create_task(commit_periodically(consumer, pool))
+            try:
+                async for message in consumer:
+                    logger.info(f"📥 [{topic}] Consumed event: {message.value.get('event_id', 'unknown')}")
+                    await pool.submit(message)
+            except Exception as e:
+                logger.error(f"❌ Consumer error for topic {topic}: {e}")
+            finally:
+                commit_task.cancel()
+                await pool.stop()
+                await commit_completed(consumer, pool)
+                await consumer.stop()
+        
         # Process each consumer in parallel
         async def process_consumer(topic: str, consumer: AIOKafkaConsumer):
             try:
-                async for message in consumer:
-                    event = message.value
-                    logger.info(f"📥 [{topic}] Consumed event: {event.get('event_id', 'unknown')}")
-                    await process_event_parallel(topic, event)
+                if TOPIC_ML_ENDPOINTS.get(topic) in ml_batchers:
+                    # Fetch up to a batch worth of records and process them together so
+                    # their ML calls coalesce into a single batch request
+                    while True:
+                        records = await consumer.getmany(
+                            timeout_ms=int(ML_BATCH_LINGER_MS),
+                            max_records=ML_BATCH_MAX_SIZE
+                        )
+                        messages = [message for partition_messages in records.values() for message in partition_messages]
+                        if not messages:
+                            continue
+                        logger.info(f"📥 [{topic}] Consumed {len(messages)} events")
+                        await asyncio.gather(*(process_event_parallel(topic, message.value) for message in messages))
+                        await consumer.commit()
+                else:
+                    async for message in consumer:
+                        event = message.value
+                        logger.info(f"📥 [{topic}] Consumed event: {event.get('event_id', 'unknown')}")
+                        await process_event_parallel(topic, event)
+                        await consumer.commit()
             except Exception as e:
                 logger.error(f"❌ Consumer error for topic {topic}: {e}")
             finally:
                 await consumer.stop()
         
         # Start all consumers in parallel
+        run_consumer = process_consumer_pooled if KAFKA_CONSUMER_MODE == "pool" else process_consumer
         tasks = [
-            asyncio.create_task(process_consumer(topic, consumer))
+            asyncio.create_task(run_consumer(topic, consumer))
             for topic, consumer in consumers.items()
         ]
         
-        logger.info(f"🔄 Started {len(tasks)} parallel Kafka consumers")
+        logger.info(f"🔄 Started {len(tasks)} parallel Kafka consumers ({KAFKA_CONSUMER_MODE} mode)")
         await asyncio.gather(*tasks, return_exceptions=True)
                 
     except Exception as e:
@@ -625,4 +895,9 @@ async def consume_kafka_events():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8080)
\ No newline at end of file
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8080,
+        ws_per_message_deflate=os.getenv("UVICORN_WS_PER_MESSAGE_DEFLATE", "true").lower() == "true"
+    )
\ No newline at end of file
@@ -0,0 +1,102 @@
+import os
+import logging
+from typing import Dict, Optional
+
+import httpx
+
+from fraud_scoring.models import (
+    ReviewAnalysisRequest, ViewPatternAnalysisRequest, PurchaseAnalysisRequest, SellerAnalysisRequest
+)
+
+logger = logging.getLogger(__name__)
+
+# Connection pool configuration
+ML_MAX_CONNECTIONS = int(os.getenv("ML_MAX_CONNECTIONS", "100"))
+ML_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("ML_MAX_KEEPALIVE_CONNECTIONS", "20"))
+ML_KEEPALIVE_EXPIRY = float(os.getenv("ML_KEEPALIVE_EXPIRY", "30"))
+ML_HTTP2 = os.getenv("ML_HTTP2", "false").lower() == "true"
+ML_CONNECT_TIMEOUT = float(os.getenv("ML_CONNECT_TIMEOUT", "2.0"))
+
+# Per-endpoint read timeouts (seconds)
+ML_ENDPOINT_TIMEOUTS = {
+    "/analyze/review": float(os.getenv("ML_TIMEOUT_REVIEW", "10.0")),
+    "/analyze/view-pattern": float(os.getenv("ML_TIMEOUT_VIEW_PATTERN", "5.0")),
+    "/analyze/purchase": float(os.getenv("ML_TIMEOUT_PURCHASE", "5.0")),
+    "/analyze/seller": float(os.getenv("ML_TIMEOUT_SELLER", "5.0")),
+}
+ML_DEFAULT_TIMEOUT = float(os.getenv("ML_TIMEOUT_DEFAULT", "5.0"))
+
+# Request model each ML endpoint validates its payload with
+ML_REQUEST_MODELS = {
+    "/analyze/review": ReviewAnalysisRequest,
+    "/analyze/view-pattern": ViewPatternAnalysisRequest,
+    "/analyze/purchase": PurchaseAnalysisRequest,
+    "/analyze/seller": SellerAnalysisRequest,
+}
+
+
+class MLRequestRejected(Exception):
+    """The ML service refused a request as invalid (4xx): a problem with the payload, not the service"""
+
+
+class MLClient:
+    """Long-lived, pooled HTTP client shared by every backend → ML service call"""
+
+    def __init__(
+        self,
+        base_url: str,
+        max_connections: int = ML_MAX_CONNECTIONS,
+        max_keepalive_connections: int = ML_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = ML_KEEPALIVE_EXPIRY,
+        http2: bool = ML_HTTP2,
+        endpoint_timeouts: Optional[Dict[str, float]] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self.endpoint_timeouts = dict(ML_ENDPOINT_TIMEOUTS)
+        if endpoint_timeouts:
+            self.endpoint_timeouts.update(endpoint_timeouts)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self):
+        """Open the shared connection pool"""
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("⚠️ HTTP/2 requested for ML client but 'h2' is not installed. Falling back to HTTP/1.1.")
+                http2 = False
+
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=self.limits,
+            http2=http2,
+            timeout=httpx.Timeout(ML_DEFAULT_TIMEOUT, connect=ML_CONNECT_TIMEOUT),
+        )
+        logger.info(
+            f"✅ ML client pool ready ({self.base_url}, max_connections={self.limits.max_connections}, "
+            f"keepalive={self.limits.max_keepalive_connections}, http2={http2})"
+        )
+
+    async def close(self):
+        """Drain and close the shared connection pool"""
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+            logger.info("🔌 ML client pool closed")
+
+    def timeout_for(self, endpoint: str) -> httpx.Timeout:
+        read_timeout = self.endpoint_timeouts.get(endpoint, ML_DEFAULT_TIMEOUT)
+        return httpx.Timeout(read_timeout, connect=min(ML_CONNECT_TIMEOUT, read_timeout))
+
+    async def post(self, endpoint: str, payload) -> httpx.Response:
+        """POST a JSON payload to an ML endpoint using the pooled connection"""
+        if self._client is None:
+            raise RuntimeError("ML client is not started")
+        return await self._client.post(endpoint, json=payload, timeout=self.timeout_for(endpoint))
@@ -0,0 +1,101 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Set
+
+logger = logging.getLogger(__name__)
+
+# Recompute scheduling configuration
+TRUST_SCORE_DEBOUNCE_MS = float(os.getenv("TRUST_SCORE_DEBOUNCE_MS", "250"))
+TRUST_SCORE_MIN_INTERVAL_MS = float(os.getenv("TRUST_SCORE_MIN_INTERVAL_MS", "1000"))
+
+
+class RecomputeScheduler:
+    """Coalesce bursts of 'product changed' signals into one recompute per window
+
+    Marking a product dirty schedules a single recompute after the debounce window;
+    further marks inside that window are merged into it. Each product is recomputed at
+    most once per min interval, and never concurrently with itself.
+    """
+
+    def __init__(
+        self,
+        recompute: Callable[[str], Awaitable[None]],
+        debounce_ms: float = TRUST_SCORE_DEBOUNCE_MS,
+        min_interval_ms: float = TRUST_SCORE_MIN_INTERVAL_MS,
+    ):
+        self.recompute = recompute
+        self.debounce = max(0.0, debounce_ms) / 1000
+        self.min_interval = max(0.0, min_interval_ms) / 1000
+        self._scheduled: Dict[str, asyncio.TimerHandle] = {}
+        self._running: Set[str] = set()
+        self._dirty_while_running: Set[str] = set()
+        self._last_run: Dict[str, float] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+        # Metrics
+        self.marked = 0
+        self.coalesced = 0
+        self.recomputes = 0
+        self.failures = 0
+
+    def mark_dirty(self, product_id: str):
+        """Signal that a product's inputs changed; never blocks the caller"""
+        self.marked += 1
+        if product_id in self._scheduled:
+            self.coalesced += 1
+            return
+        if product_id in self._running:
+            self.coalesced += 1
+            self._dirty_while_running.add(product_id)
+            return
+        self._schedule(product_id)
+
+    def _schedule(self, product_id: str):
+        loop = asyncio.get_running_loop()
+        now = time.monotonic()
+        earliest = self._last_run.get(product_id, float("-inf")) + self.min_interval
+        delay = max(self.debounce, earliest - now)
+        self._scheduled[product_id] = loop.call_later(delay, self._fire, product_id)
+
+    def _fire(self, product_id: str):
+        self._scheduled.pop(product_id, None)
+        self._running.add(product_id)
+        task = asyncio.create_task(self._run(product_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, product_id: str):
+        self._last_run[product_id] = time.monotonic()
+        try:
+            await self.recompute(product_id)
+            self.recomputes += 1
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"❌ Scheduled recompute failed for product {product_id}: {e}")
+        finally:
+            self._running.discard(product_id)
+            if product_id in self._dirty_while_running:
+                self._dirty_while_running.discard(product_id)
+                self._schedule(product_id)
+
+    async def stop(self):
+        for handle in self._scheduled.values():
+            handle.cancel()
+        self._scheduled.clear()
+        self._dirty_while_running.clear()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            "debounce_ms": self.debounce * 1000,
+            "min_interval_ms": self.min_interval * 1000,
+            "marked": self.marked,
+            "coalesced": self.coalesced,
+            "recomputes": self.recomputes,
+            "failures": self.failures,
+            "scheduled": len(self._scheduled),
+            "running": len(self._running),
+        }
@@ -0,0 +1,214 @@
+import os
+import math
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Session window configuration
+SESSION_GAP_SECONDS = float(os.getenv("SESSION_GAP_SECONDS", "1800"))
+SESSION_WHEEL_TICK_SECONDS = float(os.getenv("SESSION_WHEEL_TICK_SECONDS", "1"))
+SESSION_MAX_LIVE = int(os.getenv("SESSION_MAX_LIVE", "2000000"))
+# Products remembered per session for attributing its bot probability
+SESSION_MAX_PRODUCTS = 8
+
+# Pages per minute at which the rate signal saturates
+BOT_PAGES_PER_MINUTE = 20
+
+
+def _event_time(event: Dict) -> float:
+    """Event timestamp in epoch seconds, falling back to arrival time"""
+    timestamp = event.get("timestamp")
+    if timestamp:
+        try:
+            return datetime.fromisoformat(str(timestamp).replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            pass
+    return time.time()
+
+
+class SessionState:
+    """Running per-session features; a few floats per live session"""
+
+    __slots__ = (
+        "first_time", "last_time", "last_arrival", "views", "interval_sum", "interval_sq_sum",
+        "zero_scroll", "device", "device_changes", "products", "slot",
+    )
+
+    def __init__(self, event_time: float, arrival: float, device: str):
+        self.first_time = event_time
+        self.last_time = event_time
+        self.last_arrival = arrival
+        self.views = 0
+        self.interval_sum = 0.0
+        self.interval_sq_sum = 0.0
+        self.zero_scroll = 0
+        self.device = device
+        self.device_changes = 0
+        self.products: Tuple[str, ...] = ()
+        self.slot = -1
+
+    def add(self, event: Dict, event_time: float, arrival: float):
+        if self.views:
+            interval = max(0.0, event_time - self.last_time)
+            self.interval_sum += interval
+            self.interval_sq_sum += interval * interval
+        self.views += 1
+        self.last_time = max(self.last_time, event_time)
+        self.last_arrival = arrival
+        if not event.get("scroll_percentage"):
+            self.zero_scroll += 1
+        device = str(event.get("device_type") or "")
+        if device != self.device:
+            self.device_changes += 1
+            self.device = device
+        product_id = event.get("product_id")
+        if product_id and product_id not in self.products and len(self.products) < SESSION_MAX_PRODUCTS:
+            self.products += (product_id,)
+
+    def features(self) -> Dict:
+        intervals = self.views - 1
+        minutes = (self.last_time - self.first_time) / 60
+        if intervals >= 2 and self.interval_sum > 0:
+            mean = self.interval_sum / intervals
+            variance = max(0.0, self.interval_sq_sum / intervals - mean * mean)
+            # Coefficient of variation near 0 means machine-like, evenly spaced views
+            timing_regularity = round(max(0.0, 1 - math.sqrt(variance) / mean), 3)
+        else:
+            timing_regularity = 0.0
+        return {
+            "views": self.views,
+            "duration_seconds": round(self.last_time - self.first_time, 1),
+            "timing_regularity": timing_regularity,
+            "pages_per_minute": round(intervals / minutes, 2) if intervals and minutes > 0 else 0.0,
+            "zero_scroll_ratio": round(self.zero_scroll / self.views, 3),
+            "device_consistency": round(1 - self.device_changes / intervals, 3) if intervals else 1.0,
+        }
+
+
+def session_bot_probability(features: Dict) -> float:
+    """Bot likelihood of a closed session from its behavioural features"""
+    return round(min(1.0,
+        0.35 * features["timing_regularity"]
+        + 0.25 * min(features["pages_per_minute"] / BOT_PAGES_PER_MINUTE, 1.0)
+        + 0.3 * features["zero_scroll_ratio"]
+        + 0.1 * (1 - features["device_consistency"])
+    ), 3)
+
+
+class Sessionizer:
+    """Session windows over product-view events keyed by session_id
+
+    A session closes after gap seconds without views. Expiry uses a hashed timer wheel:
+    each live session sits in the slot of its deadline as of when it was scheduled, and
+    views only update its last arrival time. When a slot comes due its sessions are
+    either closed or moved to the slot of their new deadline, so expiry never scans
+    the whole session table.
+    """
+
+    def __init__(
+        self,
+        on_session: Callable[[Tuple[str, ...], Dict, float], None],
+        gap_seconds: float = SESSION_GAP_SECONDS,
+        tick_seconds: float = SESSION_WHEEL_TICK_SECONDS,
+        max_live: int = SESSION_MAX_LIVE,
+    ):
+        self.on_session = on_session
+        self.gap = max(0.1, gap_seconds)
+        self.tick_seconds = max(0.01, tick_seconds)
+        self.max_live = max_live
+        self.sessions: Dict[str, SessionState] = {}
+        self._wheel: List[List[str]] = [[] for _ in range(int(math.ceil(self.gap / self.tick_seconds)) + 2)]
+        self._tick_index = int(time.monotonic() / self.tick_seconds)
+        self._ticker: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.views = 0
+        self.dropped_views = 0
+        self.sessions_closed = 0
+        self.bot_sessions = 0
+
+    def start(self):
+        self._ticker = asyncio.create_task(self._run())
+        logger.info(f"⏱️ Sessionizer started ({self.gap:g}s inactivity gap)")
+
+    async def stop(self):
+        if self._ticker:
+            self._ticker.cancel()
+            await asyncio.gather(self._ticker, return_exceptions=True)
+            self._ticker = None
+
+    def _schedule(self, session_id: str, state: SessionState):
+        tick = max(int((state.last_arrival + self.gap) / self.tick_seconds), self._tick_index + 1)
+        state.slot = tick % len(self._wheel)
+        self._wheel[state.slot].append(session_id)
+
+    def add(self, event: Dict, now: Optional[float] = None):
+        session_id = event.get("session_id")
+        if not session_id:
+            return
+        now = time.monotonic() if now is None else now
+        event_time = _event_time(event)
+        state = self.sessions.get(session_id)
+        if state is None:
+            if len(self.sessions) >= self.max_live:
+                self.dropped_views += 1
+                return
+            state = SessionState(event_time, now, str(event.get("device_type") or ""))
+            self.sessions[session_id] = state
+            state.add(event, event_time, now)
+            self._schedule(session_id, state)
+        else:
+            state.add(event, event_time, now)
+        self.views += 1
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.tick_seconds)
+            self.advance()
+
+    def advance(self, now: Optional[float] = None):
+        """Process every wheel slot that came due since the last call"""
+        now = time.monotonic() if now is None else now
+        target = int(now / self.tick_seconds)
+        # Never walk more than one revolution: every slot is visited by then
+        start = max(self._tick_index + 1, target - len(self._wheel) + 1)
+        for tick in range(start, target + 1):
+            self._tick_index = tick
+            self._expire_slot(tick % len(self._wheel), now)
+
+    def _expire_slot(self, slot: int, now: float):
+        due, self._wheel[slot] = self._wheel[slot], []
+        for session_id in due:
+            state = self.sessions.get(session_id)
+            if state is None or state.slot != slot:
+                continue
+            if state.last_arrival + self.gap <= now:
+                del self.sessions[session_id]
+                self._close(state)
+            else:
+                self._schedule(session_id, state)
+
+    def _close(self, state: SessionState):
+        features = state.features()
+        bot_probability = session_bot_probability(features)
+        self.sessions_closed += 1
+        if bot_probability > 0.5:
+            self.bot_sessions += 1
+        try:
+            self.on_session(state.products, features, bot_probability)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to hand off closed session: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            "gap_seconds": self.gap,
+            "live_sessions": len(self.sessions),
+            "views": self.views,
+            "dropped_views": self.dropped_views,
+            "sessions_closed": self.sessions_closed,
+            "bot_sessions": self.bot_sessions,
+        }
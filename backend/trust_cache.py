@@ -0,0 +1,306 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Trust score cache configuration
+TRUST_SCORE_TTL_SECONDS = int(os.getenv("TRUST_SCORE_TTL_SECONDS", "300"))
+TRUST_SCORE_STALE_SECONDS = int(os.getenv("TRUST_SCORE_STALE_SECONDS", "60"))
+TRUST_SCORE_L1_TTL_SECONDS = float(os.getenv("TRUST_SCORE_L1_TTL_SECONDS", "5"))
+TRUST_SCORE_L1_MAX_ENTRIES = int(os.getenv("TRUST_SCORE_L1_MAX_ENTRIES", "10000"))
+TRUST_SCORE_BULK_CONCURRENCY = int(os.getenv("TRUST_SCORE_BULK_CONCURRENCY", "16"))
+
+FRESH, STALE = "fresh", "stale"
+
+
+def trust_score_key(product_id: str) -> str:
+    return f"trust_score:{product_id}"
+
+
+class TrustScoreCache:
+    """Two-tier (in-process L1 + Redis L2) trust score cache
+
+    - Concurrent misses for the same product share one computation (single-flight).
+    - Values past their TTL but inside the stale window are served immediately while
+      a single background refresh recomputes them (stale-while-revalidate).
+    - Redis entries live for TTL + stale window; the remaining TTL tells whether a
+      value is fresh or stale, so the stored value stays the plain score document.
+    """
+
+    def __init__(
+        self,
+        redis_client=None,
+        ttl: int = TRUST_SCORE_TTL_SECONDS,
+        stale: int = TRUST_SCORE_STALE_SECONDS,
+        l1_ttl: float = TRUST_SCORE_L1_TTL_SECONDS,
+        l1_max_entries: int = TRUST_SCORE_L1_MAX_ENTRIES,
+    ):
+        self.redis_client = redis_client
+        self.ttl = ttl
+        self.stale = stale
+        self.l1_ttl = l1_ttl
+        self.l1_max_entries = l1_max_entries
+        self._l1: "OrderedDict[str, Tuple[Dict, float]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self.stats_by_tier = {
+            "l1": {"hits": 0, "misses": 0, "stale": 0},
+            "l2": {"hits": 0, "misses": 0, "stale": 0},
+        }
+        self.coalesced = 0
+        self.loads = 0
+        self.background_refreshes = 0
+
+    # L1 (in-process LRU with TTL)
+
+    def _l1_get(self, product_id: str) -> Tuple[Optional[Dict], Optional[str]]:
+        entry = self._l1.get(product_id)
+        if entry is None:
+            return None, None
+        value, stored_at = entry
+        age = time.monotonic() - stored_at
+        if age <= self.l1_ttl:
+            self._l1.move_to_end(product_id)
+            return value, FRESH
+        if age <= self.l1_ttl + self.stale:
+            return value, STALE
+        del self._l1[product_id]
+        return None, None
+
+    def _l1_set(self, product_id: str, value: Dict):
+        self._l1[product_id] = (value, time.monotonic())
+        self._l1.move_to_end(product_id)
+        while len(self._l1) > self.l1_max_entries:
+            self._l1.popitem(last=False)
+
+    # L2 (Redis)
+
+    async def _l2_get(self, product_id: str) -> Tuple[Optional[Dict], Optional[str]]:
+        if not self.redis_client:
+            return None, None
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.get(trust_score_key(product_id))
+            pipe.ttl(trust_score_key(product_id))
+            cached, remaining = await pipe.execute()
+        if not cached:
+            return None, None
+        # Keys without an expiry (-1) are written by hand and treated as fresh
+        state = STALE if 0 <= remaining <= self.stale else FRESH
+        return json.loads(cached), state
+
+    async def _l2_set(self, product_id: str, value: Dict):
+        if self.redis_client:
+            await self.redis_client.setex(trust_score_key(product_id), self.ttl + self.stale, json.dumps(value))
+
+    async def set(self, product_id: str, value: Dict):
+        """Write-through a freshly computed score to both tiers"""
+        self._l1_set(product_id, value)
+        await self._l2_set(product_id, value)
+
+    def set_local(self, product_id: str, value: Dict):
+        """Refresh L1 only, e.g. with a score published by another replica"""
+        self._l1_set(product_id, value)
+
+    def invalidate_local(self, product_id: str):
+        self._l1.pop(product_id, None)
+
+    async def get(self, product_id: str, loader: Callable[[str], Awaitable[Dict]]) -> Dict:
+        value, state = self._l1_get(product_id)
+        if state == FRESH:
+            self.stats_by_tier["l1"]["hits"] += 1
+            return value
+        if state == STALE:
+            self.stats_by_tier["l1"]["stale"] += 1
+            self._refresh_in_background(product_id, loader, check_l2=True)
+            return value
+        self.stats_by_tier["l1"]["misses"] += 1
+
+        inflight = self._inflight.get(product_id)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[product_id] = future
+        try:
+            value = await self._load_through_l2(product_id, loader)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so a failure with no other waiters is not logged as unhandled
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(product_id, None)
+            self._abandon(product_id, future)
+
+    def _abandon(self, product_id: str, future: asyncio.Future):
+        """Fail a single-flight future its leading caller left unresolved (e.g. on cancellation)
+
+        Without this, coalesced waiters would wait on it forever.
+        """
+        if not future.done():
+            future.set_exception(RuntimeError(f"Trust score load for {product_id} was cancelled"))
+            future.exception()
+
+    async def _load_through_l2(self, product_id: str, loader: Callable[[str], Awaitable[Dict]]) -> Dict:
+        try:
+            value, state = await self._l2_get(product_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Trust score L2 cache unavailable: {e}")
+            value, state = None, None
+
+        if state == FRESH:
+            self.stats_by_tier["l2"]["hits"] += 1
+            self._l1_set(product_id, value)
+            return value
+        if state == STALE:
+            self.stats_by_tier["l2"]["stale"] += 1
+            self._l1_set(product_id, value)
+            self._refresh_in_background(product_id, loader)
+            return value
+        self.stats_by_tier["l2"]["misses"] += 1
+
+        self.loads += 1
+        value = await loader(product_id)
+        await self.set(product_id, value)
+        return value
+
+    async def get_many(
+        self,
+        product_ids: List[str],
+        loader: Callable[[str], Awaitable[Dict]],
+        concurrency: int = TRUST_SCORE_BULK_CONCURRENCY,
+    ) -> Dict[str, Dict]:
+        """Bulk lookup: L1, then one Redis pipeline for the rest, then bounded concurrent loads"""
+        results: Dict[str, Dict] = {}
+        remaining = []
+        for product_id in dict.fromkeys(product_ids):
+            value, state = self._l1_get(product_id)
+            if state is None:
+                self.stats_by_tier["l1"]["misses"] += 1
+                remaining.append(product_id)
+                continue
+            if state == FRESH:
+                self.stats_by_tier["l1"]["hits"] += 1
+            else:
+                self.stats_by_tier["l1"]["stale"] += 1
+                self._refresh_in_background(product_id, loader, check_l2=True)
+            results[product_id] = value
+
+        if not remaining:
+            return results
+
+        # One round trip for every L1 miss
+        cached = [(None, None)] * len(remaining)
+        if self.redis_client:
+            try:
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    for product_id in remaining:
+                        pipe.get(trust_score_key(product_id))
+                        pipe.ttl(trust_score_key(product_id))
+                    replies = await pipe.execute()
+                cached = [
+                    (json.loads(value), STALE if 0 <= ttl <= self.stale else FRESH) if value else (None, None)
+                    for value, ttl in zip(replies[::2], replies[1::2])
+                ]
+            except Exception as e:
+                logger.warning(f"⚠️ Trust score L2 cache unavailable: {e}")
+
+        misses = []
+        for product_id, (value, state) in zip(remaining, cached):
+            if state is None:
+                self.stats_by_tier["l2"]["misses"] += 1
+                misses.append(product_id)
+                continue
+            if state == FRESH:
+                self.stats_by_tier["l2"]["hits"] += 1
+            else:
+                self.stats_by_tier["l2"]["stale"] += 1
+                self._refresh_in_background(product_id, loader)
+            self._l1_set(product_id, value)
+            results[product_id] = value
+
+        if not misses:
+            return results
+
+        # Compute misses concurrently (bounded), sharing in-flight single-item loads
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        computed: Dict[str, Dict] = {}
+
+        async def load(product_id: str):
+            inflight = self._inflight.get(product_id)
+            if inflight is not None:
+                self.coalesced += 1
+                results[product_id] = await asyncio.shield(inflight)
+                return
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[product_id] = future
+            try:
+                async with semaphore:
+                    self.loads += 1
+                    value = await loader(product_id)
+                self._l1_set(product_id, value)
+                computed[product_id] = results[product_id] = value
+                future.set_result(value)
+            except Exception as e:
+                future.set_exception(e)
+                future.exception()
+                raise
+            finally:
+                self._inflight.pop(product_id, None)
+                self._abandon(product_id, future)
+
+        outcomes = await asyncio.gather(*(load(product_id) for product_id in misses), return_exceptions=True)
+        for product_id, outcome in zip(misses, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning(f"⚠️ Failed to compute trust score for {product_id}: {outcome}")
+
+        # Write every computed score back in one pipeline
+        if computed and self.redis_client:
+            try:
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    for product_id, value in computed.items():
+                        pipe.setex(trust_score_key(product_id), self.ttl + self.stale, json.dumps(value))
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to write back trust scores: {e}")
+
+        return {product_id: results[product_id] for product_id in dict.fromkeys(product_ids) if product_id in results}
+
+    def _refresh_in_background(self, product_id: str, loader: Callable[[str], Awaitable[Dict]], check_l2: bool = False):
+        if product_id in self._refreshing:
+            return
+        self.background_refreshes += 1
+
+        async def refresh():
+            try:
+                # Another replica may already have published a fresh value
+                if check_l2:
+                    value, state = await self._l2_get(product_id)
+                    if state == FRESH:
+                        self._l1_set(product_id, value)
+                        return
+                self.loads += 1
+                await self.set(product_id, await loader(product_id))
+            except Exception as e:
+                logger.warning(f"⚠️ Background trust score refresh failed for {product_id}: {e}")
+            finally:
+                self._refreshing.pop(product_id, None)
+
+        self._refreshing[product_id] = asyncio.create_task(refresh())
+
+    def stats(self) -> Dict:
+        return {
+            "l1": dict(self.stats_by_tier["l1"], entries=len(self._l1)),
+            "l2": dict(self.stats_by_tier["l2"]),
+            "coalesced": self.coalesced,
+            "loads": self.loads,
+            "background_refreshes": self.background_refreshes,
+        }
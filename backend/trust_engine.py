@@ -0,0 +1,196 @@
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Component weights of the overall trust score
+TRUST_SCORE_WEIGHTS = {
+    "reviewAuthenticity": 0.4,
+    "viewQuality": 0.15,
+    "purchasePatterns": 0.25,
+    "sellerReputation": 0.2
+}
+
+# Component scores used until a product has observations for that component
+TRUST_SCORE_PRIORS = {
+    "reviewAuthenticity": 75,
+    "viewQuality": 82,
+    "purchasePatterns": 79,
+    "sellerReputation": 87
+}
+
+# Overall score change needed to report a trend
+TREND_THRESHOLD = 2
+
+
+def counters_key(product_id: str) -> str:
+    return f"trust_counters:{product_id}"
+
+
+class TrustScoreEngine:
+    """Incremental trust score aggregation over per-product component counters
+
+    Every ML result updates running counters in O(1) (totals, fake counts, score sums,
+    organic vs bot views). Counters live in a Redis hash per product and are updated in
+    MULTI/EXEC pipelines so several backend replicas can share them; the trust score is
+    derived from the counters without scanning history.
+    """
+
+    def __init__(self, redis_client=None):
+        self.redis_client = redis_client
+        # In-process counters used when Redis is unavailable (demo mode)
+        self._local: Dict[str, Dict[str, float]] = {}
+
+    async def _apply(self, product_id: str, increments: Dict[str, float], fields: Optional[Dict[str, float]] = None):
+        if self.redis_client:
+            key = counters_key(product_id)
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                for name, amount in increments.items():
+                    if isinstance(amount, int):
+                        pipe.hincrby(key, name, amount)
+                    else:
+                        pipe.hincrbyfloat(key, name, amount)
+                if fields:
+                    pipe.hset(key, mapping=fields)
+                await pipe.execute()
+        else:
+            counters = self._local.setdefault(product_id, {})
+            for name, amount in increments.items():
+                counters[name] = counters.get(name, 0) + amount
+            if fields:
+                counters.update(fields)
+
+    async def load_counters(self, product_id: str) -> Dict[str, float]:
+        if self.redis_client:
+            raw = await self.redis_client.hgetall(counters_key(product_id))
+            return {name: float(value) for name, value in raw.items()}
+        return dict(self._local.get(product_id, {}))
+
+    async def record_review(self, product_id: str, analysis: Dict):
+        await self._apply(product_id, {
+            "reviews_total": 1,
+            "reviews_fake": 1 if analysis.get("is_fake") else 0,
+            "reviews_authenticity_sum": float(analysis.get("authenticity_score", 0)),
+        })
+
+    async def record_view(self, product_id: str, analysis: Dict, views: int = 1):
+        """Record view-pattern analysis covering one or more views"""
+        bot_views = min(views, round(views * float(analysis.get("bot_probability", 0))))
+        await self._apply(product_id, {
+            "views_total": views,
+            "views_bot": bot_views,
+            "views_organic": views - bot_views,
+            "views_quality_sum": float(analysis.get("view_quality_score", 0)) * views,
+        })
+
+    async def record_purchase(self, product_id: str, analysis: Dict):
+        await self._apply(product_id, {
+            "purchases_total": 1,
+            "purchases_fraudulent": 1 if analysis.get("fraud_risk_level") == "high" else 0,
+            "purchases_legitimacy_sum": float(analysis.get("legitimacy_score", 0)),
+        })
+
+    async def record_seller(self, product_id: str, event: Dict, analysis: Dict):
+        # Latest seller profile values are stored alongside the running counters
+        profile = {
+            name: value for name, value in (
+                ("seller_account_age", event.get("account_age_days")),
+                ("seller_total_products", event.get("total_products_listed")),
+                ("seller_average_rating", event.get("average_rating")),
+            ) if value is not None
+        }
+        await self._apply(product_id, {
+            "seller_events_total": 1,
+            "seller_suspicious": 1 if analysis.get("activity_classification", "normal") != "normal" else 0,
+            "seller_reputation_sum": float(analysis.get("reputation_score", 0)),
+        }, profile)
+
+    async def store_overall(self, product_id: str, overall: int):
+        """Remember the last published overall score to derive the trend"""
+        await self._apply(product_id, {}, {"last_overall": overall})
+
+    async def compute(self, product_id: str) -> Dict:
+        """Derive the trust score document from the product's counters"""
+        return build_trust_score(await self.load_counters(product_id))
+
+
+def _average(counters: Dict[str, float], sum_field: str, total_field: str, component: str) -> int:
+    total = counters.get(total_field, 0)
+    if total <= 0:
+        return TRUST_SCORE_PRIORS[component]
+    return int(round(counters.get(sum_field, 0) / total))
+
+
+def build_trust_score(counters: Dict[str, float]) -> Dict:
+    reviews_total = int(counters.get("reviews_total", 0))
+    reviews_fake = int(counters.get("reviews_fake", 0))
+    views_organic = int(counters.get("views_organic", 0))
+    views_bot = int(counters.get("views_bot", 0))
+    views_total = int(counters.get("views_total", 0))
+    purchases_total = int(counters.get("purchases_total", 0))
+    purchases_fraudulent = int(counters.get("purchases_fraudulent", 0))
+
+    scores = {
+        "reviewAuthenticity": _average(counters, "reviews_authenticity_sum", "reviews_total", "reviewAuthenticity"),
+        "viewQuality": _average(counters, "views_quality_sum", "views_total", "viewQuality"),
+        "purchasePatterns": _average(counters, "purchases_legitimacy_sum", "purchases_total", "purchasePatterns"),
+        "sellerReputation": _average(counters, "seller_reputation_sum", "seller_events_total", "sellerReputation"),
+    }
+
+    # Calculate weighted average
+    overall_score = sum(scores[key] * TRUST_SCORE_WEIGHTS[key] for key in scores)
+    overall_score = max(10, min(100, int(overall_score)))
+
+    previous = counters.get("last_overall")
+    if previous is None or abs(overall_score - previous) < TREND_THRESHOLD:
+        trend = "stable"
+    elif overall_score > previous:
+        trend = "improving"
+    else:
+        trend = "declining"
+
+    return {
+        "overall": overall_score,
+        "components": {
+            "reviewAuthenticity": {
+                "score": scores["reviewAuthenticity"],
+                "weight": TRUST_SCORE_WEIGHTS["reviewAuthenticity"],
+                "details": {
+                    "totalReviews": reviews_total,
+                    "fakeReviews": reviews_fake,
+                    "averageAuthenticity": round(counters.get("reviews_authenticity_sum", 0) / reviews_total, 1) if reviews_total else 0.0
+                }
+            },
+            "viewQuality": {
+                "score": scores["viewQuality"],
+                "weight": TRUST_SCORE_WEIGHTS["viewQuality"],
+                "details": {
+                    "organicViews": views_organic,
+                    "botViews": views_bot,
+                    "viewQualityRatio": round(views_organic / views_total, 2) if views_total else 0.0
+                }
+            },
+            "purchasePatterns": {
+                "score": scores["purchasePatterns"],
+                "weight": TRUST_SCORE_WEIGHTS["purchasePatterns"],
+                "details": {
+                    "totalPurchases": purchases_total,
+                    "fraudulentPurchases": purchases_fraudulent,
+                    "legitimacyRate": round(1 - purchases_fraudulent / purchases_total, 2) if purchases_total else 0.0
+                }
+            },
+            "sellerReputation": {
+                "score": scores["sellerReputation"],
+                "weight": TRUST_SCORE_WEIGHTS["sellerReputation"],
+                "details": {
+                    "accountAge": int(counters.get("seller_account_age", 0)),
+                    "totalProducts": int(counters.get("seller_total_products", 0)),
+                    "averageRating": round(counters.get("seller_average_rating", 0), 1),
+                    "suspiciousActivities": int(counters.get("seller_suspicious", 0))
+                }
+            }
+        },
+        "trend": trend,
+        "lastUpdated": datetime.now().isoformat()
+    }
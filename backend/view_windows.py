@@ -0,0 +1,264 @@
+import os
+import asyncio
+import logging
+from array import array
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# View window configuration
+VIEW_WINDOW_MODE = os.getenv("VIEW_WINDOW_MODE", "tumbling")  # tumbling | sliding
+VIEW_WINDOW_SECONDS = float(os.getenv("VIEW_WINDOW_SECONDS", "60"))
+VIEW_WINDOW_SLIDE_SECONDS = float(os.getenv("VIEW_WINDOW_SLIDE_SECONDS", "10"))
+VIEW_WINDOW_MAX_PRODUCTS = int(os.getenv("VIEW_WINDOW_MAX_PRODUCTS", "100000"))
+
+WINDOW_MODES = ("tumbling", "sliding")
+
+# Views shorter than this count as bounces
+BOUNCE_SECONDS = 5
+
+DEVICE_TYPES = ("desktop", "mobile", "tablet", "other")
+REFERRER_SOURCES = ("organic", "search", "social", "direct", "paid", "other")
+
+# Per-bucket aggregate columns (fixed, so per-product memory is bounded)
+FIELDS = (
+    ["views", "duration_sum", "scroll_sum", "interaction_sum",
+     "zero_scroll", "no_interaction", "bounces", "returning"]
+    + [f"device_{device}" for device in DEVICE_TYPES]
+    + [f"referrer_{source}" for source in REFERRER_SOURCES]
+)
+FIELD_INDEX = {name: index for index, name in enumerate(FIELDS)}
+FIELD_COUNT = len(FIELDS)
+
+
+def _number(value) -> float:
+    try:
+        return max(0.0, float(value or 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _category(value, categories) -> str:
+    value = str(value or "").lower()
+    return value if value in categories else "other"
+
+
+class ProductWindow:
+    """Ring buffer of per-bucket aggregates plus running totals over the whole window"""
+
+    __slots__ = ("buckets", "totals", "head", "ticks")
+
+    def __init__(self, bucket_count: int):
+        self.buckets = array("d", bytes(8 * bucket_count * FIELD_COUNT))
+        self.totals = array("d", bytes(8 * FIELD_COUNT))
+        self.head = 0
+        self.ticks = 0
+
+    def add(self, values: Dict[int, float]):
+        offset = self.head * FIELD_COUNT
+        for index, value in values.items():
+            self.buckets[offset + index] += value
+            self.totals[index] += value
+
+    def advance(self, bucket_count: int):
+        """Open the next bucket, evicting the oldest one from the totals in O(fields)"""
+        self.head = (self.head + 1) % bucket_count
+        offset = self.head * FIELD_COUNT
+        for index in range(FIELD_COUNT):
+            self.totals[index] -= self.buckets[offset + index]
+            self.buckets[offset + index] = 0.0
+        self.ticks += 1
+
+
+class ViewWindowEngine:
+    """Per-product windowed aggregation of product-view events
+
+    Views are folded into the current bucket of their product's ring buffer in O(1).
+    Every slide interval the buckets advance; a tumbling window emits once per window
+    length, a sliding window once per slide. Each emission hands the window's metrics
+    and the number of views not yet emitted to on_window, so the ML service is called
+    once per window instead of once per view. Bot probabilities of sessions closed
+    since the product's last emission ride along with its next window.
+    """
+
+    def __init__(
+        self,
+        on_window: Callable[[str, Dict, int], Awaitable[None]],
+        mode: str = VIEW_WINDOW_MODE,
+        window_seconds: float = VIEW_WINDOW_SECONDS,
+        slide_seconds: float = VIEW_WINDOW_SLIDE_SECONDS,
+        max_products: int = VIEW_WINDOW_MAX_PRODUCTS,
+    ):
+        if mode not in WINDOW_MODES:
+            logger.warning(f"⚠️ Unknown view window mode '{mode}', using tumbling")
+            mode = "tumbling"
+        self.on_window = on_window
+        self.mode = mode
+        self.slide_seconds = max(0.1, slide_seconds)
+        self.bucket_count = max(1, round(window_seconds / self.slide_seconds))
+        self.window_seconds = self.bucket_count * self.slide_seconds
+        self.max_products = max_products
+        self.products: Dict[str, ProductWindow] = {}
+        # Views since the product's last emission (sliding windows overlap)
+        self._unemitted: Dict[str, float] = {}
+        # Closed-session signal per product since its last emission: [sessions, bot probability sum]
+        self._sessions: Dict[str, List[float]] = {}
+        self._ticker: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.views = 0
+        self.dropped_views = 0
+        self.windows_emitted = 0
+        self.emit_failures = 0
+
+    def start(self):
+        self._ticker = asyncio.create_task(self._run())
+        logger.info(f"🪟 View window engine started ({self.mode}, {self.window_seconds:g}s window, {self.slide_seconds:g}s slide)")
+
+    async def stop(self):
+        if self._ticker:
+            self._ticker.cancel()
+            await asyncio.gather(self._ticker, return_exceptions=True)
+            self._ticker = None
+
+    def add(self, event: Dict):
+        """Fold one product-view event into its product's current bucket"""
+        product_id = event.get("product_id") or "prod_001"
+        window = self.products.get(product_id)
+        if window is None:
+            if len(self.products) >= self.max_products:
+                self.dropped_views += 1
+                return
+            window = self.products[product_id] = ProductWindow(self.bucket_count)
+
+        duration = _number(event.get("view_duration_seconds"))
+        scroll = _number(event.get("scroll_percentage"))
+        interactions = _number(event.get("interaction_count"))
+        device = _category(event.get("device_type"), DEVICE_TYPES)
+        referrer = _category(event.get("referrer_source"), REFERRER_SOURCES)
+        window.add({
+            FIELD_INDEX["views"]: 1,
+            FIELD_INDEX["duration_sum"]: duration,
+            FIELD_INDEX["scroll_sum"]: min(scroll, 100.0),
+            FIELD_INDEX["interaction_sum"]: interactions,
+            FIELD_INDEX["zero_scroll"]: 1 if scroll == 0 else 0,
+            FIELD_INDEX["no_interaction"]: 1 if interactions == 0 else 0,
+            FIELD_INDEX["bounces"]: 1 if duration < BOUNCE_SECONDS else 0,
+            FIELD_INDEX["returning"]: 1 if event.get("is_returning_viewer") else 0,
+            FIELD_INDEX[f"device_{device}"]: 1,
+            FIELD_INDEX[f"referrer_{referrer}"]: 1,
+        })
+        self._unemitted[product_id] = self._unemitted.get(product_id, 0) + 1
+        self.views += 1
+
+    def add_session(self, product_id: str, bot_probability: float):
+        """Attach a closed session's bot probability to the product's next window"""
+        signal = self._sessions.pop(product_id, None) or [0, 0.0]
+        signal[0] += 1
+        signal[1] += bot_probability
+        # Re-inserted last, so the oldest products are evicted first
+        self._sessions[product_id] = signal
+        if len(self._sessions) > self.max_products:
+            del self._sessions[next(iter(self._sessions))]
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.slide_seconds)
+            emissions = self.tick()
+            if emissions:
+                await asyncio.gather(*(self._emit(*emission) for emission in emissions))
+
+    def tick(self) -> List:
+        """Close the current bucket of every active product; returns due (product_id, metrics, views)"""
+        emissions = []
+        idle = []
+        for product_id, window in self.products.items():
+            due = self.mode == "sliding" or (window.ticks + 1) % self.bucket_count == 0
+            if due and self._unemitted.get(product_id):
+                views = int(self._unemitted.pop(product_id))
+                metrics = window_metrics(window.totals, self.window_seconds)
+                sessions, bot_probability_sum = self._sessions.pop(product_id, (0, 0.0))
+                metrics["closed_sessions"] = int(sessions)
+                metrics["session_bot_probability"] = round(bot_probability_sum / sessions, 3) if sessions else None
+                emissions.append((product_id, metrics, views))
+            window.advance(self.bucket_count)
+            if window.totals[FIELD_INDEX["views"]] <= 0 and not self._unemitted.get(product_id):
+                idle.append(product_id)
+        # Products without views in the window hold no state
+        for product_id in idle:
+            del self.products[product_id]
+            self._unemitted.pop(product_id, None)
+        return emissions
+
+    async def _emit(self, product_id: str, metrics: Dict, views: int):
+        try:
+            await self.on_window(product_id, metrics, views)
+            self.windows_emitted += 1
+        except Exception as e:
+            self.emit_failures += 1
+            logger.warning(f"⚠️ Failed to emit view window for {product_id}: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "window_seconds": self.window_seconds,
+            "slide_seconds": self.slide_seconds,
+            "active_products": len(self.products),
+            "pending_session_signals": len(self._sessions),
+            "views": self.views,
+            "dropped_views": self.dropped_views,
+            "windows_emitted": self.windows_emitted,
+            "emit_failures": self.emit_failures,
+        }
+
+
+def window_metrics(totals, window_seconds: float) -> Dict:
+    """Aggregate metrics of one window from its column totals"""
+    views = totals[FIELD_INDEX["views"]]
+
+    def ratio(name: str) -> float:
+        return round(totals[FIELD_INDEX[name]] / views, 3)
+
+    return {
+        "views": int(views),
+        "window_seconds": window_seconds,
+        "avg_view_duration": round(totals[FIELD_INDEX["duration_sum"]] / views, 1),
+        "avg_scroll_percentage": round(totals[FIELD_INDEX["scroll_sum"]] / views, 1),
+        "avg_interactions": round(totals[FIELD_INDEX["interaction_sum"]] / views, 2),
+        "interaction_rate": round(1 - totals[FIELD_INDEX["no_interaction"]] / views, 3),
+        "bounce_rate": ratio("bounces"),
+        "zero_scroll_ratio": ratio("zero_scroll"),
+        "returning_ratio": ratio("returning"),
+        "device_mix": {device: ratio(f"device_{device}") for device in DEVICE_TYPES},
+        "referrer_mix": {source: ratio(f"referrer_{source}") for source in REFERRER_SOURCES},
+    }
+
+
+def view_pattern_request(product_id: str, metrics: Dict) -> Dict:
+    """Build the /analyze/view-pattern payload from a window's metrics"""
+    # Engagement: time on page, scroll depth and interactions
+    engagement = (
+        0.4 * min(metrics["avg_view_duration"] / 60, 1.0)
+        + 0.3 * metrics["avg_scroll_percentage"] / 100
+        + 0.3 * min(metrics["avg_interactions"] / 3, 1.0)
+    )
+    view_quality_score = max(0, min(100, int(round(engagement * 100))))
+
+    # Closed sessions carry the stronger bot signal; otherwise views that never
+    # scroll, interact or stay look automated
+    if metrics.get("session_bot_probability") is not None:
+        bot_probability = metrics["session_bot_probability"]
+    else:
+        bot_probability = round(min(1.0,
+            0.5 * metrics["zero_scroll_ratio"]
+            + 0.3 * (1 - metrics["interaction_rate"])
+            + 0.2 * metrics["bounce_rate"]
+        ), 3)
+
+    return {
+        "product_id": product_id,
+        "view_quality_score": view_quality_score,
+        "bot_probability": bot_probability,
+        "traffic_pattern": "organic" if bot_probability < 0.3 else "suspicious",
+        "aggregated_metrics": metrics
+    }
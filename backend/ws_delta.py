@@ -0,0 +1,178 @@
+import os
+import json
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+# Delta encoding configuration
+WS_TRUST_SCORE_DELTAS = os.getenv("WS_TRUST_SCORE_DELTAS", "true").lower() == "true"
+WS_SNAPSHOT_CACHE_SIZE = int(os.getenv("WS_SNAPSHOT_CACHE_SIZE", "10000"))
+
+
+def diff_documents(old: Dict, new: Dict) -> Dict:
+    """Nested dict of the fields whose values changed (removed fields map to None)"""
+    changes = {}
+    for key, value in new.items():
+        previous = old.get(key)
+        if isinstance(value, dict) and isinstance(previous, dict):
+            nested = diff_documents(previous, value)
+            if nested:
+                changes[key] = nested
+        elif key not in old or previous != value:
+            changes[key] = value
+    for key in old:
+        if key not in new:
+            changes[key] = None
+    return changes
+
+
+def apply_delta(document: Dict, changes: Dict) -> Dict:
+    """Return a copy of document with a delta from diff_documents applied"""
+    result = dict(document)
+    for key, value in changes.items():
+        if value is None:
+            result.pop(key, None)
+        elif isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = apply_delta(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+
+def seq_key(product_id: str) -> str:
+    return f"trust_score_seq:{product_id}"
+
+
+def base_key(product_id: str) -> str:
+    return f"trust_score_base:{product_id}"
+
+
+# Assign the next sequence number and swap in the new document in one step, returning
+# the previous {seq, document}: every delta's base is exactly the update before it
+NEXT_UPDATE_SCRIPT = """
+local previous = redis.call('HMGET', KEYS[2], 'seq', 'document')
+local seq = redis.call('INCR', KEYS[1])
+redis.call('HSET', KEYS[2], 'seq', seq, 'document', ARGV[1])
+return {seq, previous[1] or false, previous[2] or false}
+"""
+
+# Store the first base for a product at the current sequence number, unless an
+# update got there first; returns the stored {seq, document} either way
+INIT_BASE_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+  local seq = tonumber(redis.call('GET', KEYS[1]) or '0')
+  redis.call('HSET', KEYS[2], 'seq', seq, 'document', ARGV[1])
+end
+return redis.call('HMGET', KEYS[2], 'seq', 'document')
+"""
+
+
+class TrustScoreVersions:
+    """Sequence-numbered trust score snapshots for delta-encoded WebSocket pushes
+
+    Sequence numbers come from Redis INCR so every replica agrees on them, and the
+    last published document is stored next to the counter and swapped atomically
+    with it, so a delta is always computed against the update just before it, even
+    when that update came from another replica. Each delta names the sequence it
+    applies on top of (base_seq); a client whose last applied sequence differs has
+    missed an update and asks for a snapshot (resync). Snapshots for new subscribers
+    are read from the same stored (seq, document) pair, so later deltas apply to them.
+    """
+
+    def __init__(self, redis_client=None, max_products: int = WS_SNAPSHOT_CACHE_SIZE):
+        self.redis_client = redis_client
+        self.max_products = max_products
+        self._snapshots: "OrderedDict[str, Tuple[int, Dict]]" = OrderedDict()
+        self._local_seq: Dict[str, int] = {}
+        self._next_update_script = redis_client.register_script(NEXT_UPDATE_SCRIPT) if redis_client else None
+        self._init_base_script = redis_client.register_script(INIT_BASE_SCRIPT) if redis_client else None
+
+        # Metrics
+        self.snapshots_sent = 0
+        self.deltas_sent = 0
+
+    def remember(self, product_id: str, seq: int, document: Dict):
+        self._snapshots[product_id] = (seq, document)
+        self._snapshots.move_to_end(product_id)
+        while len(self._snapshots) > self.max_products:
+            self._snapshots.popitem(last=False)
+
+    async def _advance(self, product_id: str, document: Dict) -> Tuple[int, Optional[Tuple[int, Dict]]]:
+        """Next sequence number and the previously published (seq, document), if any"""
+        if self._next_update_script:
+            seq, base_seq, base_document = await self._next_update_script(
+                keys=[seq_key(product_id), base_key(product_id)], args=[json.dumps(document)]
+            )
+            if base_seq is None or base_document is None:
+                return int(seq), None
+            return int(seq), (int(base_seq), json.loads(base_document))
+        self._local_seq[product_id] = self._local_seq.get(product_id, 0) + 1
+        return self._local_seq[product_id], self._snapshots.get(product_id)
+
+    async def latest(self, product_id: str, loader: Callable[[str], Awaitable[Dict]]) -> Tuple[int, Dict]:
+        """The last published (seq, document), read together
+
+        Only a product that was never published is loaded; its document becomes the
+        base at the current sequence number.
+        """
+        if self.redis_client:
+            base_seq, base_document = await self.redis_client.hmget(base_key(product_id), "seq", "document")
+            if base_seq is None or base_document is None:
+                base_seq, base_document = await self._init_base_script(
+                    keys=[seq_key(product_id), base_key(product_id)], args=[json.dumps(await loader(product_id))]
+                )
+            seq, document = int(base_seq), json.loads(base_document)
+        else:
+            entry = self._snapshots.get(product_id)
+            if entry is not None:
+                return entry
+            seq, document = self._local_seq.get(product_id, 0), await loader(product_id)
+        self.remember(product_id, seq, document)
+        return seq, document
+
+    async def next_update(self, product_id: str, document: Dict) -> Dict:
+        """Assign the next sequence number and build the message to push for it"""
+        seq, previous = await self._advance(product_id, document)
+        self.remember(product_id, seq, document)
+
+        if not WS_TRUST_SCORE_DELTAS:
+            return {"type": "trust_score_update", "product_id": product_id, "seq": seq, "payload": document}
+        if previous is None:
+            return self.snapshot_message(product_id, seq, document)
+
+        base_seq, base_document = previous
+        self.deltas_sent += 1
+        return {
+            "type": "trust_score_delta",
+            "product_id": product_id,
+            "seq": seq,
+            "base_seq": base_seq,
+            "changes": diff_documents(base_document, document)
+        }
+
+    def snapshot_message(self, product_id: str, seq: int, document: Dict) -> Dict:
+        self.snapshots_sent += 1
+        return {"type": "trust_score_snapshot", "product_id": product_id, "seq": seq, "payload": document}
+
+    def observe(self, product_id: str, message: Dict) -> Optional[Dict]:
+        """Track an update published by another replica; returns the full document if known"""
+        message_type = message.get("type")
+        if message_type in ("trust_score_snapshot", "trust_score_update"):
+            self.remember(product_id, message["seq"], message["payload"])
+            return message["payload"]
+        if message_type == "trust_score_delta":
+            entry = self._snapshots.get(product_id)
+            if entry is not None and entry[0] == message.get("base_seq"):
+                document = apply_delta(entry[1], message["changes"])
+                self.remember(product_id, message["seq"], document)
+                return document
+            # Missed an update: forget the snapshot so the next subscriber loads a fresh one
+            self._snapshots.pop(product_id, None)
+        return None
+
+    def stats(self) -> Dict:
+        return {
+            "deltas_enabled": WS_TRUST_SCORE_DELTAS,
+            "tracked_products": len(self._snapshots),
+            "snapshots_sent": self.snapshots_sent,
+            "deltas_sent": self.deltas_sent,
+        }
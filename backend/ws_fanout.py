@@ -0,0 +1,190 @@
+import os
+import json
+import uuid
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from ws_hub import WebSocketHub
+
+logger = logging.getLogger(__name__)
+
+# Cross-replica fan-out configuration
+WS_FANOUT_CHANNEL_PREFIX = os.getenv("WS_FANOUT_CHANNEL_PREFIX", "ws:product:")
+WS_FANOUT_POLL_SECONDS = float(os.getenv("WS_FANOUT_POLL_SECONDS", "1.0"))
+
+
+class RedisFanout:
+    """Cross-replica WebSocket fan-out over Redis pub/sub
+
+    Updates are delivered to this replica's subscribers immediately and published once
+    per product channel for the other replicas. Messages published during the same
+    event-loop tick are batched into one pipeline (one PUBLISH per product, updates
+    with the same coalesce key collapsed to the newest). Each replica only SUBSCRIBEs
+    to channels of products that have local subscribers.
+    """
+
+    def __init__(self, hub: WebSocketHub, on_remote_message: Optional[Callable[[str, Dict], None]] = None):
+        self.hub = hub
+        self.on_remote_message = on_remote_message
+        self.instance_id = uuid.uuid4().hex
+        self.redis_client = None
+        self._pubsub = None
+        self._buffer: Dict[str, List[Tuple[Dict, Optional[str]]]] = {}
+        self._flush_scheduled = False
+        self._desired: Set[str] = set()
+        self._subscribed: Set[str] = set()
+        self._sync_needed = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._flushes: Set[asyncio.Task] = set()
+
+        # Metrics
+        self.published_messages = 0
+        self.publish_batches = 0
+        self.publish_commands = 0
+        self.received_messages = 0
+        self.errors = 0
+
+        hub.on_subscription_change = self._on_subscription_change
+
+    def channel(self, product_id: str) -> str:
+        return f"{WS_FANOUT_CHANNEL_PREFIX}{product_id}"
+
+    async def start(self, redis_client):
+        self.redis_client = redis_client
+        self._pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+        self._desired = set(self.hub.subscriptions)
+        self._sync_needed.set()
+        self._tasks = [
+            asyncio.create_task(self._sync_subscriptions()),
+            asyncio.create_task(self._listen()),
+        ]
+        logger.info(f"📡 WebSocket fan-out over Redis pub/sub started (instance {self.instance_id[:8]})")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._buffer:
+            await self._flush()
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.aclose()
+            except Exception:
+                pass
+            self._pubsub = None
+
+    def publish(self, product_id: str, message: Dict, coalesce_key: Optional[str] = None):
+        """Deliver locally now and queue the message for other replicas"""
+        self.hub.publish(product_id, message, coalesce_key)
+        if self.redis_client is None:
+            return
+        self._buffer.setdefault(product_id, []).append((message, coalesce_key))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._schedule_flush)
+
+    def _schedule_flush(self):
+        task = asyncio.create_task(self._flush())
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self):
+        self._flush_scheduled = False
+        buffer, self._buffer = self._buffer, {}
+        if not buffer or self.redis_client is None:
+            return
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for product_id, messages in buffer.items():
+                    # Keep only the newest message per coalesce key, preserving order
+                    latest: Dict[str, int] = {}
+                    for index, (_, key) in enumerate(messages):
+                        if key is not None:
+                            latest[key] = index
+                    batch = [
+                        {"message": message, "coalesce_key": key}
+                        for index, (message, key) in enumerate(messages)
+                        if key is None or latest[key] == index
+                    ]
+                    self.published_messages += len(batch)
+                    pipe.publish(self.channel(product_id), json.dumps({
+                        "origin": self.instance_id,
+                        "product_id": product_id,
+                        "messages": batch,
+                    }))
+                await pipe.execute()
+            self.publish_batches += 1
+            self.publish_commands += len(buffer)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"⚠️ Failed to publish WebSocket updates to Redis: {e}")
+
+    def _on_subscription_change(self, product_id: str, subscribed: bool):
+        if subscribed:
+            self._desired.add(product_id)
+        else:
+            self._desired.discard(product_id)
+        self._sync_needed.set()
+
+    async def _sync_subscriptions(self):
+        while True:
+            await self._sync_needed.wait()
+            self._sync_needed.clear()
+            to_add = self._desired - self._subscribed
+            to_remove = self._subscribed - self._desired
+            try:
+                if to_add:
+                    await self._pubsub.subscribe(*(self.channel(product_id) for product_id in to_add))
+                    self._subscribed |= to_add
+                if to_remove:
+                    await self._pubsub.unsubscribe(*(self.channel(product_id) for product_id in to_remove))
+                    self._subscribed -= to_remove
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"⚠️ Failed to update Redis channel subscriptions: {e}")
+                await asyncio.sleep(1)
+                self._sync_needed.set()
+
+    async def _listen(self):
+        while True:
+            if not self._subscribed:
+                await asyncio.sleep(WS_FANOUT_POLL_SECONDS)
+                continue
+            try:
+                raw = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=WS_FANOUT_POLL_SECONDS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"⚠️ Redis pub/sub receive failed: {e}")
+                await asyncio.sleep(1)
+                continue
+            if not raw or raw.get("type") != "message":
+                continue
+            try:
+                envelope = json.loads(raw["data"])
+            except (TypeError, ValueError):
+                continue
+            if envelope.get("origin") == self.instance_id:
+                continue
+            product_id = envelope.get("product_id")
+            for item in envelope.get("messages", []):
+                self.received_messages += 1
+                message = item.get("message", {})
+                if self.on_remote_message is not None:
+                    self.on_remote_message(product_id, message)
+                self.hub.publish(product_id, message, item.get("coalesce_key"))
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.redis_client is not None,
+            "instance_id": self.instance_id,
+            "subscribed_channels": len(self._subscribed),
+            "published_messages": self.published_messages,
+            "publish_batches": self.publish_batches,
+            "publish_commands": self.publish_commands,
+            "received_messages": self.received_messages,
+            "errors": self.errors,
+        }
@@ -0,0 +1,224 @@
+import os
+import json
+import asyncio
+import logging
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+# WebSocket fan-out configuration
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "100"))
+WS_SLOW_CLIENT_POLICY = os.getenv("WS_SLOW_CLIENT_POLICY", "drop_oldest")  # drop_oldest | coalesce | disconnect
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))
+WS_MAX_SUBSCRIPTIONS = int(os.getenv("WS_MAX_SUBSCRIPTIONS", "200"))
+
+SLOW_CLIENT_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+
+class ClientConnection:
+    """One WebSocket client with its own bounded outbound queue and sender task"""
+
+    __slots__ = ("websocket", "hub", "pending", "wakeup", "sender", "closed", "products")
+
+    def __init__(self, websocket: WebSocket, hub: "WebSocketHub"):
+        self.websocket = websocket
+        self.hub = hub
+        self.pending: Deque[Tuple[Optional[str], str]] = deque()
+        self.wakeup = asyncio.Event()
+        self.sender: Optional[asyncio.Task] = None
+        self.closed = False
+        self.products: Set[str] = set()
+
+    def enqueue(self, text: str, coalesce_key: Optional[str] = None) -> bool:
+        """Queue a serialized message without blocking; False if the client must be dropped"""
+        if self.closed:
+            return True
+        policy = self.hub.policy
+
+        if policy == "coalesce" and coalesce_key is not None:
+            # Replace an older queued message for the same key with the newer one
+            for index, (key, _) in enumerate(self.pending):
+                if key == coalesce_key:
+                    del self.pending[index]
+                    self.pending.append((coalesce_key, text))
+                    self.hub.coalesced += 1
+                    self.wakeup.set()
+                    return True
+
+        if len(self.pending) >= self.hub.queue_size:
+            if policy == "disconnect":
+                return False
+            self.pending.popleft()
+            self.hub.dropped += 1
+
+        self.pending.append((coalesce_key, text))
+        self.wakeup.set()
+        return True
+
+    async def run_sender(self):
+        try:
+            while not self.closed:
+                await self.wakeup.wait()
+                self.wakeup.clear()
+                while self.pending and not self.closed:
+                    _, text = self.pending.popleft()
+                    await asyncio.wait_for(self.websocket.send_text(text), self.hub.send_timeout)
+                    self.hub.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self.hub.disconnect_slow(self)
+        except Exception:
+            # Send failed: the client is gone
+            self.hub.unregister(self)
+
+
+class WebSocketHub:
+    """Registry of connected clients with non-blocking, serialize-once fan-out
+
+    Clients subscribe to product IDs; product updates are delivered only to the
+    sockets in that product's subscription index.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = WS_SEND_QUEUE_SIZE,
+        policy: str = WS_SLOW_CLIENT_POLICY,
+        send_timeout: float = WS_SEND_TIMEOUT_SECONDS,
+    ):
+        if policy not in SLOW_CLIENT_POLICIES:
+            logger.warning(f"⚠️ Unknown WebSocket slow-client policy '{policy}', using drop_oldest")
+            policy = "drop_oldest"
+        self.queue_size = max(1, queue_size)
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        self.subscriptions: Dict[str, Set[ClientConnection]] = {}
+        # Called with (product_id, True) on a product's first subscriber and (product_id, False) after its last
+        self.on_subscription_change: Optional[Callable[[str, bool], None]] = None
+
+        # Metrics
+        self.broadcasts = 0
+        self.publishes = 0
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.disconnected_slow = 0
+
+    def register(self, websocket: WebSocket) -> ClientConnection:
+        client = ClientConnection(websocket, self)
+        client.sender = asyncio.create_task(client.run_sender())
+        self.clients[websocket] = client
+        return client
+
+    def unregister(self, client: ClientConnection):
+        if client.closed:
+            return
+        client.closed = True
+        client.pending.clear()
+        self.clients.pop(client.websocket, None)
+        self.unsubscribe(client, list(client.products))
+        if client.sender and client.sender is not asyncio.current_task():
+            client.sender.cancel()
+
+    def disconnect_slow(self, client: ClientConnection):
+        self.disconnected_slow += 1
+        self.unregister(client)
+
+        async def close():
+            try:
+                await client.websocket.close(code=1008, reason="Client too slow")
+            except Exception:
+                pass
+
+        asyncio.create_task(close())
+
+    def subscribe(self, client: ClientConnection, product_ids: Iterable[str]) -> List[str]:
+        """Add product subscriptions for a client; returns the IDs actually added"""
+        added = []
+        for product_id in product_ids:
+            if product_id in client.products:
+                continue
+            if len(client.products) >= WS_MAX_SUBSCRIPTIONS:
+                break
+            client.products.add(product_id)
+            if product_id not in self.subscriptions:
+                self.subscriptions[product_id] = set()
+                if self.on_subscription_change:
+                    self.on_subscription_change(product_id, True)
+            self.subscriptions[product_id].add(client)
+            added.append(product_id)
+        return added
+
+    def unsubscribe(self, client: ClientConnection, product_ids: Iterable[str]) -> List[str]:
+        removed = []
+        for product_id in product_ids:
+            if product_id not in client.products:
+                continue
+            client.products.discard(product_id)
+            subscribers = self.subscriptions.get(product_id)
+            if subscribers is not None:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self.subscriptions[product_id]
+                    if self.on_subscription_change:
+                        self.on_subscription_change(product_id, False)
+            removed.append(product_id)
+        return removed
+
+    def has_subscribers(self, product_id: str) -> bool:
+        return product_id in self.subscriptions
+
+    def _fan_out(self, clients: Iterable[ClientConnection], message: Dict, coalesce_key: Optional[str]) -> int:
+        text = json.dumps(message)
+        slow = []
+        recipients = 0
+        for client in clients:
+            recipients += 1
+            if not client.enqueue(text, coalesce_key):
+                slow.append(client)
+        for client in slow:
+            self.disconnect_slow(client)
+        if slow:
+            logger.info(f"🔌 Disconnected {len(slow)} slow WebSocket clients")
+        return recipients
+
+    def publish(self, product_id: str, message: Dict, coalesce_key: Optional[str] = None) -> int:
+        """Serialize once and enqueue to the product's subscribers; returns the number of recipients"""
+        subscribers = self.subscriptions.get(product_id)
+        if not subscribers:
+            return 0
+        self.publishes += 1
+        return self._fan_out(list(subscribers), message, coalesce_key)
+
+    def broadcast(self, message: Dict, coalesce_key: Optional[str] = None) -> int:
+        """Serialize once and enqueue to every client; returns the number of recipients"""
+        if not self.clients:
+            return 0
+        self.broadcasts += 1
+        return self._fan_out(list(self.clients.values()), message, coalesce_key)
+
+    async def close_all(self):
+        clients = list(self.clients.values())
+        for client in clients:
+            self.unregister(client)
+        await asyncio.gather(*(c.sender for c in clients if c.sender), return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            "connections": len(self.clients),
+            "subscribed_products": len(self.subscriptions),
+            "subscriptions": sum(len(client.products) for client in self.clients.values()),
+            "policy": self.policy,
+            "queue_size": self.queue_size,
+            "queued": sum(len(client.pending) for client in self.clients.values()),
+            "broadcasts": self.broadcasts,
+            "publishes": self.publishes,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "disconnected_slow": self.disconnected_slow,
+        }
@@ -0,0 +1,50 @@
+"""Fraud scoring rules shared by the ML service and the backend's embedded scoring mode
+
+The request models are imported eagerly. Everything else (rule tables, lexicon,
+text model) is loaded on first access, so a process that only validates payloads
+with the models never loads or reloads scoring state.
+"""
+
+import importlib
+
+from .models import (
+    ReviewAnalysisRequest, ViewPatternAnalysisRequest, PurchaseAnalysisRequest, SellerAnalysisRequest
+)
+
+# Public name → submodule that defines it
+_LAZY_EXPORTS = {
+    **dict.fromkeys(["ScoringExecutor", "EXECUTION_MODES"], "executor"),
+    **dict.fromkeys(["PhraseMatcher", "load_lexicon"], "lexicon"),
+    **dict.fromkeys(
+        ["NearDuplicateIndex", "RedisNearDuplicateIndex", "load_near_duplicate_index", "review_key", "NEAR_DUP_ENABLED"],
+        "near_duplicates",
+    ),
+    **dict.fromkeys(["TextModel", "load_text_model"], "text_model"),
+    # RuleEngine comes through rules too: importing the rule_engine submodule binds the
+    # package's rule_engine name to it, and only loading rules rebinds it to the instance
+    **dict.fromkeys(
+        [
+            "RuleEngine", "MODEL_VERSION", "results_version", "score_versioned", "rule_engine", "review_text_model",
+            "score_review", "score_view_pattern", "score_purchase", "score_seller",
+            "score_review_batch", "score_view_pattern_batch", "score_purchase_batch", "score_seller_batch",
+        ],
+        "rules",
+    ),
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    loaded = importlib.import_module(f".{module}", __name__)
+    for export, source in _LAZY_EXPORTS.items():
+        if source == module:
+            globals()[export] = getattr(loaded, export)
+    return globals()[name]
+
+
+__all__ = [
+    "ReviewAnalysisRequest", "ViewPatternAnalysisRequest", "PurchaseAnalysisRequest", "SellerAnalysisRequest",
+    *_LAZY_EXPORTS,
+]
@@ -0,0 +1,74 @@
+import os
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Scoring execution configuration
+ML_EXECUTION_MODE = os.getenv("ML_EXECUTION_MODE", "inline")  # inline | thread | process
+ML_EXECUTOR_WORKERS = int(os.getenv("ML_EXECUTOR_WORKERS", str(os.cpu_count() or 1)))
+
+EXECUTION_MODES = ("inline", "thread", "process")
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+class ScoringExecutor:
+    """Runs synchronous scoring functions off (or on) the event loop
+
+    - inline: call directly on the event loop (no pool, lowest overhead per call)
+    - thread: thread pool, useful once scoring releases the GIL (NumPy batches)
+    - process: process pool; workers are forked after the rule tables and lexicon
+      automaton are loaded, so they share them instead of rebuilding them
+    """
+
+    def __init__(self, mode: str = ML_EXECUTION_MODE, workers: int = ML_EXECUTOR_WORKERS):
+        if mode not in EXECUTION_MODES:
+            logger.warning(f"Unknown ML execution mode '{mode}', using inline")
+            mode = "inline"
+        self.mode = mode
+        self.workers = max(1, workers)
+        self._pool: Optional[Executor] = None
+
+        # Metrics
+        self.calls = 0
+        self.in_flight = 0
+
+    async def start(self):
+        if self.mode == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scoring")
+        elif self.mode == "process":
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("fork"))
+            # Fork every worker now rather than on the first requests
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(self._pool, _warm_up) for _ in range(self.workers)))
+        logger.info(f"Scoring executor started ({self.mode}, {self.workers if self._pool else 0} workers)")
+
+    async def stop(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """Run a scoring function according to the execution mode"""
+        self.calls += 1
+        if self._pool is None:
+            return func(*args)
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, func, *args)
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "workers": self.workers if self._pool else 0,
+            "calls": self.calls,
+            "in_flight": self.in_flight,
+        }
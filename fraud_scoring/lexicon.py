@@ -0,0 +1,114 @@
+import os
+import json
+import hashlib
+import logging
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Fraud lexicon configuration
+REVIEW_LEXICON_PATH = os.getenv(
+    "REVIEW_LEXICON_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicon.json")
+)
+
+# Used when no lexicon file is available
+DEFAULT_LEXICON = {
+    "superlatives": ['amazing', 'incredible', 'perfect', 'best ever', 'worst ever', 'terrible', 'awful'],
+    "generic_phrases": [
+        'great product', 'highly recommend', 'five stars', 'perfect product',
+        'buy this now', 'everyone should buy', 'fast shipping', 'great seller'
+    ],
+}
+
+
+def load_lexicon(path: str = REVIEW_LEXICON_PATH) -> Dict[str, List[str]]:
+    """Read a {"category": ["phrase", ...]} JSON lexicon, falling back to DEFAULT_LEXICON"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            lexicon = json.load(f)
+    except FileNotFoundError:
+        logger.warning(f"Lexicon file {path} not found, using built-in lexicon")
+        return DEFAULT_LEXICON
+    if not isinstance(lexicon, dict) or not all(
+        isinstance(phrases, list) and all(isinstance(p, str) for p in phrases) for phrases in lexicon.values()
+    ):
+        raise ValueError(f"Lexicon {path} must map categories to lists of phrases")
+    return lexicon
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over every phrase of every lexicon category
+
+    One pass over the (lowercased) text finds all phrases as substrings, regardless
+    of how many phrases the lexicon holds. Results are the distinct phrases matched
+    per category, which is what the scoring rules count.
+    """
+
+    def __init__(self, lexicon: Dict[str, Iterable[str]]):
+        self.categories = list(lexicon)
+        self.phrases: List[Tuple[str, str]] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        for category in self.categories:
+            for phrase in dict.fromkeys(p.lower() for p in lexicon[category] if p):
+                self._insert(phrase, len(self.phrases))
+                self.phrases.append((category, phrase))
+        self._build_failure_links()
+        # Identifies the lexicon contents, e.g. for versioning cached results
+        self.fingerprint = hashlib.sha256(
+            json.dumps(self.phrases, ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:12]
+
+    def _insert(self, phrase: str, phrase_id: int):
+        state = 0
+        for char in phrase:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] += (phrase_id,)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                # A state also reports every phrase that ends at its failure state
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def scan(self, text: str) -> Set[int]:
+        """IDs of the distinct phrases occurring in text (case-insensitive)"""
+        goto, fail, output = self._goto, self._fail, self._output
+        found: Set[int] = set()
+        state = 0
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+    def counts(self, found: Set[int]) -> Dict[str, int]:
+        """Number of distinct matched phrases for every category"""
+        counts = dict.fromkeys(self.categories, 0)
+        for phrase_id in found:
+            counts[self.phrases[phrase_id][0]] += 1
+        return counts
+
+    def stats(self) -> Dict:
+        return {"categories": len(self.categories), "phrases": len(self.phrases), "states": len(self._goto)}
@@ -0,0 +1,42 @@
+from pydantic import BaseModel
+
+# Request models shared by the ML service endpoints and embedded scoring
+class ReviewAnalysisRequest(BaseModel):
+    rating: int
+    headline: str
+    review_text: str
+    verified_purchase: bool = True
+    account_age_days: int = 365
+    typing_duration_seconds: int = 60
+    edit_count: int = 1
+    paste_count: int = 0
+    review_length_chars: int = 0
+    contains_images: bool = False
+    previous_reviews_count: int = 0
+
+class ViewPatternAnalysisRequest(BaseModel):
+    product_id: str
+    view_quality_score: int
+    bot_probability: float
+    traffic_pattern: str
+
+class PurchaseAnalysisRequest(BaseModel):
+    order_id: str
+    user_id: str
+    product_id: str
+    purchase_amount: float
+    quantity: int
+    payment_method_type: str
+    is_first_purchase: bool
+    account_age_days: int
+    time_to_purchase_minutes: int
+
+class SellerAnalysisRequest(BaseModel):
+    seller_id: str
+    activity_type: str
+    product_id: str = None
+    change_details: str = ""
+    frequency_last_24h: int = 1
+    account_age_days: int = 365
+    total_products_listed: int = 10
+    average_rating: float = 4.5
@@ -0,0 +1,581 @@
+import os
+import re
+import json
+import math
+import time
+import zlib
+import asyncio
+import hashlib
+import logging
+import secrets
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+from pydantic import BaseModel
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # Shared index is optional
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Near-duplicate review index configuration
+NEAR_DUP_ENABLED = os.getenv("NEAR_DUP_ENABLED", "true").lower() == "true"
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.7"))
+NEAR_DUP_NUM_PERM = int(os.getenv("NEAR_DUP_NUM_PERM", "64"))
+NEAR_DUP_BANDS = int(os.getenv("NEAR_DUP_BANDS", "16"))
+NEAR_DUP_SHINGLE_SIZE = int(os.getenv("NEAR_DUP_SHINGLE_SIZE", "3"))
+NEAR_DUP_MIN_SHINGLES = int(os.getenv("NEAR_DUP_MIN_SHINGLES", "5"))
+NEAR_DUP_MAX_ENTRIES = int(os.getenv("NEAR_DUP_MAX_ENTRIES", "100000"))
+NEAR_DUP_MAX_BUCKET_MEMBERS = int(os.getenv("NEAR_DUP_MAX_BUCKET_MEMBERS", "32"))
+NEAR_DUP_MAX_AGE_SECONDS = float(os.getenv("NEAR_DUP_MAX_AGE_SECONDS", str(7 * 24 * 3600)))
+NEAR_DUP_SNAPSHOT_PATH = os.getenv("NEAR_DUP_SNAPSHOT_PATH", "")
+NEAR_DUP_SNAPSHOT_SECONDS = float(os.getenv("NEAR_DUP_SNAPSHOT_SECONDS", "300"))
+NEAR_DUP_REDIS_URL = os.getenv("NEAR_DUP_REDIS_URL", "")
+
+WORD_RE = re.compile(r"\w+")
+SHINGLE_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+HASH_SEED = 1
+
+
+def shingles(text: str, size: int) -> np.ndarray:
+    """Distinct 64-bit hashes of the overlapping word n-grams of a text
+
+    Each word is hashed once (crc32, stable across processes and restarts) and the
+    n-gram hashes are combined from consecutive word hashes as array operations.
+    """
+    words = WORD_RE.findall(text.lower())
+    if len(words) < size:
+        return np.empty(0, dtype=np.uint64)
+    word_hashes = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in words), dtype=np.uint64, count=len(words))
+    count = len(words) - size + 1
+    hashed = word_hashes[:count].copy()
+    for offset in range(1, size):
+        hashed = hashed * SHINGLE_MULTIPLIER + word_hashes[offset:offset + count]  # wraps mod 2^64
+    return np.unique(hashed)
+
+
+def review_key(request: BaseModel) -> str:
+    """Stable ID of a review request (hash of its validated fields)
+
+    A retried or resubmitted review has the same key, so it is recognised as the
+    same review instead of a near-duplicate of itself.
+    """
+    canonical = json.dumps(request.model_dump(), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+
+class MinHasher:
+    """MinHash signatures over review shingles, compared band by band (LSH)
+
+    A review's signature is split into bands; reviews sharing any band bucket are
+    candidates, and candidates whose signatures agree on at least `threshold` of
+    their positions (the estimated Jaccard similarity) are matches. Insert and query
+    only touch the review's own buckets, so cost does not grow with the index.
+
+    Every indexed review belongs to a cluster: a review matching earlier ones joins
+    the cluster of its closest match, otherwise it starts a new one. Entries expire
+    after max_age_seconds and the oldest are evicted beyond max_entries.
+
+    A template flood puts every near-copy in the same buckets, so each bucket keeps
+    only its newest max_bucket_members entries, candidates are tried by the number
+    of bands they share, and a cluster's remaining candidates are skipped once one
+    matches. Per-review cost stays bounded however large the flood grows.
+
+    Reviews carry a stable key: a resubmission of an indexed review is not indexed
+    again and is never reported as a duplicate of itself. Subclasses decide where
+    the entries and buckets are kept.
+    """
+
+    def __init__(
+        self,
+        threshold: float = NEAR_DUP_THRESHOLD,
+        num_perm: int = NEAR_DUP_NUM_PERM,
+        bands: int = NEAR_DUP_BANDS,
+        shingle_size: int = NEAR_DUP_SHINGLE_SIZE,
+        min_shingles: int = NEAR_DUP_MIN_SHINGLES,
+        max_entries: int = NEAR_DUP_MAX_ENTRIES,
+        max_age_seconds: float = NEAR_DUP_MAX_AGE_SECONDS,
+        max_bucket_members: int = NEAR_DUP_MAX_BUCKET_MEMBERS,
+    ):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.min_shingles = min_shingles
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.max_bucket_members = max(1, max_bucket_members)
+
+        # Multiply-shift hash functions ((a * x + b) mod 2^64) >> 32, one per signature position
+        rng = np.random.default_rng(HASH_SEED)
+        self._a = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+        # Metrics
+        self.queries = 0
+        self.matches = 0
+        self.evicted = 0
+        self.skipped_short = 0
+        self.resubmitted = 0
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of a text, or None if it has too few shingles to compare"""
+        hashed = shingles(text, self.shingle_size)
+        if len(hashed) < self.min_shingles:
+            return None
+        values = (np.outer(self._a, hashed) + self._b[:, None]) >> np.uint64(32)
+        return values.min(axis=1).astype(np.uint32)
+
+    def similarity(self, signature: np.ndarray, other: np.ndarray) -> float:
+        """Estimated Jaccard similarity of the texts behind two signatures"""
+        return float(np.count_nonzero(signature == other)) / self.num_perm
+
+    @staticmethod
+    def _flag(result: Dict, clusters: List[str]) -> Dict:
+        """Result with a fake indicator naming the matched clusters (a copy, if there are any)"""
+        if not clusters:
+            return result
+        indicator = f"Near-duplicate of reviews in {', '.join(clusters)}"
+        return dict(result, fake_indicators=result.get("fake_indicators", []) + [indicator])
+
+    def stats(self) -> Dict:
+        return {
+            "queries": self.queries,
+            "matches": self.matches,
+            "evicted": self.evicted,
+            "skipped_short": self.skipped_short,
+            "resubmitted": self.resubmitted,
+            "threshold": self.threshold,
+            "bands": self.bands,
+            "rows_per_band": self.rows,
+            "max_bucket_members": self.max_bucket_members,
+        }
+
+
+class NearDuplicateIndex(MinHasher):
+    """Near-duplicate index kept in this process
+
+    Only reviews scored by this process are compared, so it suits a single server
+    process; with NEAR_DUP_SNAPSHOT_PATH set it is restored at startup and
+    snapshotted periodically and at shutdown.
+    """
+
+    def __init__(
+        self,
+        threshold: float = NEAR_DUP_THRESHOLD,
+        num_perm: int = NEAR_DUP_NUM_PERM,
+        bands: int = NEAR_DUP_BANDS,
+        shingle_size: int = NEAR_DUP_SHINGLE_SIZE,
+        min_shingles: int = NEAR_DUP_MIN_SHINGLES,
+        max_entries: int = NEAR_DUP_MAX_ENTRIES,
+        max_age_seconds: float = NEAR_DUP_MAX_AGE_SECONDS,
+        max_bucket_members: int = NEAR_DUP_MAX_BUCKET_MEMBERS,
+        snapshot_path: str = NEAR_DUP_SNAPSHOT_PATH,
+        snapshot_seconds: float = NEAR_DUP_SNAPSHOT_SECONDS,
+    ):
+        super().__init__(
+            threshold, num_perm, bands, shingle_size, min_shingles, max_entries, max_age_seconds, max_bucket_members
+        )
+        self.snapshot_path = snapshot_path
+        self.snapshot_seconds = snapshot_seconds
+
+        # entry id → (signature, cluster id, inserted at, review key), oldest first
+        self._entries: "OrderedDict[int, Tuple[np.ndarray, int, float, str]]" = OrderedDict()
+        # review key → entry id
+        self._keys: Dict[str, int] = {}
+        # Per band: bucket key → entry id, or a set of the newest entry ids once several share it
+        self._buckets: List[Dict[int, Union[int, Set[int]]]] = [{} for _ in range(bands)]
+        self._next_entry = 0
+        self._next_cluster = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def _band_keys(self, signature: np.ndarray) -> List[int]:
+        """One bucket key per band: the hash of its rows of the signature
+
+        Hashes are smaller than the band bytes; a rare hash collision only adds a
+        candidate that the similarity check rejects. Buckets are rebuilt on restore,
+        so the per-process salt of hash() does not matter.
+        """
+        return [hash(band) for band in signature.view(f"V{4 * self.rows}").tolist()]
+
+    def query(
+        self, signature: np.ndarray, keys: Optional[List[int]] = None, exclude: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """(entry id, estimated similarity) of the first match in each matching cluster, best first"""
+        shared: Dict[int, int] = {}
+        for bucket, key in zip(self._buckets, keys or self._band_keys(signature)):
+            members = bucket.get(key)
+            if members is None:
+                continue
+            for entry_id in ((members,) if isinstance(members, int) else members):
+                shared[entry_id] = shared.get(entry_id, 0) + 1
+        shared.pop(exclude, None)
+        # cluster id → (entry id, similarity)
+        matched: Dict[int, Tuple[int, float]] = {}
+        for entry_id in sorted(shared, key=shared.__getitem__, reverse=True):
+            other, cluster, _, _ = self._entries[entry_id]
+            if cluster in matched:
+                continue
+            similarity = self.similarity(other, signature)
+            if similarity >= self.threshold:
+                matched[cluster] = (entry_id, similarity)
+        return sorted(matched.values(), key=lambda match: -match[1])
+
+    def _insert(
+        self, signature: np.ndarray, cluster: int, inserted_at: float, review: str = "", keys: Optional[List[int]] = None
+    ):
+        entry_id = self._next_entry
+        self._next_entry += 1
+        self._entries[entry_id] = (signature, cluster, inserted_at, review)
+        if review:
+            self._keys[review] = entry_id
+        for bucket, key in zip(self._buckets, keys or self._band_keys(signature)):
+            members = bucket.get(key)
+            if members is None:
+                bucket[key] = entry_id
+            elif isinstance(members, int):
+                bucket[key] = {members, entry_id}
+            else:
+                members.add(entry_id)
+                if len(members) > self.max_bucket_members:
+                    # Entry ids grow with insertion order: drop the bucket's oldest
+                    members.discard(min(members))
+
+    def _remove_oldest(self):
+        entry_id, (signature, _, _, review) = self._entries.popitem(last=False)
+        if review:
+            self._keys.pop(review, None)
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            members = bucket.get(key)
+            if members == entry_id:
+                del bucket[key]
+            elif isinstance(members, set):
+                members.discard(entry_id)
+                if len(members) == 1:
+                    bucket[key] = members.pop()
+        self.evicted += 1
+
+    def evict(self, now: Optional[float] = None):
+        """Drop entries older than max_age_seconds and the oldest beyond max_entries"""
+        cutoff = (time.time() if now is None else now) - self.max_age_seconds
+        while self._entries and next(iter(self._entries.values()))[2] < cutoff:
+            self._remove_oldest()
+        while len(self._entries) > self.max_entries:
+            self._remove_oldest()
+
+    def add(self, text: str, now: Optional[float] = None, review: str = "") -> List[str]:
+        """Index a review; returns the IDs of the clusters of the earlier reviews it duplicates
+
+        review is the review's stable key (see review_key); a review already indexed
+        under it is only queried, against every entry but its own.
+        """
+        now = time.time() if now is None else now
+        signature = self.signature(text)
+        if signature is None:
+            self.skipped_short += 1
+            return []
+        self.evict(now)
+        self.queries += 1
+        keys = self._band_keys(signature)
+        own = self._keys.get(review) if review else None
+        matches = self.query(signature, keys, exclude=own)
+        clusters = sorted({self._entries[entry_id][1] for entry_id, _ in matches})
+        if matches:
+            self.matches += 1
+        if own is not None:
+            self.resubmitted += 1
+            return [f"cluster_{c}" for c in clusters]
+        if matches:
+            cluster = self._entries[matches[0][0]][1]
+        else:
+            cluster = self._next_cluster
+            self._next_cluster += 1
+        self._insert(signature, cluster, now, review, keys)
+        if len(self._entries) > self.max_entries:
+            self._remove_oldest()
+        return [f"cluster_{c}" for c in clusters]
+
+    async def annotate(self, request: BaseModel, result: Dict) -> Dict:
+        """Index a review request; flag the result if it is a near-duplicate
+
+        The input result is not modified (it may be shared with the result cache).
+        """
+        return self._flag(result, self.add(request.review_text, review=review_key(request)))
+
+    def snapshot(self, path: Optional[str] = None):
+        """Write the index to disk (atomically replaces the previous snapshot)"""
+        path = path or self.snapshot_path
+        entries = list(self._entries.values())
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp_path,
+            params=np.array([self.num_perm, self.bands, self.shingle_size, HASH_SEED], dtype=np.int64),
+            counters=np.array([self._next_cluster], dtype=np.int64),
+            signatures=np.array([s for s, _, _, _ in entries], dtype=np.uint32).reshape(len(entries), self.num_perm),
+            clusters=np.array([c for _, c, _, _ in entries], dtype=np.int64),
+            inserted_at=np.array([t for _, _, t, _ in entries], dtype=np.float64),
+            reviews=np.array([r for _, _, _, r in entries], dtype="U32"),
+        )
+        os.replace(tmp_path, path)
+
+    def restore(self, path: Optional[str] = None) -> bool:
+        """Load a snapshot written with the same signature settings; expired entries are skipped"""
+        path = path or self.snapshot_path
+        with np.load(path) as snapshot:
+            params = snapshot["params"].tolist()
+            if params != [self.num_perm, self.bands, self.shingle_size, HASH_SEED]:
+                logger.warning(f"Near-duplicate snapshot {path} has different signature settings {params}, ignoring it")
+                return False
+            self._entries.clear()
+            self._keys.clear()
+            self._buckets = [{} for _ in range(self.bands)]
+            self._next_cluster = int(snapshot["counters"][0])
+            clusters = snapshot["clusters"]
+            # Snapshots from before review keys were stored have none
+            reviews = snapshot["reviews"].tolist() if "reviews" in snapshot.files else [""] * len(clusters)
+            for signature, cluster, inserted_at, review in zip(snapshot["signatures"], clusters, snapshot["inserted_at"], reviews):
+                self._insert(signature.copy(), int(cluster), float(inserted_at), review)
+        self.evict()
+        return True
+
+    async def start(self):
+        """Restore the last snapshot and snapshot periodically (if a snapshot path is set)"""
+        if not self.snapshot_path:
+            return
+        if os.path.exists(self.snapshot_path):
+            try:
+                if self.restore():
+                    logger.info(f"Restored {len(self._entries)} near-duplicate index entries from {self.snapshot_path}")
+            except Exception as e:
+                logger.warning(f"Could not restore near-duplicate snapshot {self.snapshot_path}: {e}")
+        self._task = asyncio.create_task(self._snapshot_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.snapshot_path:
+            self._save_snapshot()
+
+    def _save_snapshot(self):
+        try:
+            self.snapshot()
+        except Exception as e:
+            logger.warning(f"Near-duplicate snapshot to {self.snapshot_path} failed: {e}")
+
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(self.snapshot_seconds)
+            self.evict()
+            self._save_snapshot()
+
+    def stats(self) -> Dict:
+        return dict(
+            super().stats(),
+            backend="memory",
+            entries=len(self._entries),
+            clusters=len({cluster for _, cluster, _, _ in self._entries.values()}),
+        )
+
+
+class RedisNearDuplicateIndex(MinHasher):
+    """Near-duplicate index kept in Redis, shared by every process that points at it
+
+    Band buckets are sorted sets of "entry id:cluster id" members scored by insert
+    time, so expired and surplus members are trimmed by score and rank; each entry
+    holds its cluster id and signature and expires on its own. A sorted set of all
+    entry ids caps the index at max_entries. Since bucket members name their
+    cluster, only the signature of the candidate sharing the most bands is fetched
+    per cluster, and the comparison runs locally. Keyed reviews are stored under
+    their key, so a resubmission finds its own entry. The index lives as long as Redis
+    does, so there is nothing to snapshot. If Redis is unavailable, reviews are not
+    flagged (fail open).
+    """
+
+    def __init__(
+        self,
+        redis_url: str = NEAR_DUP_REDIS_URL,
+        threshold: float = NEAR_DUP_THRESHOLD,
+        num_perm: int = NEAR_DUP_NUM_PERM,
+        bands: int = NEAR_DUP_BANDS,
+        shingle_size: int = NEAR_DUP_SHINGLE_SIZE,
+        min_shingles: int = NEAR_DUP_MIN_SHINGLES,
+        max_entries: int = NEAR_DUP_MAX_ENTRIES,
+        max_age_seconds: float = NEAR_DUP_MAX_AGE_SECONDS,
+        max_bucket_members: int = NEAR_DUP_MAX_BUCKET_MEMBERS,
+        key_prefix: str = "near_dup",
+    ):
+        super().__init__(
+            threshold, num_perm, bands, shingle_size, min_shingles, max_entries, max_age_seconds, max_bucket_members
+        )
+        self.redis_url = redis_url
+        # Signature settings are part of the keys: signatures made with others never meet
+        self.key_prefix = f"{key_prefix}:{num_perm}:{bands}:{shingle_size}:{HASH_SEED}"
+        self.redis_client = None
+        self.entries = 0
+        self.backend_errors = 0
+
+    async def start(self):
+        if redis is None:
+            logger.warning("redis package not installed, near-duplicate check is disabled")
+            return
+        try:
+            self.redis_client = redis.from_url(self.redis_url)
+            await self.redis_client.ping()
+            logger.info("Near-duplicate index using shared Redis")
+        except Exception as e:
+            logger.warning(f"Near-duplicate index Redis unavailable: {e}")
+            self.redis_client = None
+
+    async def stop(self):
+        if self.redis_client is not None:
+            await self.redis_client.close()
+            self.redis_client = None
+
+    def _key(self, *parts) -> str:
+        return ":".join((self.key_prefix,) + tuple(str(part) for part in parts))
+
+    def _bucket_keys(self, signature: np.ndarray) -> List[str]:
+        """One key per band, named by its rows of the signature (stable across processes)"""
+        rows = signature.astype("<u4").reshape(self.bands, self.rows)
+        return [self._key("band", band, row.tobytes().hex()) for band, row in enumerate(rows)]
+
+    async def add(self, text: str, now: Optional[float] = None, review: str = "") -> List[str]:
+        """Index a review; returns the IDs of the clusters of the earlier reviews it duplicates
+
+        review is the review's stable key (see review_key); a review already indexed
+        under it is only queried, against every entry but its own.
+        """
+        now = time.time() if now is None else now
+        signature = self.signature(text)
+        if signature is None:
+            self.skipped_short += 1
+            return []
+        if self.redis_client is None:
+            return []
+        try:
+            return await self._add(signature, now, review)
+        except Exception as e:
+            self.backend_errors += 1
+            logger.warning(f"Near-duplicate index Redis unavailable: {e}")
+            return []
+
+    async def _add(self, signature: np.ndarray, now: float, review: str) -> List[str]:
+        self.queries += 1
+        cutoff = now - self.max_age_seconds
+        entry_id = review or secrets.token_hex(8)
+        entry_key = self._key("entry", entry_id)
+        bucket_keys = self._bucket_keys(signature)
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for key in bucket_keys:
+                pipe.zrangebyscore(key, cutoff, "+inf")
+            pipe.exists(entry_key)
+            *buckets, indexed = await pipe.execute()
+
+        # Per cluster, the candidate sharing the most bands with this review
+        shared: Dict[str, int] = {}
+        for bucket in buckets:
+            for member in bucket:
+                shared[member] = shared.get(member, 0) + 1
+        best: Dict[int, Tuple[int, str]] = {}
+        for member, count in shared.items():
+            candidate, cluster = member.decode().rsplit(":", 1)
+            cluster = int(cluster)
+            if candidate != entry_id and count > best.get(cluster, (0, ""))[0]:
+                best[cluster] = (count, candidate)
+
+        # (similarity, cluster id) of the clusters matched
+        matches = []
+        if best:
+            values = await self.redis_client.mget([self._key("entry", candidate) for _, candidate in best.values()])
+            for cluster, value in zip(best, values):
+                if value is None:
+                    # Evicted over capacity; its bucket memberships expire later
+                    continue
+                similarity = self.similarity(np.frombuffer(value[8:], dtype="<u4"), signature)
+                if similarity >= self.threshold:
+                    matches.append((similarity, cluster))
+        clusters = sorted(cluster for _, cluster in matches)
+        if matches:
+            self.matches += 1
+        if indexed:
+            self.resubmitted += 1
+            return [f"cluster_{c}" for c in clusters]
+        if matches:
+            cluster = max(matches)[1]
+        else:
+            cluster = await self.redis_client.incr(self._key("cluster_seq"))
+
+        entries_key = self._key("entries")
+        ttl = max(1, math.ceil(self.max_age_seconds))
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.set(entry_key, cluster.to_bytes(8, "little") + signature.astype("<u4").tobytes(), ex=ttl)
+            for key in bucket_keys:
+                pipe.zadd(key, {f"{entry_id}:{cluster}": now})
+                pipe.zremrangebyscore(key, "-inf", f"({cutoff}")
+                pipe.zremrangebyrank(key, 0, -self.max_bucket_members - 1)
+                pipe.expire(key, ttl)
+            pipe.zadd(entries_key, {entry_id: now})
+            pipe.zremrangebyscore(entries_key, "-inf", f"({cutoff}")
+            pipe.zcard(entries_key)
+            replies = await pipe.execute()
+        expired, self.entries = replies[-2], replies[-1]
+        self.evicted += expired
+
+        if self.entries > self.max_entries:
+            oldest = await self.redis_client.zpopmin(entries_key, self.entries - self.max_entries)
+            if oldest:
+                await self.redis_client.delete(*(self._key("entry", entry_id.decode()) for entry_id, _ in oldest))
+            self.evicted += len(oldest)
+            self.entries -= len(oldest)
+        return [f"cluster_{c}" for c in clusters]
+
+    async def annotate(self, request: BaseModel, result: Dict) -> Dict:
+        """Index a review request; flag the result if it is a near-duplicate
+
+        The input result is not modified (it may be shared with the result cache).
+        """
+        return self._flag(result, await self.add(request.review_text, review=review_key(request)))
+
+    def stats(self) -> Dict:
+        return dict(
+            super().stats(),
+            backend="redis",
+            redis=self.redis_client is not None,
+            # As of this process's last insert
+            entries=self.entries,
+            backend_errors=self.backend_errors,
+        )
+
+
+def load_near_duplicate_index(
+    redis_url: str = NEAR_DUP_REDIS_URL, processes: int = 1
+) -> Optional[Union[NearDuplicateIndex, RedisNearDuplicateIndex]]:
+    """The configured near-duplicate index, or None when the check is disabled
+
+    With a Redis URL, one index is shared by every process and replica using it.
+    Otherwise each of the server's `processes` keeps its own index, and snapshots
+    are only kept for a single process: several would overwrite each other's.
+    """
+    if not NEAR_DUP_ENABLED:
+        return None
+    if redis_url:
+        return RedisNearDuplicateIndex(redis_url)
+    if processes <= 1:
+        return NearDuplicateIndex()
+    logger.warning(
+        f"NEAR_DUP_REDIS_URL is not set: each of the {processes} server processes keeps its own "
+        f"near-duplicate index, and none is snapshotted"
+    )
+    return NearDuplicateIndex(snapshot_path="")
@@ -0,0 +1,283 @@
+import os
+import json
+import time
+import string
+import hashlib
+import logging
+import operator
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rule table configuration
+FRAUD_RULES_PATH = os.getenv(
+    "FRAUD_RULES_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "rule_tables.json")
+)
+FRAUD_RULES_RELOAD_SECONDS = float(os.getenv("FRAUD_RULES_RELOAD_SECONDS", "2"))
+
+# Comparator → (array version, scalar version)
+COMPARATORS: Dict[str, Tuple[Callable[[Any, Any], Any], Callable[[Any, Any], bool]]] = {
+    "<": (operator.lt, operator.lt),
+    "<=": (operator.le, operator.le),
+    ">": (operator.gt, operator.gt),
+    ">=": (operator.ge, operator.ge),
+    "==": (operator.eq, operator.eq),
+    "!=": (operator.ne, operator.ne),
+    "in": (lambda column, values: np.isin(column, values), lambda value, values: value in values),
+    "not_in": (lambda column, values: ~np.isin(column, values), lambda value, values: value not in values),
+}
+
+Condition = Tuple[str, Callable[[Any, Any], Any], Callable[[Any, Any], bool], Any]
+
+
+class CompiledTier:
+    """One branch of a rule: all conditions must hold; penalty, floor, indicator and overrides apply on a hit"""
+
+    __slots__ = ("conditions", "penalty", "floor", "indicator", "indicator_fields", "overrides")
+
+    def __init__(self, spec: Dict, fields: Iterable[str]):
+        fields = set(fields)
+        self.conditions: List[Condition] = []
+        for condition in spec.get("when", []):
+            if not (isinstance(condition, list) and len(condition) == 3):
+                raise ValueError(f"Condition {condition!r} must be [field, comparator, threshold]")
+            field, comparator, threshold = condition
+            if field not in fields:
+                raise ValueError(f"Unknown field '{field}'")
+            if comparator not in COMPARATORS:
+                raise ValueError(f"Unknown comparator '{comparator}'")
+            if comparator in ("in", "not_in") and not isinstance(threshold, list):
+                raise ValueError(f"Comparator '{comparator}' needs a list threshold")
+            self.conditions.append((field, *COMPARATORS[comparator], threshold))
+        if not self.conditions:
+            raise ValueError("Tier needs at least one condition")
+
+        self.penalty = spec.get("penalty", 0)
+        self.floor = spec.get("floor")
+        if not isinstance(self.penalty, int) or not (self.floor is None or isinstance(self.floor, int)):
+            raise ValueError("Penalties and floors must be integers")
+
+        self.indicator: Optional[str] = spec.get("indicator")
+        self.indicator_fields: List[str] = []
+        if self.indicator:
+            self.indicator_fields = [name for _, name, _, _ in string.Formatter().parse(self.indicator) if name]
+            unknown = set(self.indicator_fields) - fields
+            if unknown:
+                raise ValueError(f"Indicator '{self.indicator}' references unknown fields {sorted(unknown)}")
+        self.overrides: Dict[str, Any] = spec.get("set", {})
+
+    def mask(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        field, compare, _, threshold = self.conditions[0]
+        mask = compare(columns[field], threshold)
+        for field, compare, _, threshold in self.conditions[1:]:
+            mask = mask & compare(columns[field], threshold)
+        return mask
+
+    def matches(self, row: Dict[str, Any]) -> bool:
+        return all(compare(row[field], threshold) for field, _, compare, threshold in self.conditions)
+
+    def indicator_for(self, values: Dict[str, Any]) -> str:
+        if not self.indicator_fields:
+            return self.indicator
+        return self.indicator.format(**{field: values[field] for field in self.indicator_fields})
+
+
+class CompiledTable:
+    """Rule table for one analyzer, evaluated as array operations over a whole batch
+
+    Each rule is an ordered list of tiers behaving like an if/elif chain: an item is
+    penalized by the first tier whose conditions hold. Outputs map the final score to
+    labels through ordered bands (first matching band wins). evaluate_row walks the
+    same compiled tiers for a single item, where array setup would cost more than
+    the comparisons.
+    """
+
+    def __init__(self, name: str, spec: Dict, fields: Iterable[str], fingerprint: str = ""):
+        fields = list(fields)
+        self.name = name
+        # Fingerprint of the rule tables file this table was compiled from
+        self.fingerprint = fingerprint
+        self.base_score = spec.get("base_score", 100)
+        self.score_field = spec.get("score_field")
+        if self.score_field is not None and self.score_field not in fields:
+            raise ValueError(f"{name}: unknown score field '{self.score_field}'")
+        self.clamp = spec.get("clamp")
+        try:
+            self.rules = [[CompiledTier(tier, fields) for tier in rule["tiers"]] for rule in spec.get("rules", [])]
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"{name}: invalid rule ({e})") from e
+        self.override_fields = sorted({field for rule in self.rules for tier in rule for field in tier.overrides})
+        # Columns the tables read; callers only need to build these
+        self.fields = {field for rule in self.rules for tier in rule for field, _, _, _ in tier.conditions}
+        self.fields.update(field for rule in self.rules for tier in rule for field in tier.indicator_fields)
+        self.fields.update(field for field in self.override_fields if field in fields)
+        if self.score_field is not None:
+            self.fields.add(self.score_field)
+        self.outputs: Dict[str, Tuple[List[Tuple[Callable, Any]], List[Any]]] = {}
+        for output, band_spec in spec.get("outputs", {}).items():
+            bands = []
+            for comparator, threshold, value in band_spec["bands"]:
+                if comparator not in COMPARATORS or comparator in ("in", "not_in"):
+                    raise ValueError(f"{name}: invalid band comparator '{comparator}' for {output}")
+                bands.append((COMPARATORS[comparator][0], threshold))
+            if not bands:
+                raise ValueError(f"{name}: output {output} needs at least one band")
+            values = [value for _, _, value in band_spec["bands"]] + [band_spec["default"]]
+            self.outputs[output] = (bands, values)
+
+    def evaluate(self, columns: Dict[str, np.ndarray], n: int):
+        """Scores, indicator lists, per-field overrides and band outputs for n items"""
+        if self.score_field is not None:
+            scores = columns[self.score_field].astype(np.int64, copy=True)
+        else:
+            scores = np.full(n, self.base_score, dtype=np.int64)
+        indicators: List[List[str]] = [[] for _ in range(n)]
+        overrides = {
+            field: list(columns[field]) if field in columns else [None] * n
+            for field in self.override_fields
+        }
+
+        for tiers in self.rules:
+            remaining = np.ones(n, dtype=bool)
+            for tier in tiers:
+                mask = tier.mask(columns)
+                hit = mask & remaining
+                if tier.floor is not None:
+                    scores = np.where(hit, np.maximum(tier.floor, scores - tier.penalty), scores)
+                elif tier.penalty:
+                    scores -= tier.penalty * hit
+                if tier.indicator or tier.overrides:
+                    hits = np.flatnonzero(hit).tolist()
+                    if tier.indicator_fields:
+                        for i in hits:
+                            indicators[i].append(tier.indicator_for({field: columns[field][i] for field in tier.indicator_fields}))
+                    elif tier.indicator:
+                        for i in hits:
+                            indicators[i].append(tier.indicator)
+                    for field, value in tier.overrides.items():
+                        for i in hits:
+                            overrides[field][i] = value
+                remaining &= ~mask
+
+        scores = self.clip(scores)
+        return scores, indicators, overrides, self.label(scores)
+
+    def clip(self, scores: np.ndarray) -> np.ndarray:
+        if self.clamp is None:
+            return scores
+        return np.clip(scores, self.clamp[0], self.clamp[1])
+
+    def label(self, scores: np.ndarray) -> Dict[str, List[Any]]:
+        """Band outputs for final scores (e.g. after blending in another model)"""
+        outputs = {}
+        for output, (bands, values) in self.outputs.items():
+            choice = np.select([compare(scores, threshold) for compare, threshold in bands], np.arange(len(bands)), default=len(bands))
+            outputs[output] = [values[j] for j in choice]
+        return outputs
+
+    def evaluate_row(self, row: Dict[str, Any]):
+        """Score, indicators, overrides and band outputs for a single item"""
+        score = int(row[self.score_field]) if self.score_field is not None else self.base_score
+        indicators: List[str] = []
+        overrides = {field: row.get(field) for field in self.override_fields}
+
+        for tiers in self.rules:
+            for tier in tiers:
+                if tier.matches(row):
+                    if tier.floor is not None:
+                        score = max(tier.floor, score - tier.penalty)
+                    else:
+                        score -= tier.penalty
+                    if tier.indicator:
+                        indicators.append(tier.indicator_for(row))
+                    overrides.update(tier.overrides)
+                    break
+
+        if self.clamp is not None:
+            score = max(self.clamp[0], min(self.clamp[1], score))
+        return score, indicators, overrides, self.label_row(score)
+
+    def label_row(self, score: int) -> Dict[str, Any]:
+        outputs = {}
+        for output, (bands, values) in self.outputs.items():
+            outputs[output] = next(
+                (value for (compare, threshold), value in zip(bands, values) if compare(score, threshold)),
+                values[-1]
+            )
+        return outputs
+
+
+class RuleEngine:
+    """Loads the rule tables file, compiles it and hot-reloads it when it changes
+
+    A reload compiles the whole file before swapping it in, so scoring sees either
+    the old tables or the new ones, never a mix; a file that fails to compile is
+    logged and the current tables stay active. The file is checked at most every
+    reload_seconds, on use, which also works inside forked scoring workers.
+    """
+
+    def __init__(
+        self,
+        fields: Dict[str, Iterable[str]],
+        path: str = FRAUD_RULES_PATH,
+        reload_seconds: float = FRAUD_RULES_RELOAD_SECONDS,
+    ):
+        self.fields = {name: list(names) for name, names in fields.items()}
+        self.path = path
+        self.reload_seconds = reload_seconds
+        self._mtime = os.stat(path).st_mtime_ns
+        self._checked_at = time.monotonic()
+        self._tables, self.fingerprint = self._compile(path)
+
+        # Metrics
+        self.reloads = 0
+        self.failed_reloads = 0
+
+    def _compile(self, path: str) -> Tuple[Dict[str, CompiledTable], str]:
+        with open(path, "rb") as f:
+            raw = f.read()
+        spec = json.loads(raw)
+        missing = set(self.fields) - set(spec)
+        if missing:
+            raise ValueError(f"Rule tables {path} missing analyzers {sorted(missing)}")
+        fingerprint = hashlib.sha256(raw).hexdigest()[:12]
+        tables = {name: CompiledTable(name, spec[name], self.fields[name], fingerprint) for name in self.fields}
+        return tables, fingerprint
+
+    def maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_seconds:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            logger.warning(f"Rule tables {self.path} unavailable, keeping current rules: {e}")
+            return
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        try:
+            tables, fingerprint = self._compile(self.path)
+        except Exception as e:
+            self.failed_reloads += 1
+            logger.error(f"Rule tables {self.path} failed to compile, keeping current rules: {e}")
+            return
+        self._tables, self.fingerprint = tables, fingerprint
+        self.reloads += 1
+        logger.info(f"Reloaded rule tables {self.path} ({fingerprint})")
+
+    def table(self, name: str) -> CompiledTable:
+        self.maybe_reload()
+        return self._tables[name]
+
+    def stats(self) -> Dict:
+        return {
+            "path": self.path,
+            "fingerprint": self.fingerprint,
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+        }
@@ -0,0 +1,305 @@
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from .lexicon import PhraseMatcher, load_lexicon
+from .models import (
+    ReviewAnalysisRequest, ViewPatternAnalysisRequest, PurchaseAnalysisRequest, SellerAnalysisRequest
+)
+from .rule_engine import CompiledTable, RuleEngine
+from .text_model import load_text_model, review_document
+
+MODEL_VERSION = "fraud_detector_v1.0"
+
+# Review text analysis: one automaton for every lexicon phrase, precompiled patterns
+review_lexicon = PhraseMatcher(load_lexicon())
+PUNCTUATION_RE = re.compile(r'[.!?]')
+SENTENCE_SPLIT_RE = re.compile(r'[.!?]+')
+
+# Optional learned text model blended into the review authenticity score
+review_text_model = load_text_model()
+TEXT_MODEL_INDICATOR = "Review text resembles known fake reviews"
+
+# Columns each analyzer's rule table may reference: request fields plus derived features
+ANALYZER_FIELDS = {
+    "review": list(ReviewAnalysisRequest.model_fields) + [
+        "review_length", "typed", "chars_per_second",
+        "superlative_count", "generic_count", "has_punctuation", "run_on",
+    ],
+    "view_pattern": list(ViewPatternAnalysisRequest.model_fields),
+    "purchase": list(PurchaseAnalysisRequest.model_fields),
+    "seller": list(SellerAnalysisRequest.model_fields),
+}
+
+# Thresholds, penalties and indicators come from the rule tables file (hot-reloaded)
+rule_engine = RuleEngine(ANALYZER_FIELDS)
+
+def _results_version(analyzer: str, rules_fingerprint: str) -> str:
+    version = f"{MODEL_VERSION}+{rules_fingerprint}"
+    if analyzer == "review":
+        version += f"+{review_lexicon.fingerprint}"
+        if review_text_model is not None:
+            version += f"+{review_text_model.fingerprint}x{review_text_model.weight:g}"
+    return version
+
+def results_version(analyzer: str) -> str:
+    """Version of an analyzer's results: model, rule tables and (for reviews) lexicon"""
+    rule_engine.maybe_reload()
+    return _results_version(analyzer, rule_engine.fingerprint)
+
+def score_versioned(analyzer: str, score: Callable[..., Any], item: Any) -> Tuple[Any, str]:
+    """Run a score_* function and return its result with the version it was scored with
+
+    Forked scoring workers reload the rule tables on their own timers, so the version
+    the serving process sees can differ from the tables a worker used. Pinning the
+    table here ties the result to the rules that produced it.
+    """
+    table = rule_engine.table(analyzer)
+    return score(item, table=table), _results_version(analyzer, table.fingerprint)
+
+def _lexicon_counts(request: ReviewAnalysisRequest) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Distinct lexicon matches per category in the review text, and in text plus headline"""
+    content_found = review_lexicon.scan(request.review_text)
+    headline_found = review_lexicon.scan(request.headline)
+    return review_lexicon.counts(content_found), review_lexicon.counts(content_found | headline_found)
+
+NUMERIC_DTYPES = {int: np.int64, float: np.float64, bool: bool}
+
+def _columns(items: Sequence[BaseModel], fields: Iterable[str]) -> Dict[str, np.ndarray]:
+    """One array per requested model field (object arrays for strings)"""
+    model_fields = type(items[0]).model_fields
+    columns = {}
+    for field in fields:
+        if field not in model_fields:
+            continue
+        dtype = NUMERIC_DTYPES.get(model_fields[field].annotation, object)
+        if dtype is object:
+            columns[field] = np.array([getattr(item, field) for item in items], dtype=object)
+        else:
+            columns[field] = np.fromiter((getattr(item, field) for item in items), dtype=dtype, count=len(items))
+    return columns
+
+def _row(item: BaseModel, fields: Iterable[str]) -> Dict[str, Any]:
+    return {field: getattr(item, field) for field in fields if field in type(item).model_fields}
+
+def _review_text_features(request: ReviewAnalysisRequest) -> Tuple[int, int, bool, bool]:
+    """Superlatives (content or headline), generic phrases (content), punctuation and run-on sentences"""
+    content_counts, combined_counts = _lexicon_counts(request)
+    return (
+        combined_counts.get("superlatives", 0),
+        content_counts.get("generic_phrases", 0),
+        PUNCTUATION_RE.search(request.review_text) is not None,
+        any(len(s.strip()) > 150 for s in SENTENCE_SPLIT_RE.split(request.review_text)),
+    )
+
+def _blend_text_model(table, requests: Sequence[ReviewAnalysisRequest], scores: np.ndarray, indicators: List[List[str]]):
+    """Blend the text model into rule scores (flagging likely fakes); returns the final scores"""
+    fake_probability = review_text_model.fake_probability(
+        [review_document(r.headline, r.review_text) for r in requests]
+    )
+    for i in np.flatnonzero(fake_probability >= 0.5).tolist():
+        indicators[i].append(TEXT_MODEL_INDICATOR)
+    return table.clip(review_text_model.blend(scores, fake_probability))
+
+# Scoring
+#
+# Every analyzer builds the columns its rule table reads (request fields plus
+# derived features) and evaluates the compiled table over the whole batch at once.
+# The single-item functions evaluate the same compiled table on one row.
+
+def score_review_batch(requests: List[ReviewAnalysisRequest], table: Optional[CompiledTable] = None):
+    """
+    Analyze a batch of reviews for authenticity
+    Returns one result per review, in request order
+    """
+    n = len(requests)
+    if n == 0:
+        return []
+
+    table = table or rule_engine.table("review")
+    columns = _columns(requests, table.fields | {"review_length_chars", "typing_duration_seconds"})
+    text_length = np.fromiter((len(r.review_text) for r in requests), dtype=np.int64, count=n)
+    # Calculate review length if not provided
+    review_length = np.where(columns["review_length_chars"] != 0, columns["review_length_chars"], text_length)
+    typed = columns["typing_duration_seconds"] > 0
+    columns.update(
+        review_length=review_length,
+        typed=typed,
+        chars_per_second=np.divide(
+            review_length, columns["typing_duration_seconds"],
+            out=np.zeros(n, dtype=np.float64), where=typed
+        ),
+    )
+
+    # Text features are extracted per item
+    superlative_counts = np.zeros(n, dtype=np.int64)
+    generic_counts = np.zeros(n, dtype=np.int64)
+    has_punctuation = np.zeros(n, dtype=bool)
+    run_on = np.zeros(n, dtype=bool)
+    for i, r in enumerate(requests):
+        superlative_counts[i], generic_counts[i], has_punctuation[i], run_on[i] = _review_text_features(r)
+    columns.update(
+        superlative_count=superlative_counts,
+        generic_count=generic_counts,
+        has_punctuation=has_punctuation,
+        run_on=run_on,
+    )
+
+    scores, indicators, _, outputs = table.evaluate(columns, n)
+    if review_text_model is not None:
+        scores = _blend_text_model(table, requests, scores, indicators)
+        outputs = table.label(scores)
+
+    results = []
+    for i in range(n):
+        authenticity_score = int(scores[i])
+        results.append({
+            "authenticity_score": authenticity_score,
+            "is_fake": outputs["is_fake"][i],
+            # Higher confidence for extreme scores
+            "confidence_level": round(abs(authenticity_score - 50) / 50, 2),
+            "fake_indicators": indicators[i],
+            "suggested_action": outputs["suggested_action"][i],
+            "model_version": MODEL_VERSION
+        })
+    return results
+
+def score_review(request: ReviewAnalysisRequest, table: Optional[CompiledTable] = None):
+    """
+    Analyze review for authenticity using ML model
+    Returns authenticity score and fake indicators
+    """
+    table = table or rule_engine.table("review")
+    row = _row(request, table.fields)
+    review_length = request.review_length_chars or len(request.review_text)
+    typed = request.typing_duration_seconds > 0
+    row.update(
+        review_length=review_length,
+        typed=typed,
+        chars_per_second=review_length / request.typing_duration_seconds if typed else 0.0,
+    )
+    row["superlative_count"], row["generic_count"], row["has_punctuation"], row["run_on"] = _review_text_features(request)
+    
+    authenticity_score, fake_indicators, _, outputs = table.evaluate_row(row)
+    if review_text_model is not None:
+        scores = _blend_text_model(table, [request], np.array([authenticity_score]), [fake_indicators])
+        authenticity_score = int(scores[0])
+        outputs = table.label_row(authenticity_score)
+    return {
+        "authenticity_score": authenticity_score,
+        "is_fake": outputs["is_fake"],
+        "confidence_level": round(abs(authenticity_score - 50) / 50, 2),
+        "fake_indicators": fake_indicators,
+        "suggested_action": outputs["suggested_action"],
+        "model_version": MODEL_VERSION
+    }
+
+def score_view_pattern_batch(requests: List[ViewPatternAnalysisRequest], table: Optional[CompiledTable] = None):
+    """
+    Analyze a batch of Flink view-pattern aggregates
+    """
+    n = len(requests)
+    if n == 0:
+        return []
+
+    table = table or rule_engine.table("view_pattern")
+    scores, anomaly_flags, overrides, outputs = table.evaluate(_columns(requests, table.fields), n)
+
+    return [
+        {
+            "view_quality_score": int(scores[i]),
+            "bot_probability": r.bot_probability,
+            "traffic_pattern": overrides["traffic_pattern"][i],
+            "anomaly_flags": anomaly_flags[i],
+            "recommendation": outputs["recommendation"][i]
+        }
+        for i, r in enumerate(requests)
+    ]
+
+def score_view_pattern(request: ViewPatternAnalysisRequest, table: Optional[CompiledTable] = None):
+    """
+    Analyze view patterns from Flink processing
+    """
+    table = table or rule_engine.table("view_pattern")
+    view_quality_score, anomaly_flags, overrides, outputs = table.evaluate_row(_row(request, table.fields))
+    return {
+        "view_quality_score": view_quality_score,
+        "bot_probability": request.bot_probability,
+        "traffic_pattern": overrides["traffic_pattern"],
+        "anomaly_flags": anomaly_flags,
+        "recommendation": outputs["recommendation"]
+    }
+
+def score_purchase_batch(requests: List[PurchaseAnalysisRequest], table: Optional[CompiledTable] = None):
+    """
+    Analyze a batch of purchases for fraud detection
+    """
+    n = len(requests)
+    if n == 0:
+        return []
+
+    table = table or rule_engine.table("purchase")
+    scores, risk_factors, _, outputs = table.evaluate(_columns(requests, table.fields), n)
+
+    return [
+        {
+            "legitimacy_score": int(scores[i]),
+            "fraud_risk_level": outputs["fraud_risk_level"][i],
+            "risk_factors": risk_factors[i],
+            "requires_manual_review": outputs["requires_manual_review"][i],
+            "confidence": 0.85
+        }
+        for i in range(n)
+    ]
+
+def score_purchase(request: PurchaseAnalysisRequest, table: Optional[CompiledTable] = None):
+    """
+    Analyze purchase patterns for fraud detection
+    """
+    table = table or rule_engine.table("purchase")
+    legitimacy_score, risk_factors, _, outputs = table.evaluate_row(_row(request, table.fields))
+    return {
+        "legitimacy_score": legitimacy_score,
+        "fraud_risk_level": outputs["fraud_risk_level"],
+        "risk_factors": risk_factors,
+        "requires_manual_review": outputs["requires_manual_review"],
+        "confidence": 0.85
+    }
+
+def score_seller_batch(requests: List[SellerAnalysisRequest], table: Optional[CompiledTable] = None):
+    """
+    Analyze a batch of seller behavior patterns
+    """
+    n = len(requests)
+    if n == 0:
+        return []
+
+    table = table or rule_engine.table("seller")
+    scores, behavior_patterns, _, outputs = table.evaluate(_columns(requests, table.fields), n)
+
+    return [
+        {
+            "reputation_score": int(scores[i]),
+            "activity_classification": outputs["activity_classification"][i],
+            "behavior_patterns": behavior_patterns[i],
+            "trust_trend": outputs["trust_trend"][i],
+            "confidence": 0.82
+        }
+        for i in range(n)
+    ]
+
+def score_seller(request: SellerAnalysisRequest, table: Optional[CompiledTable] = None):
+    """
+    Analyze seller behavior patterns
+    """
+    table = table or rule_engine.table("seller")
+    reputation_score, behavior_patterns, _, outputs = table.evaluate_row(_row(request, table.fields))
+    return {
+        "reputation_score": reputation_score,
+        "activity_classification": outputs["activity_classification"],
+        "behavior_patterns": behavior_patterns,
+        "trust_trend": outputs["trust_trend"],
+        "confidence": 0.82
+    }
@@ -0,0 +1,155 @@
+import os
+import json
+import math
+import hashlib
+import logging
+from collections import Counter
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+try:
+    from scipy.sparse import csr_matrix
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from sklearn.utils import murmurhash3_32
+except ImportError:  # The learned text model is optional
+    HashingVectorizer = None
+
+logger = logging.getLogger(__name__)
+
+# Review text model configuration (disabled unless a weights file is given)
+REVIEW_TEXT_MODEL_PATH = os.getenv("REVIEW_TEXT_MODEL_PATH", "")
+REVIEW_TEXT_MODEL_WEIGHT = float(os.getenv("REVIEW_TEXT_MODEL_WEIGHT", "0.3"))
+
+# Hashing vectorizer settings, stored with the weights so scoring hashes like training
+DEFAULT_VECTORIZER_PARAMS = {
+    "n_features": 2 ** 18,
+    "ngram_range": [1, 2],
+    "alternate_sign": False,
+    "norm": "l2",
+}
+
+
+def review_document(headline: str, review_text: str) -> str:
+    """Text the model sees for one review"""
+    return f"{headline}\n{review_text}"
+
+
+def make_vectorizer(params: Dict):
+    if HashingVectorizer is None:
+        raise RuntimeError("scikit-learn is required for the review text model")
+    return HashingVectorizer(
+        n_features=params["n_features"],
+        ngram_range=tuple(params["ngram_range"]),
+        alternate_sign=params["alternate_sign"],
+        norm=params["norm"],
+        lowercase=True,
+    )
+
+
+def model_paths(path: str):
+    """Weights (.npy) and metadata (.json) file paths for a model path with or without suffix"""
+    stem, ext = os.path.splitext(path)
+    if ext not in (".npy", ".json"):
+        stem = path
+    return f"{stem}.npy", f"{stem}.json"
+
+
+def save_text_model(path: str, params: Dict, coef: np.ndarray, intercept: float, examples: int) -> str:
+    """Write the weights as a flat float32 array plus a JSON sidecar; returns the fingerprint"""
+    weights_path, meta_path = model_paths(path)
+    weights = np.ascontiguousarray(coef, dtype=np.float32).ravel()
+    if weights.shape[0] != params["n_features"]:
+        raise ValueError(f"Expected {params['n_features']} weights, got {weights.shape[0]}")
+    os.makedirs(os.path.dirname(os.path.abspath(weights_path)), exist_ok=True)
+    np.save(weights_path, weights)
+    fingerprint = hashlib.sha256(weights.tobytes() + repr(float(intercept)).encode()).hexdigest()[:12]
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "vectorizer": params,
+            "intercept": float(intercept),
+            "examples": examples,
+            "fingerprint": fingerprint,
+        }, f, indent=2)
+    return fingerprint
+
+
+class TextModel:
+    """Hashed bag-of-ngrams logistic model over review headline and text
+
+    The weights file is memory-mapped read-only, so it is loaded once and its pages
+    are shared by forked workers. A batch is scored with one sparse matrix-vector
+    product. Features are hashed here with the training vectorizer's analyzer and
+    hash function (HashingVectorizer.transform has per-call overhead that dominates
+    for single reviews), which yields the same matrix as training.
+    """
+
+    def __init__(self, path: str, weight: float = REVIEW_TEXT_MODEL_WEIGHT):
+        weights_path, meta_path = model_paths(path)
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        self.params = meta["vectorizer"]
+        if self.params["norm"] not in ("l2", None):
+            raise ValueError(f"Unsupported vectorizer norm {self.params['norm']!r}")
+        self.n_features = self.params["n_features"]
+        self.alternate_sign = self.params["alternate_sign"]
+        self.l2_normalize = self.params["norm"] == "l2"
+        self.analyzer = make_vectorizer(self.params).build_analyzer()
+        self.weights = np.load(weights_path, mmap_mode="r")
+        if self.weights.shape != (self.params["n_features"],):
+            raise ValueError(f"Weights {weights_path} do not match n_features={self.params['n_features']}")
+        self.intercept = float(meta["intercept"])
+        self.fingerprint = meta["fingerprint"]
+        self.weight = min(1.0, max(0.0, weight))
+        self.path = weights_path
+
+        # Metrics
+        self.documents = 0
+
+    def features(self, documents: Sequence[str]):
+        """Hashed, normalized n-gram counts as a CSR matrix (one row per document)"""
+        indptr, indices, data = [0], [], []
+        for document in documents:
+            counts: Counter = Counter()
+            for token in self.analyzer(document):
+                h = murmurhash3_32(token, seed=0)
+                counts[abs(h) % self.n_features] += -1 if self.alternate_sign and h < 0 else 1
+            norm = math.sqrt(sum(c * c for c in counts.values())) if self.l2_normalize else 0.0
+            indices.extend(counts)
+            data.extend(c / norm if norm else c for c in counts.values())
+            indptr.append(len(indices))
+        # float32 like the weights: a float64 matrix would upcast the whole weight vector per call
+        return csr_matrix((data, indices, indptr), shape=(len(documents), self.n_features), dtype=np.float32)
+
+    def fake_probability(self, documents: Sequence[str]) -> np.ndarray:
+        """Probability that each document is a fake review"""
+        logits = self.features(documents) @ self.weights + self.intercept
+        self.documents += len(documents)
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def blend(self, rule_scores: np.ndarray, fake_probability: np.ndarray) -> np.ndarray:
+        """Weighted mix of rule scores and the model's authenticity (0-100)"""
+        text_scores = 100 * (1 - fake_probability)
+        return np.rint((1 - self.weight) * rule_scores + self.weight * text_scores).astype(np.int64)
+
+    def stats(self) -> Dict:
+        return {
+            "path": self.path,
+            "fingerprint": self.fingerprint,
+            "weight": self.weight,
+            "n_features": self.n_features,
+            "documents": self.documents,
+        }
+
+
+def load_text_model(path: str = REVIEW_TEXT_MODEL_PATH, weight: float = REVIEW_TEXT_MODEL_WEIGHT) -> Optional[TextModel]:
+    """The configured text model, or None when disabled or unusable (rules only)"""
+    if not path:
+        return None
+    try:
+        model = TextModel(path, weight)
+    except Exception as e:
+        logger.warning(f"Review text model {path} not loaded, scoring with rules only: {e}")
+        return None
+    logger.info(f"Loaded review text model {model.path} ({model.fingerprint}, weight {model.weight})")
+    return model
@@ -0,0 +1,77 @@
+"""Train the review text model offline from labeled NDJSON
+
+Each input line is a JSON object with "headline", "review_text" and a boolean
+"is_fake" label. Usage:
+
+    python -m fraud_scoring.train_text_model reviews.ndjson --output models/review_text_model
+"""
+
+import json
+import argparse
+from typing import Iterator, List, Tuple
+
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+
+from .text_model import DEFAULT_VECTORIZER_PARAMS, make_vectorizer, review_document, save_text_model
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[Tuple[List[str], np.ndarray]]:
+    documents, labels = [], []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                documents.append(review_document(record.get("headline", ""), record["review_text"]))
+                labels.append(1 if record["is_fake"] else 0)
+            except (ValueError, KeyError) as e:
+                raise SystemExit(f"{path}:{line_number}: invalid record ({e})")
+            if len(documents) >= chunk_size:
+                yield documents, np.array(labels)
+                documents, labels = [], []
+    if documents:
+        yield documents, np.array(labels)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the hashed-feature review text model")
+    parser.add_argument("input", help="Labeled NDJSON file (headline, review_text, is_fake)")
+    parser.add_argument("--output", required=True, help="Model path; writes <output>.npy and <output>.json")
+    parser.add_argument("--n-features", type=int, default=DEFAULT_VECTORIZER_PARAMS["n_features"])
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--alpha", type=float, default=1e-5, help="L2 regularization strength")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    params = dict(DEFAULT_VECTORIZER_PARAMS, n_features=args.n_features)
+    vectorizer = make_vectorizer(params)
+    classifier = SGDClassifier(loss="log_loss", alpha=args.alpha, random_state=0)
+
+    # The vectorizer is stateless, so the file is streamed in chunks on every epoch
+    examples = fake = 0
+    for epoch in range(args.epochs):
+        correct = predicted = seen = 0
+        for documents, labels in read_chunks(args.input, args.chunk_size):
+            features = vectorizer.transform(documents)
+            # Progressive validation: score each chunk before learning from it
+            if hasattr(classifier, "coef_"):
+                correct += int((classifier.predict(features) == labels).sum())
+                predicted += len(labels)
+            classifier.partial_fit(features, labels, classes=np.array([0, 1]))
+            seen += len(labels)
+            if epoch == 0:
+                examples += len(labels)
+                fake += int(labels.sum())
+        if not seen:
+            raise SystemExit(f"{args.input}: no training examples")
+        accuracy = f"{correct / predicted:.3f}" if predicted else "n/a"
+        print(f"epoch {epoch + 1}: {seen} examples, progressive accuracy {accuracy}")
+
+    fingerprint = save_text_model(args.output, params, classifier.coef_[0], classifier.intercept_[0], examples)
+    print(f"Trained on {examples} reviews ({fake} fake), saved {args.output} ({fingerprint})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # Redis tier is optional
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Result cache configuration
+ML_CACHE_ENABLED = os.getenv("ML_CACHE_ENABLED", "true").lower() == "true"
+ML_CACHE_MAX_ENTRIES = int(os.getenv("ML_CACHE_MAX_ENTRIES", "50000"))
+ML_CACHE_TTL_SECONDS = int(os.getenv("ML_CACHE_TTL_SECONDS", "3600"))
+ML_CACHE_REDIS_URL = os.getenv("ML_CACHE_REDIS_URL", "")
+
+
+def request_digest(request: BaseModel) -> str:
+    """Stable hash of a validated request (defaults filled in, keys sorted)"""
+    canonical = json.dumps(request.model_dump(), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Content-addressed memoization of scoring results
+
+    Keys combine the endpoint, the model/rule version and a hash of the normalized
+    request, so bumping the version makes old entries unreachable. Computed results
+    are stored under the version the computation reports, which can differ from the
+    looked-up one while a rule reload is in progress. Lookups go to a
+    bounded in-process LRU with TTL first, then to an optional Redis tier shared by
+    every ML replica.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = ML_CACHE_MAX_ENTRIES,
+        ttl: int = ML_CACHE_TTL_SECONDS,
+        redis_url: str = ML_CACHE_REDIS_URL,
+        enabled: bool = ML_CACHE_ENABLED,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.redis_url = redis_url
+        self.enabled = enabled
+        self.redis_client = None
+        self._entries: "OrderedDict[str, Tuple[Dict, float]]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    async def start(self):
+        if not (self.enabled and self.redis_url):
+            return
+        if redis is None:
+            logger.warning("redis package not installed, ML result cache is in-process only")
+            return
+        try:
+            self.redis_client = redis.from_url(self.redis_url, decode_responses=True)
+            await self.redis_client.ping()
+            logger.info("ML result cache using shared Redis tier")
+        except Exception as e:
+            logger.warning(f"ML result cache Redis tier unavailable: {e}")
+            self.redis_client = None
+
+    async def stop(self):
+        if self.redis_client is not None:
+            await self.redis_client.close()
+            self.redis_client = None
+
+    def _count(self, endpoint: str, outcome: str, amount: int = 1):
+        counts = self._stats.setdefault(endpoint, {"l1_hits": 0, "l2_hits": 0, "misses": 0})
+        counts[outcome] += amount
+
+    def _local_get(self, key: str) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _local_set(self, key: str, value: Dict):
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def cached_batch(
+        self,
+        endpoint: str,
+        version: str,
+        requests: Sequence[BaseModel],
+        compute: Callable[[List[BaseModel]], Awaitable[Tuple[List[Dict], str]]],
+    ) -> List[Dict]:
+        """Results for every request, computing only the ones not cached (in one call)
+
+        compute returns the results and the version they were actually computed with.
+        """
+        if not self.enabled:
+            return (await compute(list(requests)))[0]
+
+        digests = [request_digest(request) for request in requests]
+        keys = [f"ml_result:{endpoint}:{version}:{digest}" for digest in digests]
+        results: List[Optional[Dict]] = [self._local_get(key) for key in keys]
+        self._count(endpoint, "l1_hits", sum(1 for value in results if value is not None))
+
+        missing = [i for i, value in enumerate(results) if value is None]
+        if missing and self.redis_client is not None:
+            try:
+                cached = await self.redis_client.mget([keys[i] for i in missing])
+                for i, raw in zip(missing, cached):
+                    if raw is not None:
+                        results[i] = json.loads(raw)
+                        self._local_set(keys[i], results[i])
+                        self._count(endpoint, "l2_hits")
+            except Exception as e:
+                logger.warning(f"ML result cache Redis read failed: {e}")
+            missing = [i for i in missing if results[i] is None]
+
+        if missing:
+            self._count(endpoint, "misses", len(missing))
+            # Identical requests inside one batch share one key; score each once
+            first_index: Dict[str, int] = {}
+            for i in missing:
+                first_index.setdefault(keys[i], i)
+            computed, computed_version = await compute([requests[i] for i in first_index.values()])
+            fresh = dict(zip(first_index, computed))
+            for i in missing:
+                results[i] = fresh[keys[i]]
+            if computed_version != version:
+                # Scored with other rules than looked up: never file them under the wrong version
+                fresh = {
+                    f"ml_result:{endpoint}:{computed_version}:{digests[i]}": fresh[key]
+                    for key, i in first_index.items()
+                }
+            for key, value in fresh.items():
+                self._local_set(key, value)
+            if self.redis_client is not None:
+                try:
+                    async with self.redis_client.pipeline(transaction=False) as pipe:
+                        for key, value in fresh.items():
+                            pipe.set(key, json.dumps(value), ex=self.ttl)
+                        await pipe.execute()
+                except Exception as e:
+                    logger.warning(f"ML result cache Redis write failed: {e}")
+        return results
+
+    async def cached(
+        self,
+        endpoint: str,
+        version: str,
+        request: BaseModel,
+        compute: Callable[[BaseModel], Awaitable[Tuple[Dict, str]]],
+    ) -> Dict:
+        async def compute_one(requests: List[BaseModel]) -> Tuple[List[Dict], str]:
+            result, computed_version = await compute(requests[0])
+            return [result], computed_version
+
+        return (await self.cached_batch(endpoint, version, [request], compute_one))[0]
+
+    def stats(self) -> Dict:
+        endpoints = {}
+        for endpoint, counts in self._stats.items():
+            lookups = counts["l1_hits"] + counts["l2_hits"] + counts["misses"]
+            endpoints[endpoint] = dict(
+                counts,
+                hit_ratio=round((counts["l1_hits"] + counts["l2_hits"]) / lookups, 3) if lookups else 0.0
+            )
+        return {
+            "enabled": self.enabled,
+            "redis": self.redis_client is not None,
+            "entries": len(self._entries),
+            "endpoints": endpoints,
+        }
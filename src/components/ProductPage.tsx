@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 // import { ProductHeader } from './components/ProductHeader';
 import { ProductDetails } from './ProductDetails';
 import { ReviewsSection } from './ReviewsSection';
@@ -7,6 +7,23 @@ import { useKafkaProducer } from '../hooks/useKafkaProducer';
 import { mockProduct, initializeMockReviews } from '../data/mockData';
 import type { Product, Review, TrustScore } from '../types';
 
+type Delta = { [key: string]: unknown };
+
+// Apply a trust score delta: changed leaves carry their new value, null removes a field
+const applyDelta = <T,>(document: T, changes: Delta): T => {
+  const result: Delta = { ...(document as Delta) };
+  Object.entries(changes).forEach(([key, value]) => {
+    if (value === null) {
+      delete result[key];
+    } else if (typeof value === 'object' && !Array.isArray(value) && typeof result[key] === 'object' && result[key] !== null) {
+      result[key] = applyDelta(result[key], value as Delta);
+    } else {
+      result[key] = value;
+    }
+  });
+  return result as T;
+};
+
 function ProductPage() {
   const [product] = useState<Product>(mockProduct);
   const [reviews, setReviews] = useState<Review[]>([]);
@@ -14,8 +31,16 @@ function ProductPage() {
   const [loading, setLoading] = useState(true);
   const [loadingMessage, setLoadingMessage] = useState('Initializing fraud detection system...');
 
-  const { sendEvent } = useKafkaProducer();
-  const { lastMessage, connectionStatus } = useWebSocket('ws://localhost:8080/ws');
+  const { sendEvent } = useKafkaProducer({ batchWindowMs: 250 });
+  const { lastMessage, connectionStatus, sendMessage, subscribe, unsubscribe } = useWebSocket('ws://localhost:8080/ws');
+  // Sequence number of the last trust score snapshot/delta applied
+  const trustScoreSeqRef = useRef<number | null>(null);
+
+  // Only receive real-time updates for the product being viewed
+  useEffect(() => {
+    subscribe([product.id]);
+    return () => unsubscribe([product.id]);
+  }, [product.id, subscribe, unsubscribe]);
 
   // Initialize reviews with ML analysis and fetch trust score
   useEffect(() => {
@@ -118,8 +143,20 @@ function ProductPage() {
     if (lastMessage) {
       try {
         const data = JSON.parse(lastMessage);
-        if (data.type === 'trust_score_update') {
+        if (data.product_id && data.product_id !== product.id) {
+          return;
+        }
+        if (data.type === 'trust_score_snapshot' || data.type === 'trust_score_update') {
+          trustScoreSeqRef.current = data.seq ?? null;
           setTrustScore(data.payload);
+        } else if (data.type === 'trust_score_delta') {
+          if (trustScoreSeqRef.current === data.base_seq) {
+            trustScoreSeqRef.current = data.seq;
+            setTrustScore(prev => (prev ? applyDelta(prev, data.changes) : prev));
+          } else {
+            // Missed an update: ask the backend for a fresh snapshot
+            sendMessage(JSON.stringify({ type: 'resync', product_ids: [product.id] }));
+          }
         } else if (data.type === 'new_review') {
           setReviews(prev => [data.payload, ...prev]);
         }
@@ -127,7 +164,7 @@ function ProductPage() {
         console.error('Failed to parse WebSocket message:', error);
       }
     }
-  }, [lastMessage]);
+  }, [lastMessage, product.id]);
 
   // Send product view event on mount - triggers parallel processing
   useEffect(() => {
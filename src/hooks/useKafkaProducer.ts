@@ -1,7 +1,78 @@
-import { useCallback } from 'react';
+import { useCallback, useEffect, useRef } from 'react';
+
+// Low-value events that don't need to wait for broker acknowledgement
+const FIRE_AND_FORGET_TOPICS = ['product-views'];
+
+type AckMode = 'all' | 'none';
+
+type QueuedEvent = {
+  topic: string;
+  event: any;
+  resolve: (sent: boolean) => void;
+};
+
+type KafkaProducerOptions = {
+  // Collect events for this many milliseconds and send them in one bulk request (0 = send immediately)
+  batchWindowMs?: number;
+};
+
+export const useKafkaProducer = ({ batchWindowMs = 0 }: KafkaProducerOptions = {}) => {
+  const queuesRef = useRef<Record<AckMode, QueuedEvent[]>>({ all: [], none: [] });
+  const flushTimeoutRef = useRef<number>();
+
+  const flush = useCallback(async () => {
+    flushTimeoutRef.current = undefined;
+    const queues = queuesRef.current;
+    queuesRef.current = { all: [], none: [] };
+
+    await Promise.all((Object.keys(queues) as AckMode[]).map(async (ackMode) => {
+      const batch = queues[ackMode];
+      if (batch.length === 0) {
+        return;
+      }
+      try {
+        // One NDJSON request per ack mode
+        const response = await fetch(`http://localhost:8080/api/kafka/produce/bulk?ack_mode=${ackMode}`, {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/x-ndjson',
+          },
+          body: batch.map(({ topic, event }) => JSON.stringify({ topic, event })).join('\n')
+        });
+
+        if (!response.ok) {
+          throw new Error(`Failed to send ${batch.length} events`);
+        }
+
+        const result = await response.json();
+        console.log(`✅ ${batch.length} events sent to Kafka in one request (ack_mode=${ackMode}):`, result);
+        batch.forEach(({ resolve }) => resolve(true));
+      } catch (error) {
+        console.error('❌ Failed to send Kafka events:', error);
+        batch.forEach(({ resolve }) => resolve(false));
+      }
+    }));
+  }, []);
+
+  // Send anything still queued when the component unmounts
+  useEffect(() => () => {
+    if (flushTimeoutRef.current) {
+      clearTimeout(flushTimeoutRef.current);
+      flush();
+    }
+  }, [flush]);
 
-export const useKafkaProducer = () => {
   const sendEvent = useCallback(async (topic: string, event: any) => {
+    if (batchWindowMs > 0) {
+      const ackMode: AckMode = FIRE_AND_FORGET_TOPICS.includes(topic) ? 'none' : 'all';
+      return new Promise<boolean>((resolve) => {
+        queuesRef.current[ackMode].push({ topic, event, resolve });
+        if (!flushTimeoutRef.current) {
+          flushTimeoutRef.current = setTimeout(flush, batchWindowMs);
+        }
+      });
+    }
+
     try {
       // Send to backend Kafka producer
       const response = await fetch('http://localhost:8080/api/kafka/produce', {
@@ -25,12 +96,12 @@ export const useKafkaProducer = () => {
       return true;
     } catch (error) {
       console.error('❌ Failed to send Kafka event:', error);
-      
+
       // For demo purposes, we'll just log the event
       console.log(`🔄 [DEMO MODE] Event for topic "${topic}":`, event);
       return false;
     }
-  }, []);
+  }, [batchWindowMs, flush]);
 
   return { sendEvent };
-};
\ No newline at end of file
+};
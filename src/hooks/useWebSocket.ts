@@ -1,4 +1,4 @@
-import { useState, useEffect, useRef } from 'react';
+import { useState, useEffect, useRef, useCallback } from 'react';
 
 export const useWebSocket = (url: string) => {
   const [socket, setSocket] = useState<WebSocket | null>(null);
@@ -7,6 +7,16 @@ export const useWebSocket = (url: string) => {
   const reconnectTimeoutRef = useRef<number>();
   const reconnectAttempts = useRef(0);
   const maxReconnectAttempts = 5;
+  const socketRef = useRef<WebSocket | null>(null);
+  const subscriptionsRef = useRef<Set<string>>(new Set());
+
+  const sendJson = (ws: WebSocket | null, message: object) => {
+    if (ws && ws.readyState === WebSocket.OPEN) {
+      ws.send(JSON.stringify(message));
+      return true;
+    }
+    return false;
+  };
 
   useEffect(() => {
     const connect = () => {
@@ -18,7 +28,13 @@ export const useWebSocket = (url: string) => {
           console.log('✅ WebSocket connected successfully');
           setConnectionStatus('Open');
           setSocket(ws);
+          socketRef.current = ws;
           reconnectAttempts.current = 0;
+
+          // Restore product subscriptions after (re)connecting
+          if (subscriptionsRef.current.size > 0) {
+            sendJson(ws, { type: 'subscribe', product_ids: Array.from(subscriptionsRef.current) });
+          }
         };
         
         ws.onmessage = (event) => {
@@ -30,6 +46,7 @@ export const useWebSocket = (url: string) => {
           console.log(`🔌 WebSocket disconnected (code: ${event.code})`);
           setConnectionStatus('Closed');
           setSocket(null);
+          socketRef.current = null;
           
           // Attempt to reconnect with exponential backoff
           if (reconnectAttempts.current < maxReconnectAttempts) {
@@ -78,10 +95,29 @@ export const useWebSocket = (url: string) => {
     return false;
   };
 
+  // Receive updates only for the given products
+  const subscribe = useCallback((productIds: string[]) => {
+    const added = productIds.filter((id) => !subscriptionsRef.current.has(id));
+    added.forEach((id) => subscriptionsRef.current.add(id));
+    if (added.length > 0) {
+      sendJson(socketRef.current, { type: 'subscribe', product_ids: added });
+    }
+  }, []);
+
+  const unsubscribe = useCallback((productIds: string[]) => {
+    const removed = productIds.filter((id) => subscriptionsRef.current.has(id));
+    removed.forEach((id) => subscriptionsRef.current.delete(id));
+    if (removed.length > 0) {
+      sendJson(socketRef.current, { type: 'unsubscribe', product_ids: removed });
+    }
+  }, []);
+
   return {
     socket,
     lastMessage,
     connectionStatus,
-    sendMessage
+    sendMessage,
+    subscribe,
+    unsubscribe
   };
 };
\ No newline at end of file
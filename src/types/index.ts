@@ -35,6 +35,7 @@ export interface Review {
   isFake: boolean;
   fakeReasons: string[];
   location?: string;
+  scorer?: string;
 }
 
 export interface TrustScore {
@@ -0,0 +1,331 @@
+"""Parity of the rule tables (fraud_scoring/rule_tables.json) with the original analyzers
+
+The reference functions below are the if/elif analyzers the tables replaced. Every
+tier edge is scored through both the single-item and the batch path, so an edit to
+the tables that changes any result fails here.
+
+Run from the repository root: python -m pytest tests
+"""
+
+from itertools import product
+
+import pytest
+
+from fraud_scoring import (
+    ReviewAnalysisRequest, ViewPatternAnalysisRequest, PurchaseAnalysisRequest, SellerAnalysisRequest,
+    MODEL_VERSION, review_text_model,
+    score_review, score_view_pattern, score_purchase, score_seller,
+    score_review_batch, score_view_pattern_batch, score_purchase_batch, score_seller_batch,
+)
+from fraud_scoring.rules import PUNCTUATION_RE, SENTENCE_SPLIT_RE, _lexicon_counts
+
+
+def reference_review(request):
+    review_length = request.review_length_chars or len(request.review_text)
+    score, indicators = 100, []
+
+    def penalize(points, indicator):
+        nonlocal score
+        score -= points
+        indicators.append(indicator)
+
+    if request.typing_duration_seconds > 0:
+        chars_per_second = review_length / request.typing_duration_seconds
+        if chars_per_second > 10:
+            penalize(25, "Extremely fast typing speed detected")
+        elif chars_per_second > 6:
+            penalize(15, "Unusually fast typing speed")
+    if request.paste_count > 2:
+        penalize(20, "Multiple paste operations detected")
+    elif request.paste_count > 0 and review_length > 200:
+        penalize(10, "Large amount of pasted content")
+    if request.account_age_days < 30:
+        penalize(20, "Very new account (less than 30 days)")
+    elif request.account_age_days < 90:
+        penalize(10, "Relatively new account")
+    content_counts, combined_counts = _lexicon_counts(request)
+    if combined_counts.get("superlatives", 0) > 3:
+        penalize(15, "Excessive use of superlatives")
+    if content_counts.get("generic_phrases", 0) > 2:
+        penalize(10, "Generic review pattern detected")
+    if not PUNCTUATION_RE.search(request.review_text):
+        penalize(15, "No punctuation usage")
+    if any(len(s.strip()) > 150 for s in SENTENCE_SPLIT_RE.split(request.review_text)):
+        penalize(12, "Run-on sentence structure")
+    if request.rating == 5 and review_length < 50:
+        penalize(8, "Very short review for maximum rating")
+    elif request.rating == 1 and review_length < 30:
+        penalize(8, "Very short review for minimum rating")
+    if not request.verified_purchase and request.rating in [1, 5]:
+        penalize(25, "Extreme rating without verified purchase")
+    if request.edit_count > 20:
+        penalize(10, "Excessive editing detected")
+    elif request.edit_count == 0 and review_length > 200:
+        penalize(8, "No editing on long review (potential copy-paste)")
+
+    score = max(10, min(100, score))
+    return {
+        "authenticity_score": score,
+        "is_fake": score < 60,
+        "confidence_level": round(abs(score - 50) / 50, 2),
+        "fake_indicators": indicators,
+        "suggested_action": "remove" if score < 40 else "flag" if score < 60 else "approve",
+        "model_version": MODEL_VERSION,
+    }
+
+
+def reference_view_pattern(request):
+    view_quality_score = request.view_quality_score
+    if request.bot_probability > 0.5:
+        view_quality_score = max(20, view_quality_score - 30)
+    elif request.bot_probability > 0.3:
+        view_quality_score = max(40, view_quality_score - 15)
+    traffic_classification, anomaly_flags = request.traffic_pattern, []
+    if request.bot_probability > 0.7:
+        anomaly_flags.append("High bot traffic probability")
+        traffic_classification = "bot-like"
+    elif request.bot_probability > 0.4:
+        anomaly_flags.append("Suspicious traffic patterns")
+        traffic_classification = "suspicious"
+    return {
+        "view_quality_score": view_quality_score,
+        "bot_probability": request.bot_probability,
+        "traffic_pattern": traffic_classification,
+        "anomaly_flags": anomaly_flags,
+        "recommendation": "monitor" if view_quality_score < 60 else "normal",
+    }
+
+
+def reference_purchase(request):
+    score, risk_factors = 100, []
+    if request.account_age_days < 7:
+        score -= 30
+        risk_factors.append("Very new account making purchase")
+    elif request.account_age_days < 30:
+        score -= 15
+        risk_factors.append("New account")
+    if request.purchase_amount > 1000:
+        score -= 10
+        risk_factors.append("High-value purchase")
+    if request.quantity > 10:
+        score -= 15
+        risk_factors.append("Large quantity purchase")
+    if request.time_to_purchase_minutes < 2:
+        score -= 20
+        risk_factors.append("Extremely quick purchase decision")
+    elif request.time_to_purchase_minutes < 5:
+        score -= 10
+        risk_factors.append("Very quick purchase decision")
+    if request.is_first_purchase and request.purchase_amount > 500:
+        score -= 15
+        risk_factors.append("High-value first purchase")
+    if request.payment_method_type in ["prepaid_card", "cryptocurrency"]:
+        score -= 20
+        risk_factors.append("High-risk payment method")
+    score = max(10, min(100, score))
+    level = "high" if score < 40 else "medium" if score < 70 else "low"
+    return {
+        "legitimacy_score": score,
+        "fraud_risk_level": level,
+        "risk_factors": risk_factors,
+        "requires_manual_review": level != "low",
+        "confidence": 0.85,
+    }
+
+
+def reference_seller(request):
+    score, patterns = 100, []
+    if request.account_age_days < 30:
+        score -= 20
+        patterns.append("Very new seller account")
+    elif request.account_age_days < 90:
+        score -= 10
+        patterns.append("New seller account")
+    if request.frequency_last_24h > 50:
+        score -= 25
+        patterns.append("Extremely high activity frequency")
+    elif request.frequency_last_24h > 20:
+        score -= 15
+        patterns.append("High activity frequency")
+    if request.total_products_listed > 1000:
+        score -= 10
+        patterns.append("Very large product catalog")
+    elif request.total_products_listed < 5:
+        score -= 5
+        patterns.append("Limited product catalog")
+    if request.average_rating < 3.0:
+        score -= 30
+        patterns.append("Poor seller rating")
+    elif request.average_rating < 4.0:
+        score -= 15
+        patterns.append("Below average seller rating")
+    if request.activity_type in ["bulk_price_changes", "inventory_manipulation", "fake_reviews"]:
+        score -= 20
+        patterns.append(f"Suspicious activity: {request.activity_type}")
+    score = max(10, min(100, score))
+    return {
+        "reputation_score": score,
+        "activity_classification": "fraudulent" if score < 40 else "suspicious" if score < 70 else "normal",
+        "behavior_patterns": patterns,
+        "trust_trend": "improving" if score > 80 else "declining" if score < 50 else "stable",
+        "confidence": 0.82,
+    }
+
+
+def variants(base, edges):
+    """The base request plus one copy per (field, value) edge"""
+    return [base] + [base.model_copy(update={field: value}) for field, values in edges.items() for value in values]
+
+
+def combinations(base, edges):
+    """One copy of the base request per combination of edge values (reaches the score bands)"""
+    return [base.model_copy(update=dict(zip(edges, values))) for values in product(*edges.values())]
+
+
+REVIEW_TEXT = "Solid build and it does what it says. Shipping took a week."
+REVIEW_BASE = ReviewAnalysisRequest(rating=4, headline="Works", review_text=REVIEW_TEXT, review_length_chars=120)
+REVIEWS = variants(
+    REVIEW_BASE,
+    {
+        # chars per second = 120 / duration: 6 and 10 are the tier edges
+        "typing_duration_seconds": [0, 12, 11, 20, 19, 21],
+        "paste_count": [1, 2, 3],
+        "account_age_days": [0, 29, 30, 89, 90],
+        "review_length_chars": [0, 29, 30, 49, 50, 200, 201],
+        "edit_count": [0, 20, 21],
+        "verified_purchase": [False],
+        "rating": [1, 3, 5],
+        "headline": ["amazing", "amazing incredible perfect terrible"],
+        "review_text": [
+            "No punctuation in this one at all",
+            "amazing incredible perfect. Nice.",
+            "amazing incredible perfect terrible. Nice.",
+            "great product, highly recommend. Nice.",
+            "great product, highly recommend, five stars. Nice.",
+            "x" * 150 + ". Short.",
+            "x" * 151 + ". Short.",
+        ],
+    },
+) + [
+    # Combined edges: paste with long text, short extreme ratings, unverified, and the score floor
+    ReviewAnalysisRequest(rating=5, headline="h", review_text=REVIEW_TEXT, review_length_chars=201, paste_count=1, edit_count=0),
+    ReviewAnalysisRequest(rating=1, headline="h", review_text="Bad.", verified_purchase=False, account_age_days=5),
+    ReviewAnalysisRequest(
+        rating=5, headline="best ever amazing", review_text="amazing incredible perfect great product highly recommend five stars",
+        verified_purchase=False, account_age_days=1, typing_duration_seconds=1, paste_count=5, edit_count=30,
+    ),
+] + combinations(
+    REVIEW_BASE.model_copy(update={"verified_purchase": False}),
+    {
+        "account_age_days": [29, 89, 365],
+        "rating": [4, 5],
+        "paste_count": [0, 3],
+        "review_text": [REVIEW_TEXT, "No punctuation in this one at all"],
+    },
+)
+
+VIEW_PATTERNS = variants(
+    ViewPatternAnalysisRequest(product_id="p", view_quality_score=70, bot_probability=0.1, traffic_pattern="organic"),
+    {
+        "bot_probability": [0.3, 0.31, 0.4, 0.41, 0.5, 0.51, 0.7, 0.71, 1.0],
+        "view_quality_score": [0, 45, 60, 74, 75, 100],
+    },
+) + [
+    ViewPatternAnalysisRequest(product_id="p", view_quality_score=45, bot_probability=0.45, traffic_pattern="organic"),
+    ViewPatternAnalysisRequest(product_id="p", view_quality_score=89, bot_probability=0.6, traffic_pattern="organic"),
+]
+
+PURCHASE_BASE = PurchaseAnalysisRequest(
+    order_id="o", user_id="u", product_id="p", purchase_amount=100.0, quantity=1,
+    payment_method_type="card", is_first_purchase=False, account_age_days=365, time_to_purchase_minutes=30,
+)
+PURCHASES = variants(
+    PURCHASE_BASE,
+    {
+        "account_age_days": [0, 6, 7, 29, 30],
+        "purchase_amount": [500.0, 500.01, 1000.0, 1000.01],
+        "quantity": [10, 11],
+        "time_to_purchase_minutes": [0, 1, 2, 4, 5],
+        "payment_method_type": ["prepaid_card", "cryptocurrency", "debit_card"],
+        "is_first_purchase": [True],
+    },
+) + [
+    PurchaseAnalysisRequest(
+        order_id="o", user_id="u", product_id="p", purchase_amount=500.01, quantity=1,
+        payment_method_type="card", is_first_purchase=True, account_age_days=365, time_to_purchase_minutes=30,
+    ),
+    PurchaseAnalysisRequest(
+        order_id="o", user_id="u", product_id="p", purchase_amount=5000.0, quantity=50,
+        payment_method_type="cryptocurrency", is_first_purchase=True, account_age_days=1, time_to_purchase_minutes=0,
+    ),
+] + combinations(
+    PURCHASE_BASE,
+    {
+        "account_age_days": [6, 29, 365],
+        "time_to_purchase_minutes": [1, 4, 30],
+        "payment_method_type": ["card", "prepaid_card"],
+        "quantity": [1, 11],
+    },
+)
+
+SELLER_BASE = SellerAnalysisRequest(
+    seller_id="s", activity_type="listing_update", frequency_last_24h=5, account_age_days=365,
+    total_products_listed=50, average_rating=4.5,
+)
+SELLERS = variants(
+    SELLER_BASE,
+    {
+        "account_age_days": [0, 29, 30, 89, 90],
+        "frequency_last_24h": [20, 21, 50, 51],
+        "total_products_listed": [0, 4, 5, 1000, 1001],
+        "average_rating": [2.99, 3.0, 3.99, 4.0],
+        "activity_type": ["bulk_price_changes", "inventory_manipulation", "fake_reviews"],
+    },
+) + [
+    SellerAnalysisRequest(
+        seller_id="s", activity_type="fake_reviews", frequency_last_24h=100, account_age_days=1,
+        total_products_listed=2000, average_rating=1.0,
+    ),
+] + combinations(
+    SELLER_BASE,
+    {
+        "account_age_days": [29, 89, 365],
+        "frequency_last_24h": [5, 21, 51],
+        "average_rating": [2.99, 3.99, 4.5],
+        "total_products_listed": [4, 50],
+    },
+)
+
+ANALYZERS = {
+    "review": (score_review, score_review_batch, reference_review, REVIEWS),
+    "view_pattern": (score_view_pattern, score_view_pattern_batch, reference_view_pattern, VIEW_PATTERNS),
+    "purchase": (score_purchase, score_purchase_batch, reference_purchase, PURCHASES),
+    "seller": (score_seller, score_seller_batch, reference_seller, SELLERS),
+}
+
+
+def assert_same(result, expected, request):
+    assert result == expected, request
+    # Same key order and value types as the original JSON responses
+    assert list(result) == list(expected), request
+    assert all(type(result[key]) is type(expected[key]) for key in expected), request
+
+
+@pytest.mark.parametrize("analyzer", ANALYZERS)
+def test_single_item_path_matches_reference(analyzer):
+    score, _, reference, requests = ANALYZERS[analyzer]
+    if analyzer == "review" and review_text_model is not None:
+        pytest.skip("REVIEW_TEXT_MODEL_PATH is set: review scores include the text model")
+    for request in requests:
+        assert_same(score(request), reference(request), request)
+
+
+@pytest.mark.parametrize("analyzer", ANALYZERS)
+def test_batch_path_matches_reference(analyzer):
+    _, score_batch, reference, requests = ANALYZERS[analyzer]
+    if analyzer == "review" and review_text_model is not None:
+        pytest.skip("REVIEW_TEXT_MODEL_PATH is set: review scores include the text model")
+    results = score_batch(requests)
+    assert len(results) == len(requests)
+    for request, result in zip(requests, results):
+        assert_same(result, reference(request), request)